@@ -0,0 +1,84 @@
+"""Envelopes per second built by the :mod:`mpesa.drc.generators`.
+
+Compares the former per request Jinja2 rendering, which looked the template
+up in the environment and rendered it for every envelope, with the
+:class:`mpesa.drc.generators.Envelope` builders compiled once.
+
+Usage::
+
+    python benchmarks/drc_envelopes.py [-n NUMBER]
+"""
+import argparse
+import time
+
+from mpesa.drc import generators
+
+CONTEXTS = {
+    "login_request.xml": {"Username": "thirdparty", "Password": "s3cr3t&"},
+    "c2b_request.xml": {
+        "Token": "0a1b2c3d4e5f",
+        "ThirdPartyReference": "REF-0001",
+        "Initials": "J",
+        "Date": "20200701120000",
+        "CustomerMSISDN": "243000000000",
+        "CommandId": "InitTrans_oneForallC2B",
+        "Language": "EN",
+        "CallBackDestination": "https://example.com/c2b?a=1&b=2",
+        "CallBackChannel": "4",
+        "Currency": "USD",
+        "Surname": "Doe",
+        "Amount": "10.00",
+        "ServiceProviderCode": "8337",
+    },
+    "b2c_request.xml": {
+        "Token": "0a1b2c3d4e5f",
+        "ThirdPartyReference": "REF-0002",
+        "TransactionDateTime": "20200701120000",
+        "Shortcode": "15058",
+        "CustomerMSISDN": "243000000000",
+        "ServiceProviderName": "Provider",
+        "Language": "EN",
+        "CallBackChannel": "4",
+        "CallBackDestination": "https://example.com/b2c?a=1&b=2",
+        "Currency": "USD",
+        "CommandID": "InitTrans_one4allb2c",
+        "Amount": "10.00",
+    },
+}
+
+
+def legacy(template_name, context):
+    """Render as the generators did before, per request."""
+    return generators.environment.get_template(template_name).render(context)
+
+
+def compiled(template_name, context):
+    """Build with the precompiled envelope."""
+    return generators.envelope(template_name).build(context)
+
+
+def measure(build, template_name, context, number):
+    """Return envelopes per second of build."""
+    build(template_name, context)
+    start = time.perf_counter()
+    for _ in range(number):
+        build(template_name, context)
+    return number / (time.perf_counter() - start)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    args = parser.parse_args()
+    print("{:<20} {:>14} {:>14} {:>8}".format(
+        "template", "jinja2 env/s", "compiled env/s", "speedup"))
+    for template_name, context in CONTEXTS.items():
+        before = measure(legacy, template_name, context, args.number)
+        after = measure(compiled, template_name, context, args.number)
+        print("{:<20} {:>14,.0f} {:>14,.0f} {:>7.1f}x".format(
+            template_name, before, after, after / before))
+
+
+if __name__ == "__main__":
+    main()
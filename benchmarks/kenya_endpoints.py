@@ -0,0 +1,182 @@
+"""Per-call overhead of :class:`mpesa.kenya.API` request preparation.
+
+Compares the former per-call URL, header and payload construction of
+``API.b2c`` and ``API.lnmo_stkpush`` with the endpoint registry, using a stub
+session pool and token cache so no network I/O is measured. The registry path
+also pays for the retry policy, the credential lookup and the rate limiter
+check, which the former code did not have.
+
+Usage::
+
+    python benchmarks/kenya_endpoints.py [-n NUMBER]
+"""
+import argparse
+import base64
+import datetime
+import timeit
+
+from mpesa.kenya import API
+
+
+class _Response:
+    status_code = 200
+    headers = {}
+
+    def json(self):
+        return {}
+
+
+class _StubPool:
+    def request(self, method, url, **kwargs):
+        return _Response()
+
+    def post(self, url, headers=None, json=None, **kwargs):
+        return _Response()
+
+    get = post
+
+
+class _StubCache:
+    def get(self, key, fetch):
+        return "token"
+
+
+B2C = dict(
+    initiator_name="testapi",
+    security_credential="credential",
+    command_id="BusinessPayment",
+    amount="10",
+    party_a="600000",
+    party_b="254700000000",
+    remarks="remarks",
+    queue_timeout_url="https://example.com/timeout",
+    result_url="https://example.com/result",
+    occassion="occassion",
+)
+
+STK = dict(
+    business_shortcode="174379",
+    passcode="passkey",
+    amount="1",
+    callback_url="https://example.com/callback",
+    reference_code="INV-1",
+    phone_number="254700000000",
+    description="Invoice",
+)
+
+
+def legacy_b2c(api, initiator_name=None, security_credential=None,
+               command_id=None, amount=None, party_a=None, party_b=None,
+               remarks=None, queue_timeout_url=None, result_url=None,
+               occassion=None):
+    """Per-call work ``API.b2c`` did before the endpoint registry."""
+    payload = {
+        "InitiatorName": initiator_name,
+        "SecurityCredential": security_credential,
+        "CommandID": command_id,
+        "Amount": amount,
+        "PartyA": party_a,
+        "PartyB": party_b,
+        "Remarks": remarks,
+        "QueueTimeOutURL": queue_timeout_url,
+        "ResultURL": result_url,
+        "Occassion": occassion,
+    }
+    headers = {
+        "Authorization": "Bearer {0}".format(api.authentication_token),
+        "Content-Type": "application/json",
+    }
+    if api.env == "production":
+        base_safaricom_url = api.live_url
+    else:
+        base_safaricom_url = api.sandbox_url
+    saf_url = "{0}{1}".format(
+        base_safaricom_url, "/mpesa/b2c/v1/paymentrequest")
+    try:
+        r = api.session_pool.post(saf_url, headers=headers, json=payload)
+    except Exception:
+        r = api.session_pool.post(saf_url, headers=headers,
+                                  json=payload, verify=False)
+    return r.json()
+
+
+def legacy_lnmo_stkpush(api, business_shortcode=None, passcode=None,
+                        amount=None, callback_url=None, reference_code=None,
+                        phone_number=None, description=None):
+    """Per-call work ``API.lnmo_stkpush`` did before the endpoint registry."""
+    time = (
+        str(datetime.datetime.now())
+        .split(".")[0]
+        .replace("-", "")
+        .replace(" ", "")
+        .replace(":", "")
+    )
+    password = "{0}{1}{2}".format(
+        str(business_shortcode), str(passcode), time)
+    encoded = base64.b64encode(bytes(password, encoding="utf8"))
+    payload = {
+        "BusinessShortCode": business_shortcode,
+        "Password": encoded.decode("utf-8"),
+        "Timestamp": time,
+        "TransactionType": "CustomerPayBillOnline",
+        "Amount": amount,
+        "PartyA": int(phone_number),
+        "PartyB": business_shortcode,
+        "PhoneNumber": int(phone_number),
+        "CallBackURL": callback_url,
+        "AccountReference": reference_code,
+        "TransactionDesc": description,
+    }
+    headers = {
+        "Authorization": "Bearer {0}".format(api.authentication_token),
+        "Content-Type": "application/json",
+    }
+    if api.env == "production":
+        base_safaricom_url = api.live_url
+    else:
+        base_safaricom_url = api.sandbox_url
+    saf_url = "{0}{1}".format(
+        base_safaricom_url, "/mpesa/stkpush/v1/processrequest"
+    )
+    try:
+        r = api.session_pool.post(saf_url, headers=headers, json=payload)
+    except Exception:
+        r = api.session_pool.post(saf_url, headers=headers,
+                                  json=payload, verify=False)
+    return r.json()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=200000)
+    args = parser.parse_args()
+    api = API(
+        app_key="key",
+        app_secret="secret",
+        token_cache=_StubCache(),
+        session_pool=_StubPool(),
+    )
+    cases = [
+        ("b2c", lambda: legacy_b2c(api, **B2C), lambda: api.b2c(**B2C)),
+        (
+            "lnmo_stkpush",
+            lambda: legacy_lnmo_stkpush(api, **STK),
+            lambda: api.lnmo_stkpush(**STK),
+        ),
+    ]
+    print("{0:<14}{1:>14}{2:>14}{3:>10}".format(
+        "operation", "before ns", "after ns", "ratio"))
+    for name, before, after in cases:
+        t_before = min(timeit.repeat(before, number=args.number, repeat=3))
+        t_after = min(timeit.repeat(after, number=args.number, repeat=3))
+        print("{0:<14}{1:>14.0f}{2:>14.0f}{3:>10.2f}".format(
+            name,
+            t_before / args.number * 1e9,
+            t_after / args.number * 1e9,
+            t_before / t_after,
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""CPU time of :meth:`mpesa.portalsdk.APIRequest.create_default_headers`.
+
+Compares the former per-request key parsing and encryption of the bearer
+with the cached cipher and memoized bearer, using an RSA key generated at
+start up in place of a market public key.
+
+Usage::
+
+    python benchmarks/portalsdk_bearer.py [-n NUMBER] [--bits BITS]
+"""
+import argparse
+import time
+from base64 import b64decode, b64encode
+
+from Crypto.Cipher import PKCS1_v1_5 as Cipher_PKCS1_v1_5
+from Crypto.PublicKey import RSA
+
+from mpesa.portalsdk import APIContext, APIRequest, BearerCache
+
+
+def legacy_headers(context):
+    """Former ``create_bearer_token`` and ``create_default_headers``."""
+    key_der = b64decode(context.public_key)
+    key_pub = RSA.importKey(key_der)
+    cipher = Cipher_PKCS1_v1_5.new(key_pub)
+    cipher_text = cipher.encrypt(context.api_key.encode("ascii"))
+    encrypted_msg = b64encode(cipher_text)
+    context.add_header(
+        "Authorization", "Bearer {}".format(encrypted_msg.decode("utf-8")))
+    context.add_header("Content-Type", "application/json")
+    context.add_header("Host", context.address)
+
+
+def cpu_per_call(fn, number: int) -> float:
+    """Return the CPU microseconds spent per call of fn."""
+    start = time.process_time()
+    for _ in range(number):
+        fn()
+    return (time.process_time() - start) / number * 1e6
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    parser.add_argument("--bits", type=int, default=4096)
+    args = parser.parse_args()
+
+    key = RSA.generate(args.bits)
+    public_key = b64encode(key.publickey().export_key("DER")).decode()
+    context = APIContext(
+        api_key="a" * 32,
+        public_key=public_key,
+        address="openapi.m-pesa.com",
+    )
+    request = APIRequest(context, bearer_cache=BearerCache())
+
+    before = cpu_per_call(lambda: legacy_headers(context), args.number)
+    after = cpu_per_call(request.create_default_headers, args.number)
+    print("{0:<24}{1:>14}".format("variant", "cpu us/req"))
+    print("{0:<24}{1:>14.1f}".format("before", before))
+    print("{0:<24}{1:>14.1f}".format("after", after))
+    print("{0:<24}{1:>14.1f}".format("speedup", before / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Memory of the :class:`mpesa.portalsdk.APIContext` built per request.
+
+Compares the former ``__dict__`` based context, which copied every field,
+header and parameter into each request, with slot based contexts derived from
+the frozen base context a market client builds once. Requests are answered by
+an :class:`mpesa.portalsdk.InMemoryTransport` so only the client is measured.
+
+Reports the bytes held by one context, measured over a retained batch, and
+the peak and retained traced memory while streaming ``NUMBER`` requests.
+
+Usage::
+
+    python benchmarks/portalsdk_context_memory.py [-n NUMBER] [--batch BATCH]
+"""
+import argparse
+import gc
+import tracemalloc
+from base64 import b64encode
+
+from Crypto.PublicKey import RSA
+
+from mpesa import mozambique
+from mpesa.portalsdk import APIMethodType, InMemoryTransport
+
+
+class LegacyContext:
+    """Former APIContext, one instance dict and two dicts per request."""
+
+    def __init__(self, api_key, public_key, ssl, method_type, address, port,
+                 path, headers, parameters):
+        """Construct."""
+        self.api_key = api_key
+        self.public_key = public_key
+        self.ssl = ssl
+        self.method_type = method_type
+        self.address = address
+        self.port = port
+        self.path = path
+        self.headers = dict(headers)
+        self.parameters = dict(parameters)
+
+
+def legacy_context(client, params):
+    """Return a context the way the market clients used to build it."""
+    return LegacyContext(
+        client.api_key, client.public_key, True, APIMethodType.GET,
+        client.sandbox_host, 18353, "/ipg/v1x/queryTransactionStatus/",
+        {"Origin": "*"}, params,
+    )
+
+
+def derived_context(client, params):
+    """Return a context derived from the client base context."""
+    return client._create_context(
+        path="/ipg/v1x/queryTransactionStatus/", port=18353, params=params)
+
+
+def params_of(i):
+    """Return the parameters of request i."""
+    return {
+        "input_QueryReference": str(i),
+        "input_ServiceProviderCode": "000000",
+        "input_ThirdPartyConversationID": "asv02e5958774f7ba228d83d0d689761",
+    }
+
+
+def bytes_per_context(build, client, batch):
+    """Return the traced bytes held per context over a retained batch."""
+    params = [params_of(i) for i in range(batch)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(client, p) for p in params]
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return held / batch
+
+
+def stream(client, number):
+    """Return ``(peak, retained)`` traced bytes over number requests."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(number):
+        client.transaction_status(str(i), "000000", "ref")
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - before, current - before
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    key = RSA.generate(2048)
+    public_key = b64encode(key.publickey().export_key("DER")).decode()
+    client = mozambique.API(
+        public_key, "a" * 32, transport=InMemoryTransport())
+    client.transaction_status("warmup", "000000", "ref")
+
+    print("{0:<24}{1:>14}".format("variant", "bytes/context"))
+    for name, build in (("legacy", legacy_context),
+                        ("derived", derived_context)):
+        print("{0:<24}{1:>14.0f}".format(
+            name, bytes_per_context(build, client, args.batch)))
+
+    peak, retained = stream(client, args.number)
+    print("{0:<24}{1:>14}".format("requests", args.number))
+    print("{0:<24}{1:>14}".format("peak bytes", peak))
+    print("{0:<24}{1:>14}".format("retained bytes", retained))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 Submodules.
 -------------
+- `mpesa.batch`
 - `mpesa.drc`
 - `mpesa.egypt`
 - `mpesa.ghana`
@@ -9,9 +10,11 @@ Submodules.
 - `mpesa.lesotho`
 - `mpesa.mozambique`
 - `mpesa.portalsdk`
+- `mpesa.ratelimit`
 - `mpesa.tanzania`
 - `mpesa.tests`
 """
+from . import batch
 from . import drc
 from . import egypt
 from . import ghana
@@ -19,10 +22,12 @@ from . import kenya
 from . import lesotho
 from . import mozambique
 from . import portalsdk
+from . import ratelimit
 from . import tanzania
 from . import tests
 
 __all__ = [
+    "batch",
     "drc",
     "egypt",
     "ghana",
@@ -30,6 +35,7 @@ __all__ = [
     "lesotho",
     "mozambique",
     "portalsdk",
+    "ratelimit",
     "tanzania",
     "tests",
 ]
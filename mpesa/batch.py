@@ -0,0 +1,284 @@
+"""Bounded Concurrency Batch Runner.
+
+Streams a lazy iterable of items through a callable with at most
+``concurrency`` calls in flight, yielding a :class:`BatchResult` for each item
+as it finishes. Item keys are appended to a :class:`Checkpoint` before and
+after each call, so an interrupted run can be resumed without resending
+finished items, nor items whose call may have gone through.
+"""
+import asyncio
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+__all__ = [
+    "BatchResult",
+    "Checkpoint",
+    "run_batch",
+    "run_batch_async",
+]
+
+BatchResult = namedtuple("BatchResult", ["key", "item", "response", "error"])
+BatchResult.__doc__ = """Outcome of one batch item.
+
+``response`` holds the return value of the call, ``error`` the exception it
+raised; exactly one of them is ``None``. An item whose call raised is left
+in :attr:`Checkpoint.unknown`.
+"""
+
+
+class Checkpoint:
+    """Append-only file of item keys and their state.
+
+    A key is either completed or of unknown outcome. :func:`run_batch`
+    records an item as unknown before calling it, then completes it on
+    success or clears it on a definite failure. A call that raised, was
+    still in flight when the run stopped, or was cut short by a crash stays
+    unknown: it may have gone through, e.g. a B2C payout whose response
+    timed out. Both states are skipped when a run resumes, unknown keys
+    until they are settled with :meth:`reconcile`.
+
+    Keys already in the file are loaded on construction, every write is
+    flushed straight away so a crash loses at most the line being written.
+
+    :param path: File to read and append keys to, keys are only kept in
+        memory when ``None``, defaults ``None``.
+    :type path: str, optional.
+    """
+
+    _UNKNOWN = "?\t"
+    _CLEARED = "-\t"
+
+    def __init__(self, path: str = None):
+        """Construct."""
+        self.path = path
+        self._done = set()
+        self._unknown = set()
+        self._file = None
+        if path is not None:
+            if os.path.exists(path):
+                with open(path, "r") as rf:
+                    for line in rf:
+                        self._load(line.rstrip("\n"))
+            self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def _load(self, line: str):
+        """Replay one line of the file."""
+        if line.startswith(self._UNKNOWN):
+            key = line[len(self._UNKNOWN):]
+            if key not in self._done:
+                self._unknown.add(key)
+        elif line.startswith(self._CLEARED):
+            self._unknown.discard(line[len(self._CLEARED):])
+        elif line.strip():
+            key = line.strip()
+            self._unknown.discard(key)
+            self._done.add(key)
+
+    def __contains__(self, key) -> bool:
+        """Return whether key is completed or of unknown outcome."""
+        key = str(key)
+        return key in self._done or key in self._unknown
+
+    def __len__(self) -> int:
+        """Return the number of completed keys."""
+        return len(self._done)
+
+    @property
+    def unknown(self) -> frozenset:
+        """Return the keys of unknown outcome, awaiting :meth:`reconcile`."""
+        with self._lock:
+            return frozenset(self._unknown)
+
+    def _write(self, line: str):
+        """Append line to the file, the lock must be held."""
+        if self._file is not None:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def add(self, key):
+        """Record key as completed."""
+        key = str(key)
+        with self._lock:
+            if key in self._done:
+                return
+            self._unknown.discard(key)
+            self._done.add(key)
+            self._write(key)
+
+    def begin(self, key):
+        """Record key as of unknown outcome, before its call is sent."""
+        key = str(key)
+        with self._lock:
+            if key in self._done or key in self._unknown:
+                return
+            self._unknown.add(key)
+            self._write(self._UNKNOWN + key)
+
+    def clear(self, key):
+        """Forget an unknown key, so a resumed run sends its item again."""
+        key = str(key)
+        with self._lock:
+            if key not in self._unknown:
+                return
+            self._unknown.discard(key)
+            self._write(self._CLEARED + key)
+
+    def reconcile(self, key, completed: bool):
+        """Settle an unknown key once its real outcome has been checked.
+
+        :param key: Item key.
+        :param completed: Whether the call went through; the key is then
+            completed, otherwise cleared so the item is sent again.
+        :type completed: bool
+        """
+        if completed:
+            self.add(key)
+        else:
+            self.clear(key)
+
+    def close(self):
+        """Close the checkpoint file."""
+        if self._file is not None:
+            self._file.close()
+
+
+def _checkpoint(checkpoint):
+    """Return a :class:`Checkpoint` for a path, or checkpoint unchanged."""
+    if isinstance(checkpoint, str):
+        return Checkpoint(checkpoint)
+    return checkpoint
+
+
+def _result(key, item, future, checkpoint, succeeded) -> BatchResult:
+    """Return the :class:`BatchResult` of a finished future.
+
+    The key of an item whose call raised stays unknown in checkpoint.
+    """
+    error = future.exception()
+    if error is not None:
+        return BatchResult(key, item, None, error)
+    response = future.result()
+    if checkpoint is not None:
+        if succeeded(response):
+            checkpoint.add(key)
+        else:
+            checkpoint.clear(key)
+    return BatchResult(key, item, response, None)
+
+
+def run_batch(
+    call,
+    items,
+    key,
+    concurrency: int = 8,
+    checkpoint=None,
+    succeeded=lambda response: True,
+):
+    """Run ``call(item)`` for every item with bounded concurrency.
+
+    Items are pulled from ``items`` only as worker slots free up, so the
+    batch is never held in memory, and results are yielded in completion
+    order.
+
+    :param call: Callable invoked with each item.
+    :type call: callable
+    :param items: Iterable of items, consumed lazily.
+    :type items: iterable
+    :param key: Callable returning the unique checkpoint key of an item.
+    :type key: callable
+    :param concurrency: Maximum calls in flight, defaults ``8``.
+    :type concurrency: int
+    :param checkpoint: :class:`Checkpoint` or path of one. Items whose key is
+        completed or unknown are skipped. Each item is recorded as unknown
+        before its call, then completed or cleared by its response; items
+        whose call raised or was in flight when the run stopped stay
+        unknown.
+    :type checkpoint: :class:`Checkpoint` or str, optional.
+    :param succeeded: Predicate on a response deciding whether its item is
+        completed, otherwise the response is a definite failure and the item
+        is cleared, defaults to every response.
+    :type succeeded: callable
+    :return: Iterator of :class:`BatchResult`.
+    """
+    owned = isinstance(checkpoint, str)
+    checkpoint = _checkpoint(checkpoint)
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        for item in items:
+            item_key = key(item)
+            if checkpoint is not None and item_key in checkpoint:
+                continue
+            if len(pending) >= concurrency:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    k, i = pending.pop(future)
+                    yield _result(k, i, future, checkpoint, succeeded)
+            if checkpoint is not None:
+                checkpoint.begin(item_key)
+            pending[executor.submit(call, item)] = (item_key, item)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                k, i = pending.pop(future)
+                yield _result(k, i, future, checkpoint, succeeded)
+    finally:
+        running = []
+        for future, (k, i) in pending.items():
+            if not future.cancel():
+                running.append((k, i, future))
+            elif checkpoint is not None:
+                checkpoint.clear(k)
+        executor.shutdown(wait=True)
+        if checkpoint is not None:
+            for k, i, future in running:
+                _result(k, i, future, checkpoint, succeeded)
+        if owned:
+            checkpoint.close()
+
+
+async def run_batch_async(
+    call,
+    items,
+    key,
+    concurrency: int = 8,
+    checkpoint=None,
+    succeeded=lambda response: True,
+):
+    """Asyncio flavour of :func:`run_batch`.
+
+    ``call`` is a coroutine function and results are produced by an async
+    generator. Items still pending when the run stops are cancelled and
+    stay unknown, as their request may already be on the wire.
+    """
+    owned = isinstance(checkpoint, str)
+    checkpoint = _checkpoint(checkpoint)
+    pending = {}
+    try:
+        for item in items:
+            item_key = key(item)
+            if checkpoint is not None and item_key in checkpoint:
+                continue
+            if len(pending) >= concurrency:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    k, i = pending.pop(future)
+                    yield _result(k, i, future, checkpoint, succeeded)
+            if checkpoint is not None:
+                checkpoint.begin(item_key)
+            pending[asyncio.ensure_future(call(item))] = (item_key, item)
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                k, i = pending.pop(future)
+                yield _result(k, i, future, checkpoint, succeeded)
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            checkpoint.close()
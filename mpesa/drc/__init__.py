@@ -10,6 +10,7 @@
 .. note::
     So Ensure your server IP is White Listed before Using this API.
 """
+import logging
 import requests
 import typing
 from mpesa.drc.generators import (
@@ -38,6 +39,8 @@ __all__ = [
     "API",
 ]
 
+LOGGER = logging.getLogger(__name__)
+
 
 class API:
     """DRC API.
@@ -136,7 +139,8 @@ class API:
     def authentication_token(self):
         """Return Authentication Token."""
         result = self.authenticate()
-        print(result)
+        LOGGER.debug("DRC login %s: %s.", result.get("code"),
+                     result.get("description"))
         return result["SessionID"]
         ...
 
@@ -293,7 +297,7 @@ class API:
             "TransactionID": TransactionID,
             "Amount": Amount,
         }
-        print(params)
+        LOGGER.debug("w2b(%s) is not implemented.", ThirdPartyID)
         pass
         ...
 
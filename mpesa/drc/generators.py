@@ -1,4 +1,15 @@
-"""Handle Generation of rendered XML Content from Jinja2 Templates."""
+"""Handle Generation of rendered XML Content from Jinja2 Templates.
+
+Each template is compiled once, on first use, into an :class:`Envelope`: the
+static XML of the template split around its ``{{ Name }}`` and
+``{{ Name|default("value") }}`` placeholders. Building an envelope then only
+escapes the values and joins the parts, no Jinja2 rendering happens per
+request.
+"""
+from functools import lru_cache
+from xml.sax.saxutils import escape
+import re
+
 from jinja2 import Environment, PackageLoader
 import jinja2.meta
 
@@ -9,6 +20,9 @@ LOGGER = logging.getLogger(__name__)
 Loader = PackageLoader(package_name="mpesa", package_path="drc/templates")
 environment = Environment(loader=Loader)
 
+_PLACEHOLDER = re.compile(
+    r'\{\{\s*(\w+)\s*(?:\|\s*default\(\s*"([^"]*)"\s*\)\s*)?\}\}')
+
 
 def get_variables(template_name, logger=LOGGER):
     """Return all undeclared variables in template."""
@@ -20,52 +34,118 @@ def get_variables(template_name, logger=LOGGER):
     return list(variables)
 
 
+class Envelope:
+    """XML envelope builder compiled from a template.
+
+    Values are XML escaped. Variables without a ``default`` in the template
+    are required.
+
+    :param template_name: Name of the template in ``drc/templates``.
+    :type template_name: str
+    :raises ValueError: The template uses more than placeholders.
+    """
+
+    __slots__ = ("name", "variables", "required", "_parts", "_slots")
+
+    def __init__(self, template_name: str):
+        """Construct."""
+        source = environment.loader.get_source(
+            environment, template_name)[0]
+        # Jinja2 drops the trailing newline of a template.
+        if source.endswith("\n"):
+            source = source[:-1]
+        pieces = _PLACEHOLDER.split(source)
+        static = pieces[::3]
+        variables = frozenset(get_variables(template_name))
+        if (frozenset(pieces[1::3]) != variables
+                or any("{{" in s or "{%" in s or "{#" in s for s in static)):
+            raise ValueError(
+                "{} uses more than placeholders.".format(template_name))
+        parts = []
+        slots = []
+        required = set()
+        for index, text in enumerate(static):
+            parts.append(text)
+            if 3 * index + 1 < len(pieces):
+                name, default = pieces[3 * index + 1:3 * index + 3]
+                if default is None:
+                    required.add(name)
+                else:
+                    default = escape(default)
+                slots.append((len(parts), name, default))
+                parts.append(None)
+        self.name = template_name
+        self.variables = variables
+        self.required = frozenset(required)
+        self._parts = parts
+        self._slots = tuple(slots)
+
+    def __repr__(self) -> str:
+        """Return repr."""
+        return "Envelope({!r})".format(self.name)
+
+    def build(self, context: dict) -> str:
+        """Return the envelope filled in from context.
+
+        :param context: Values of the template variables.
+        :type context: dict
+        :raises ValueError: A required variable is missing from context.
+        :rtype: str
+        """
+        missing = self.required.difference(context)
+        if missing:
+            raise ValueError("{} is missing {}.".format(
+                self.name, ", ".join(sorted(missing))))
+        parts = self._parts[:]
+        for index, name, default in self._slots:
+            if name in context:
+                parts[index] = escape(str(context[name]))
+            else:
+                parts[index] = default
+        content = "".join(parts)
+        LOGGER.debug("Built %s, %d characters.", self.name, len(content))
+        return content
+
+
+@lru_cache(maxsize=None)
+def envelope(template_name: str) -> Envelope:
+    """Return the :class:`Envelope` of template, compiled on first use.
+
+    :param template_name: Name of the template in ``drc/templates``.
+    :type template_name: str
+    :rtype: :class:`Envelope`
+    """
+    return Envelope(template_name)
+
+
 def generate_login(context: dict) -> str:
     """Return generated template string using context."""
-    template = environment.get_template("login_request.xml")
-    content = template.render(context)
-    print(content)
-    return content
+    return envelope("login_request.xml").build(context)
 
 
 def generate_c2b(context: dict) -> str:
     """Return generated template string using context."""
-    template = environment.get_template("c2b_request.xml")
-    content = template.render(context)
-    print(content)
-    return content
+    return envelope("c2b_request.xml").build(context)
 
 
 def generate_b2c(context: dict) -> str:
     """Return generated template string using context."""
-    template = environment.get_template("b2c_request.xml")
-    content = template.render(context)
-    print(content)
-    return content
+    return envelope("b2c_request.xml").build(context)
 
 
 def generate_c2b_ack(context: dict) -> str:
     """Return generated template string using context."""
-    template = environment.get_template("c2b_ack_response.xml")
-    content = template.render(context)
-    print(content)
-    return content
+    return envelope("c2b_ack_response.xml").build(context)
 
 
 def generate_b2c_ack(context: dict) -> str:
     """Return generated template string using context."""
-    template = environment.get_template("b2c_ack_response.xml")
-    content = template.render(context)
-    print(content)
-    return content
+    return envelope("b2c_ack_response.xml").build(context)
 
 
 def generate_w2b(context: dict) -> str:
     """Return generated template string using context."""
-    template = environment.get_template("w2b_request.xml")
-    content = template.render(context)
-    print(content)
-    return content
+    return envelope("w2b_request.xml").build(context)
 
 
 if __name__ == "__main__":
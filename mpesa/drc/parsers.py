@@ -1,10 +1,14 @@
 """Handle Parsing of XML Content into JSON."""
+import logging
+
 from lxml import etree
 
+LOGGER = logging.getLogger(__name__)
+
 
 def parse_login_response(content):
     """Return python `dict` from parsed Login response XML content."""
-    print(content)
+    LOGGER.debug("parse_login_response(%d bytes).", len(content))
     base = etree.fromstring(content)
     header, root = base.getchildren()
     event_id = header.getchildren()[0].text.split("\n")[0]
@@ -22,7 +26,7 @@ def parse_login_response(content):
 
 def parse_c2b_response(content):
     """Return python `dict` from parsed C2B response XML content."""
-    print(content)
+    LOGGER.debug("parse_c2b_response(%d bytes).", len(content))
     root = etree.fromstring(content)
     header, body = root.getchildren()
     event_id = header.getchildren()[0].text.split("\n")[0]
@@ -43,7 +47,7 @@ def parse_c2b_response(content):
 
 def parse_b2c_response(content):
     """Return python `dict` from parsed B2C response XML content."""
-    print(content)
+    LOGGER.debug("parse_b2c_response(%d bytes).", len(content))
     root = etree.fromstring(content)
     header, body = root.getchildren()
     event_id = header.getchildren()[0].text.split("\n")[0]
@@ -64,7 +68,7 @@ def parse_b2c_response(content):
 
 def parse_c2b_callback(content):
     """Return python `dict` from parsed C2B Callback XML content."""
-    print(content)
+    LOGGER.debug("parse_c2b_callback(%d bytes).", len(content))
     root = etree.fromstring(content)
     js_out = {}
     keys = []
@@ -77,7 +81,7 @@ def parse_c2b_callback(content):
 
 def parse_b2c_callback(content):
     """Return python `dict` from parsed B2C Callback XML content."""
-    print(content)
+    LOGGER.debug("parse_b2c_callback(%d bytes).", len(content))
     root = etree.fromstring(content)
     js_out = {}
     keys = []
@@ -0,0 +1,180 @@
+"""Kenya Daraja MPESA asyncio API."""
+import asyncio
+from mpesa.batch import run_batch_async
+from mpesa.ratelimit import RateLimiter
+from mpesa.kenya.api import API, _accepted, _payout_key
+from mpesa.kenya.auth import AsyncTokenCache, ASYNC_TOKEN_CACHE
+from mpesa.kenya.credentials import SecurityCredentials
+from mpesa.kenya.retry import (
+    RetryPolicy,
+    classify_error,
+    classify_status,
+    decode_body,
+)
+from mpesa.kenya.sessions import (
+    AsyncSessionPool,
+    aiohttp,
+    shared_async_session_pool,
+)
+
+__all__ = [
+    "AsyncAPI",
+]
+
+
+class AsyncAPI(API):
+    """Asyncio twin of :class:`mpesa.kenya.API`.
+
+    Exposes the same operations (``b2b``, ``b2c``, ``balance``,
+    ``c2b_register_url``, ``c2b_simulate``, ``lnmo_stkpush``,
+    ``lnmo_status``, ``reverse`` and ``transaction_status``) with the same
+    arguments, but each call returns an awaitable resolving to the decoded
+    response instead of blocking on the round trip.
+
+    Requests share a non-blocking :class:`mpesa.kenya.AsyncSessionPool`
+    and access tokens come from an :class:`mpesa.kenya.AsyncTokenCache`,
+    so a single event loop can keep thousands of calls in flight.
+
+    :param env:  The target environment. *sandbox* or *production*.
+    :type env: str
+    :param app_key: The *app_key* from developers portal.
+    :type app_key: str
+    :param app_secret: The *app_secret* from developers portal.
+    :type app_secret: str
+    :param token_cache: Cache holding access tokens, defaults to the shared
+        :data:`mpesa.kenya.ASYNC_TOKEN_CACHE`.
+    :type token_cache: :class:`mpesa.kenya.AsyncTokenCache`
+    :param session_pool: Connection pool, defaults to the shared pool from
+        :func:`mpesa.kenya.shared_async_session_pool`.
+    :type session_pool: :class:`mpesa.kenya.AsyncSessionPool`
+    :param credentials: Registered initiator credentials, defaults ``None``.
+    :type credentials: :class:`mpesa.kenya.SecurityCredentials`
+    :param retry_policy: Retry policy of failed calls, defaults to a new
+        :class:`mpesa.kenya.RetryPolicy` per client.
+    :type retry_policy: :class:`mpesa.kenya.RetryPolicy`
+    :param timeout: Total seconds allowed per request, defaults ``30``.
+    :type timeout: float
+    :param rate_limiter: Limiter awaited before every request, keyed by
+        shortcode or ``app_key``, defaults ``None``.
+    :type rate_limiter: :class:`mpesa.ratelimit.RateLimiter`
+
+    :Example:
+
+    .. code-block:: python
+
+        api = AsyncAPI(app_key=key, app_secret=secret)
+        response = await api.b2c(amount="10", party_b="254700000000")
+    """
+
+    def __init__(
+        self,
+        env: str = "sandbox",
+        app_key: str = None,
+        app_secret: str = None,
+        token_cache: AsyncTokenCache = None,
+        session_pool: AsyncSessionPool = None,
+        credentials: SecurityCredentials = None,
+        retry_policy: RetryPolicy = None,
+        timeout: float = 30.0,
+        rate_limiter: RateLimiter = None,
+    ):
+        """Initialize AsyncAPI."""
+        if token_cache is None:
+            token_cache = ASYNC_TOKEN_CACHE
+        if session_pool is None:
+            session_pool = shared_async_session_pool()
+        super(AsyncAPI, self).__init__(
+            env=env,
+            app_key=app_key,
+            app_secret=app_secret,
+            token_cache=token_cache,
+            session_pool=session_pool,
+            credentials=credentials,
+            retry_policy=retry_policy,
+            timeout=timeout,
+            rate_limiter=rate_limiter,
+        )
+
+    async def authenticate(self):
+        """Return a freshly fetched access token."""
+        return (await self._fetch_token())[0]
+
+    async def _send(self, method: str, name: str, limit_key=None,
+                    **kwargs):
+        """Send a request to ``name``, see :meth:`mpesa.kenya.API._send`.
+
+        :return: JSON body of the last response, see
+            :func:`mpesa.kenya.retry.decode_body`.
+        :rtype: dict
+        """
+        endpoint, url = self._routes[name]
+        policy = self.retry_policy
+        policy.begin()
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        attempt = 0
+        while True:
+            if limit_key is not None:
+                await self.rate_limiter.acquire_async(limit_key)
+            try:
+                status, headers, content = await self.session_pool.request(
+                    method, url, timeout=timeout, **kwargs)
+            except Exception as e:
+                delay = policy.backoff(
+                    classify_error(e), endpoint.idempotent, attempt)
+                if delay is None:
+                    raise
+            else:
+                kind = classify_status(status)
+                if kind is None:
+                    return decode_body(status, headers, content)
+                delay = policy.backoff(
+                    kind,
+                    endpoint.idempotent,
+                    attempt,
+                    headers.get("Retry-After"),
+                )
+                if delay is None:
+                    return decode_body(status, headers, content)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _fetch_token(self):
+        """Return ``(access_token, expires_in)`` from a fresh OAuth request."""
+        body = await self._send(
+            "GET",
+            "authenticate",
+            auth=aiohttp.BasicAuth(self.app_key, self.app_secret),
+        )
+        return body["access_token"], body.get("expires_in", 3599)
+
+    async def _request(self, name: str, values: tuple) -> dict:
+        """POST the ``name`` endpoint payload and return the JSON body."""
+        endpoint = self._routes[name][0]
+        payload = endpoint.build(*values)
+        headers = self._headers(await self.authentication_token)
+        return await self._send(
+            "POST",
+            name,
+            limit_key=self._limit_key(endpoint, values),
+            headers=headers,
+            json=payload,
+        )
+
+    def b2c_batch(self, payouts, concurrency: int = 8, checkpoint=None):
+        """Disburse many B2C payouts, see :meth:`mpesa.kenya.API.b2c_batch`.
+
+        :return: Async iterator of :class:`mpesa.batch.BatchResult`.
+        """
+        return run_batch_async(
+            self._b2c_payout,
+            payouts,
+            key=_payout_key,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            succeeded=_accepted,
+        )
+
+    async def close(self):
+        """Close the connection pool of this client."""
+        await self.session_pool.close()
+
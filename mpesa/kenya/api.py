@@ -0,0 +1,1080 @@
+"""Kenya Daraja MPESA API."""
+
+import base64
+from time import sleep, strftime
+from requests.auth import HTTPBasicAuth
+from mpesa.batch import run_batch
+from mpesa.ratelimit import RateLimiter
+from mpesa.kenya.auth import TokenCache, TOKEN_CACHE
+from mpesa.kenya.credentials import SecurityCredentials
+from mpesa.kenya.endpoints import ENDPOINTS
+from mpesa.kenya.retry import (
+    HTTPStatusError,
+    RetryPolicy,
+    classify_error,
+    classify_status,
+)
+from mpesa.kenya.sessions import SessionPool, shared_session_pool
+
+__all__ = [
+    "API",
+]
+
+
+def _payout_key(payout: dict) -> str:
+    """Return the checkpoint key of a :meth:`API.b2c_batch` payout."""
+    return payout["originator_conversation_id"]
+
+
+def _accepted(response: dict) -> bool:
+    """Return whether Daraja accepted the request of response."""
+    return str(response.get("ResponseCode")) == "0"
+
+
+def _timestamp() -> str:
+    """Return the current time as a Daraja ``YYYYMMDDHHmmss`` timestamp."""
+    return strftime("%Y%m%d%H%M%S")
+
+
+def _password(shortcode, passcode, timestamp: str) -> str:
+    """Return the base64 encoded ``shortcode + passcode + timestamp``."""
+    password = "{0}{1}{2}".format(shortcode, passcode, timestamp)
+    return base64.b64encode(password.encode("utf-8")).decode("utf-8")
+
+
+class API:
+    """Kenya's Daraja MPESA API.
+
+    :param env:  The target environment defaults ``"sandbox"`` ``"sandbox"`` or ``"production"``.
+    :type env: str
+    :param app_key: The *app_key* from developers portal.
+    :type app_key: str
+    :param app_secret: The *app_secret* from developers portal.
+    :type app_secret: str
+    :param token_cache: Cache holding access tokens, defaults to the shared
+        :data:`mpesa.kenya.TOKEN_CACHE`.
+    :type token_cache: :class:`mpesa.kenya.TokenCache`
+    :param session_pool: Keep-alive connection pool used for every request,
+        defaults to the shared pool from
+        :func:`mpesa.kenya.shared_session_pool`.
+    :type session_pool: :class:`mpesa.kenya.SessionPool`
+    :param credentials: Registered initiator credentials, used when a
+        ``security_credential`` is not passed, defaults ``None``.
+    :type credentials: :class:`mpesa.kenya.SecurityCredentials`
+    :param retry_policy: Decides which failed calls are sent again, see
+        :mod:`mpesa.kenya.retry`, defaults to a new
+        :class:`mpesa.kenya.RetryPolicy` per client.
+    :type retry_policy: :class:`mpesa.kenya.RetryPolicy`
+    :param timeout: Seconds to wait for a connection and for the response,
+        defaults ``30``.
+    :type timeout: float
+    :param rate_limiter: Limiter every request waits on, keyed by the
+        shortcode of the request or ``app_key`` when it has none. Share one
+        between clients to enforce Daraja TPS limits process wide,
+        defaults ``None``.
+    :type rate_limiter: :class:`mpesa.ratelimit.RateLimiter`
+
+    **Attributes**
+
+    .. attribute:: sandbox_url
+
+        The sandbox environment host url "https://sandbox.safaricom.co.ke"
+
+    .. attribute:: live_url
+
+        The live/production environment host url "https://api.safaricom.co.ke"
+
+
+    **Methods.**
+
+
+    """
+
+    def __init__(
+        self,
+        env: str = "sandbox",
+        app_key: str = None,
+        app_secret: str = None,
+        token_cache: TokenCache = None,
+        session_pool: SessionPool = None,
+        credentials: SecurityCredentials = None,
+        retry_policy: RetryPolicy = None,
+        timeout: float = 30.0,
+        rate_limiter: RateLimiter = None,
+    ):
+        """Initialize API.
+
+        :param env:  The target environment. *sandbox* or *production*.
+        :type env: str
+        :param app_key: The *app_key* from developers portal.
+        :type app_key: str
+        :param app_secret: The *app_secret* from developers portal.
+        :type app_secret: str
+        :param token_cache: Cache holding access tokens.
+        :type token_cache: :class:`mpesa.kenya.TokenCache`
+        :param session_pool: Keep-alive connection pool.
+        :type session_pool: :class:`mpesa.kenya.SessionPool`
+        :param credentials: Registered initiator credentials.
+        :type credentials: :class:`mpesa.kenya.SecurityCredentials`
+        :param retry_policy: Retry policy of failed calls.
+        :type retry_policy: :class:`mpesa.kenya.RetryPolicy`
+        :param timeout: Connect and response timeout in seconds.
+        :type timeout: float
+        :param rate_limiter: Limiter keyed by shortcode or app_key.
+        :type rate_limiter: :class:`mpesa.ratelimit.RateLimiter`
+        """
+        self._env = env
+        self._app_key = app_key
+        self.app_secret = app_secret
+        self._sandbox_url = "https://sandbox.safaricom.co.ke"
+        self._live_url = "https://api.safaricom.co.ke"
+        self._bearer = (None, None)
+        self._resolve()
+        if token_cache is None:
+            token_cache = TOKEN_CACHE
+        self.token_cache = token_cache
+        if session_pool is None:
+            session_pool = shared_session_pool()
+        self.session_pool = session_pool
+        self.credentials = credentials
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+    @property
+    def authentication_token(self):
+        """Return Authentication Token.
+
+        The token is served from ``self.token_cache`` and is only fetched
+        again when it is about to expire.
+        """
+        return self.token_cache.get(self._token_key, self._fetch_token)
+
+    def authenticate(self):
+        """To make Mpesa API calls, you will need to authenticate your app.
+
+        This method is used to fetch the access token required by Mpesa.
+        Mpesa supports client_credentials grant type.
+
+        To authorize your API calls to Mpesa, you will need a Basic Auth over HTTPS authorization token.
+
+        The Basic Auth string is a base64 encoded string of your app's client key and client secret.
+
+
+        :return: `access_token`  This token is to be used with the Bearer header for further API calls to Mpesa.
+        :rtype: str
+
+        """
+        return self._fetch_token()[0]
+
+    @property
+    def base_url(self) -> str:
+        """Return the host url of ``self.env``."""
+        if self.env == "production":
+            return self.live_url
+        return self.sandbox_url
+
+    @property
+    def env(self) -> str:
+        """Return the target environment."""
+        return self._env
+
+    @env.setter
+    def env(self, env: str):
+        self._env = env
+        self._resolve()
+
+    @property
+    def app_key(self) -> str:
+        """Return the *app_key*."""
+        return self._app_key
+
+    @app_key.setter
+    def app_key(self, app_key: str):
+        self._app_key = app_key
+        self._resolve()
+
+    @property
+    def sandbox_url(self) -> str:
+        """Return the sandbox environment host url."""
+        return self._sandbox_url
+
+    @sandbox_url.setter
+    def sandbox_url(self, sandbox_url: str):
+        self._sandbox_url = sandbox_url
+        self._resolve()
+
+    @property
+    def live_url(self) -> str:
+        """Return the live environment host url."""
+        return self._live_url
+
+    @live_url.setter
+    def live_url(self, live_url: str):
+        self._live_url = live_url
+        self._resolve()
+
+    def _resolve(self):
+        """Resolve the full URL of every endpoint for ``self.env``.
+
+        Called again by the setters of ``env``, ``app_key``, ``sandbox_url``
+        and ``live_url``.
+        """
+        base_url = self.base_url
+        self._token_key = (self.env, self.app_key)
+        self._routes = {
+            name: (endpoint, base_url + endpoint.path)
+            for name, endpoint in ENDPOINTS.items()
+        }
+
+    def _headers(self, token: str) -> dict:
+        """Return the request headers for token, reused while it is valid."""
+        bearer, headers = self._bearer
+        if bearer != token:
+            headers = {
+                "Authorization": "Bearer {0}".format(token),
+                "Content-Type": "application/json",
+            }
+            self._bearer = (token, headers)
+        return headers
+
+    def _credential(self, initiator: str, security_credential: str) -> str:
+        """Return security_credential, or the one registered for initiator.
+
+        :raises KeyError: No credential of initiator is registered in
+            ``self.credentials`` for ``self.env``.
+        """
+        if security_credential is None and self.credentials is not None:
+            credential = self.credentials.get(initiator, self.env)
+            if credential is None:
+                raise KeyError(
+                    "No SecurityCredential registered for initiator {0!r} "
+                    "in env {1!r}.".format(initiator, self.env))
+            return credential
+        return security_credential
+
+    def _limit_key(self, endpoint, values: tuple):
+        """Return the rate limiter key of a request, ``None`` if unlimited."""
+        if self.rate_limiter is None:
+            return None
+        if endpoint.shortcode is not None and values[endpoint.shortcode]:
+            return str(values[endpoint.shortcode])
+        return self.app_key
+
+    def _send(self, method: str, name: str, limit_key=None, **kwargs):
+        """Send a request to the ``name`` endpoint, retrying per policy.
+
+        Only failures that ``self.retry_policy`` deems safe for the endpoint
+        are sent again; the last response is returned and the last error is
+        raised once it gives up. The body is left undecoded until then, see
+        :meth:`_decode`. Every send, retries included, first waits for
+        ``limit_key`` on ``self.rate_limiter``.
+        """
+        endpoint, url = self._routes[name]
+        policy = self.retry_policy
+        policy.begin()
+        attempt = 0
+        while True:
+            if limit_key is not None:
+                self.rate_limiter.acquire(limit_key)
+            try:
+                r = self.session_pool.request(
+                    method, url, timeout=self.timeout, **kwargs)
+            except Exception as e:
+                delay = policy.backoff(
+                    classify_error(e), endpoint.idempotent, attempt)
+                if delay is None:
+                    raise
+            else:
+                kind = classify_status(r.status_code)
+                if kind is None:
+                    return r
+                delay = policy.backoff(
+                    kind,
+                    endpoint.idempotent,
+                    attempt,
+                    r.headers.get("Retry-After"),
+                )
+                if delay is None:
+                    return r
+            sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _decode(r) -> dict:
+        """Return the JSON body of the final response r of :meth:`_send`.
+
+        :raises mpesa.kenya.HTTPStatusError: r is an error without a JSON
+            body, see :func:`mpesa.kenya.retry.decode_body`.
+        """
+        try:
+            return r.json()
+        except ValueError as e:
+            if r.status_code >= 400:
+                raise HTTPStatusError(
+                    r.status_code, r.headers, r.content) from e
+            raise
+
+    def _fetch_token(self):
+        """Return ``(access_token, expires_in)`` from a fresh OAuth request."""
+        body = self._decode(self._send(
+            "GET",
+            "authenticate",
+            auth=HTTPBasicAuth(self.app_key, self.app_secret),
+        ))
+        return body["access_token"], body.get("expires_in", 3599)
+
+    def _request(self, name: str, values: tuple) -> dict:
+        """POST the ``name`` endpoint payload and return the JSON body.
+
+        :param name: Endpoint name in :data:`mpesa.kenya.ENDPOINTS`.
+        :type name: str
+        :param values: Payload values in the endpoint ``fields`` order.
+        :type values: tuple
+        """
+        endpoint = self._routes[name][0]
+        payload = endpoint.build(*values)
+        headers = self._headers(self.authentication_token)
+        return self._decode(self._send(
+            "POST",
+            name,
+            limit_key=self._limit_key(endpoint, values),
+            headers=headers,
+            json=payload,
+        ))
+
+    def b2b(
+        self,
+        initiator: str = None,
+        security_credential: str = None,
+        command_id: str = None,
+        sender_identifier_type: str = None,
+        receiver_identifier_type: str = None,
+        amount: str = None,
+        party_a: str = None,
+        party_b: str = None,
+        remarks: str = None,
+        account_reference: str = None,
+        queue_timeout_url: str = None,
+        result_url: str = None,
+    ):
+        """Uses the B2B API to transact from one company to another.
+
+
+        :param initiator: Username used to authenticate the transaction.
+        :type initiator: str
+
+        :param security_credential: Generate from developer portal, or registered with ``self.credentials``.
+        :type security_credential: str
+
+        :param command_id: Options:
+
+            - BusinessPayBill,
+
+            - BusinessBuyGoods,
+
+            - DisburseFundsToBusiness,
+
+            - BusinessToBusinessTransfer,
+
+            - BusinessTransferFromMMFToUtility,
+
+            - BusinessTransferFromUtilityToMMF,
+
+            - MerchantToMerchantTransfer,
+
+            - MerchantTransferFromMerchantToWorking,
+
+            - MerchantServicesMMFAccountTransfer,
+
+            - AgencyFloatAdvance
+
+        :type command_id: str
+
+        :param sender_identifier_type: ``2`` for Till Number,
+            ``4`` for organization shortcode.
+        :type sender_identifier_type: str
+
+        :param receiver_identifier_type: ``2`` for Till Number,
+            ``4`` for organization shortcode.
+        :type receiver_identifier_type: str
+
+        :param amount: Amount.
+        :type amount: str
+
+        :param party_a: Sender shortcode.
+        :type party_a: str
+
+        :param party_b: Receiver shortcode.
+        :type party_b: str
+
+        :param remarks: Remarks.
+        :type remarks: str
+
+        :param account_reference: Use if doing paybill to banks etc.
+        :type account_reference: str
+
+        :param queue_timeout_url: The url that handles information of timed out
+            transactions.
+        :type queue_timeout_url: str
+
+        :param result_url: The url that receives results from M-Pesa api call.
+        :type result_url: str
+
+
+        :return: Dict object of
+
+            - OriginatorConverstionID (str): The unique request ID for tracking a transaction.
+
+            - ConversationID (str): The unique request ID returned by mpesa for each request made
+
+            - ResponseDescription (str): Response Description message
+
+        :rtype: dict
+
+        """
+
+        return self._request(
+            "b2b",
+            (
+                initiator,
+                self._credential(initiator, security_credential),
+                command_id,
+                sender_identifier_type,
+                receiver_identifier_type,
+                amount,
+                party_a,
+                party_b,
+                remarks,
+                account_reference,
+                queue_timeout_url,
+                result_url,
+            ),
+        )
+
+    def b2c(
+        self,
+        initiator_name: str = None,
+        security_credential: str = None,
+        command_id: str = None,
+        amount: str = None,
+        party_a: str = None,
+        party_b: str = None,
+        remarks: str = None,
+        queue_timeout_url: str = None,
+        result_url: str = None,
+        occassion: str = None,
+    ):
+        """This method uses Mpesa's B2C API to transact between an M-Pesa short code to a phone number registered on M-Pesa..
+
+        :param initiator_name: Username used to authenticate the transaction.
+        :param security_credential: Generate from developer portal, or registered with ``self.credentials``.
+        :param command_id: Options:
+
+            - SalaryPayment,
+
+            - BusinessPayment,
+
+            - PromotionPayment.
+
+        :param amount: Amount.
+        :param party_a: Organization/MSISDN making the transaction
+
+            - Shortcode (6 digits)
+
+            - MSISDN (12 digits).
+
+        :param party_b: MSISDN receiving the transaction (12 digits).
+        :param remarks: Comments that are sent along with the
+            transaction(maximum 100 characters).
+        :param account_reference: Use if doing paybill to banks etc.
+        :param queue_timeout_url: The url that handles information of timed
+            out transactions.
+        :param result_url: The url that receives results from M-Pesa api call.
+        :param ocassion: occasion.
+        :type initiator_name: str
+        :type security_credential: str
+        :type command_id: str
+        :type amount: str
+        :type party_a: str
+        :type party_b: str
+        :type remarks: str
+        :type account_reference: str
+        :type queue_timeout_url: str
+        :type result_url: str
+        :type ocassion: str
+
+
+        :return: Dict object of
+
+            - `OriginatorConverstionID` (str): The unique request ID for tracking a transaction.
+
+            - `ConversationID` (str): The unique request ID returned by mpesa for each request made
+
+            - `ResponseDescription` (str): Response Description message
+        :rtype: dict
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+            "ConversationID": "AG_20180326_00005ca7f7c21d608166",
+            "OriginatorConversationID": "12363-1328499-6",
+            "ResponseCode": "0",
+            "ResponseDescription": "Accept the service request successfully."
+            }
+
+        """
+
+        return self._request(
+            "b2c",
+            (
+                initiator_name,
+                self._credential(initiator_name, security_credential),
+                command_id,
+                amount,
+                party_a,
+                party_b,
+                remarks,
+                queue_timeout_url,
+                result_url,
+                occassion,
+            ),
+        )
+
+    def _b2c_payout(self, payout: dict):
+        """Return :meth:`b2c` of a :meth:`b2c_batch` payout."""
+        kwargs = dict(payout)
+        kwargs.pop("originator_conversation_id", None)
+        return self.b2c(**kwargs)
+
+    def b2c_batch(self, payouts, concurrency: int = 8, checkpoint=None):
+        """Disburse many B2C payouts with bounded concurrency.
+
+        Payouts are pulled lazily from ``payouts`` and at most
+        ``concurrency`` :meth:`b2c` calls are in flight at once. Each result
+        is yielded as soon as its call finishes.
+
+        Accepted payouts (``ResponseCode`` ``"0"``) are recorded in
+        ``checkpoint`` so rerunning the same batch after a crash skips them.
+        Rejected payouts are cleared and sent again by a rerun. Calls that
+        raised, e.g. timed out, may still have been processed: they stay in
+        ``checkpoint.unknown`` and are skipped until their status is checked
+        and settled with :meth:`mpesa.batch.Checkpoint.reconcile`.
+
+        :param payouts: Iterable of dicts of :meth:`b2c` keyword arguments,
+            each with an extra ``originator_conversation_id`` key that
+            uniquely identifies the payout within the batch.
+        :type payouts: iterable
+        :param concurrency: Maximum calls in flight, defaults ``8``.
+        :type concurrency: int
+        :param checkpoint: Checkpoint of completed
+            ``originator_conversation_id`` values or the path of its file.
+        :type checkpoint: :class:`mpesa.batch.Checkpoint` or str, optional.
+
+        :return: Iterator of :class:`mpesa.batch.BatchResult` keyed by
+            ``originator_conversation_id`` in completion order.
+
+        :Example:
+
+        .. code-block:: python
+
+            payouts = (
+                {
+                    "originator_conversation_id": row["id"],
+                    "command_id": "SalaryPayment",
+                    "amount": row["amount"],
+                    "party_b": row["msisdn"],
+                    ...
+                }
+                for row in csv.DictReader(open("payroll.csv"))
+            )
+            for result in api.b2c_batch(payouts, 32, "payroll.done"):
+                print(result.key, result.error or result.response)
+        """
+        return run_batch(
+            self._b2c_payout,
+            payouts,
+            key=_payout_key,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            succeeded=_accepted,
+        )
+
+    def balance(
+        self,
+        initiator: str = None,
+        security_credential: str = None,
+        command_id: str = None,
+        party_a: str = None,
+        identifier_type: str = None,
+        remarks: str = None,
+        queue_timeout_url: str = None,
+        result_url: str = None,
+    ):
+        """This method uses Mpesa's Account Balance API to to enquire the balance on an M-Pesa BuyGoods (Till Number).
+
+
+        :param initiator: Username used to authenticate the transaction.
+        :param security_credential: Generate from developer portal, or registered with ``self.credentials``.
+        :param command_id: AccountBalance.
+        :param party_a: Till number being queried.
+        :param identifier_type: Type of organization receiving the transaction.
+
+            .. csv-table:: Identifier Type sOptions
+                :header: "identifier_type", "description"
+                :widths: 15, 35
+
+                1 , "MSISDN"
+                2 , "Till Number"
+                4 , "Organization short code"
+
+        :param remarks: Comments that are sent along with the transaction(maximum 100 characters).
+        :param queue_timeout_url: The url that handles information of timed out transactions.
+        :param result_url: The url that receives results from M-Pesa api call.
+        :type initiator: str
+        :type security_credential: str
+        :type command_id: str
+        :type party_a: str
+        :type identifier_type: str
+        :type remarks: str
+        :type queue_timeout_url: str
+        :type result_url: str
+
+
+
+        :return: Dict object of
+
+            - `OriginatorConverstionID` (str): The unique request ID for tracking a transaction.
+
+            - `ConversationID` (str): The unique request ID returned by mpesa for each request made
+
+            - `ResponseDescription` (str): Response Description message
+        :rtype: dict
+
+
+        """
+
+        return self._request(
+            "balance",
+            (
+                initiator,
+                self._credential(initiator, security_credential),
+                command_id,
+                party_a,
+                identifier_type,
+                remarks,
+                queue_timeout_url,
+                result_url,
+            ),
+        )
+
+    def c2b_register_url(
+        self,
+        shortcode: str = None,
+        response_type: str = None,
+        confirmation_url: str = None,
+        validation_url: str = None,
+    ):
+        """This method uses Mpesa's C2B API to register validation and confirmation URLs on M-Pesa.
+
+
+        :param shortcode: The short code of the organization.
+        :param response_type: Default response type for timeout.
+            Incase a tranaction times out, Mpesa will by default ``"Complete"`` or ``"Cancel"`` the transaction.
+        :param confirmation_url: Confirmation URL for the client.
+        :param validation_url: Validation URL for the client.
+        :type shortcode: str
+        :type response_type: str
+        :type confirmation_url: str
+        :type validation_url: str
+
+
+
+        :return: Dict object of
+
+            - `OriginatorConversationID` (str): The unique request ID for tracking a transaction.
+
+            - `ConversationID` (str): The unique request ID returned by mpesa for each request made
+
+            - `ResponseDescription` (str): Response Description message
+        :rtype: dict
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ConversationID": "",
+              "OriginatorCoversationID": "",
+              "ResponseDescription": "success"
+            }
+
+        """
+
+        return self._request(
+            "c2b_register_url",
+            (
+                shortcode,
+                response_type,
+                confirmation_url,
+                validation_url,
+            ),
+        )
+
+    def c2b_simulate(
+        self,
+        shortcode: str = None,
+        command_id: str = None,
+        amount: str = None,
+        msisdn: str = None,
+        bill_ref_number: str = None,
+    ):
+        """This method uses Mpesa's C2B API to simulate a C2B transaction.
+
+        :param shortcode: The short code of the organization.
+        :param command_id: Unique command for each transaction type.
+
+            - CustomerPayBillOnline
+
+            - CustomerBuyGoodsOnline.
+
+        :param amount: The amount being transacted
+        :param msisdn: Phone number (msisdn) initiating the transaction MSISDN(12 digits)
+        :param bill_ref_number: Optional
+        :type shortcode: str
+        :type command_id: str
+        :type amount: str
+        :type msisdn: str
+        :type bill_ref_number: str
+
+        :return: Dict object of
+
+            - `OriginatorConverstionID` (str): The unique request ID for tracking a transaction.
+
+            - `ConversationID` (str): The unique request ID returned by mpesa for each request made
+
+            - `ResponseDescription` (str): Response Description message
+        :rtype: dict
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ConversationID": "AG_20180324_000066530b914eee3f85",
+              "OriginatorCoversationID": "25344-885903-1",
+              "ResponseDescription": "Accept the service request successfully."
+            }
+
+
+        """
+
+        return self._request(
+            "c2b_simulate",
+            (
+                shortcode,
+                command_id,
+                amount,
+                msisdn,
+                bill_ref_number,
+            ),
+        )
+
+    def lnmo_stkpush(
+        self,
+        business_shortcode: str = None,
+        passcode: str = None,
+        amount: str = None,
+        callback_url: str = None,
+        reference_code: str = None,
+        phone_number: str = None,
+        description: str = None,
+    ):
+        """This method uses Mpesa's Express API to initiate online payment on behalf of a customer..
+
+
+        :param business_shortcode: The short code of the organization.
+        :param passcode: Get from developer portal
+        :param amount: The amount being transacted
+        :param callback_url: A CallBack URL is a valid secure URL that is used to receive notifications from M-Pesa API.
+        :param reference_code: Account Reference: This is an Alpha-Numeric parameter that is defined by your system as an Identifier of the transaction for CustomerPayBillOnline transaction type.
+        :param phone_number: The Mobile Number to receive the STK Pin Prompt.
+        :param description: This is any additional information/comment that can be sent along with the request from your system. MAX 13 characters
+        :type business_shortcode: str
+        :type passcode: str
+        :type amount: str
+        :type callback_url: str
+        :type reference_code: str
+        :type phone_number: str
+        :type description: str
+
+        :return: Dict object of
+
+            - `CustomerMessage` (str):
+
+            - `CheckoutRequestID` (str):
+
+            - `ResponseDescription` (str):
+
+            - `MerchantRequestID` (str):
+
+            - `ResponseCode` (str):
+        :rtype: dict
+        :Example:
+
+        .. code-block:: json
+
+            {
+               "MerchantRequestID": "25353-1377561-4",
+               "CheckoutRequestID": "ws_CO_26032018185226297",
+               "ResponseCode": "0",
+               "ResponseDescription": "Success. Request accepted for processing",
+               "CustomerMessage": "Success. Request accepted for processing"
+            }
+
+        """
+
+        time = _timestamp()
+        password = _password(business_shortcode, passcode, time)
+        return self._request(
+            "lnmo_stkpush",
+            (
+                business_shortcode,
+                password,
+                time,
+                amount,
+                int(phone_number),
+                business_shortcode,
+                int(phone_number),
+                callback_url,
+                reference_code,
+                description,
+            ),
+        )
+
+    def lnmo_status(
+        self,
+        business_shortcode: str = None,
+        checkout_request_id: str = None,
+        passcode: str = None,
+    ):
+        """This method uses Mpesa's Express API to check the status of a Lipa Na M-Pesa Online Payment..
+
+
+        :param business_shortcode: This is organizations shortcode (Paybill or Buygoods - A 5 to 6 digit account number) used to identify an organization and receive the transaction.
+        :param checkout_request_id: This is a global unique identifier of the processed checkout transaction request.
+        :param passcode: Get from developer portal
+        :type business_shortcode: str
+        :type checkout_request_id: str
+        :type passcode: str
+
+
+        :return: Dict object of
+
+            - `CustomerMessage` (str):
+
+            - `CheckoutRequestID` (str):
+
+            - `ResponseDescription` (str):
+
+            - `MerchantRequestID` (str):
+
+            - `ResponseCode` (str):
+        :rtype: dict
+        """
+
+        time = _timestamp()
+        password = _password(business_shortcode, passcode, time)
+        return self._request(
+            "lnmo_status",
+            (
+                business_shortcode,
+                password,
+                time,
+                checkout_request_id,
+            ),
+        )
+
+    def reverse(
+        self,
+        initiator: str = None,
+        security_credential: str = None,
+        command_id="TransactionReversal",
+        transaction_id: str = None,
+        amount: str = None,
+        receiver_party: str = None,
+        receiver_identifier_type: str = None,
+        queue_timeout_url: str = None,
+        result_url: str = None,
+        remarks: str = None,
+        occassion: str = None,
+    ):
+        """This method uses Mpesa's Transaction Reversal API to reverse a M-Pesa transaction.
+
+        :param initiator: Username used to authenticate the transaction.
+        :param security_credential: Generate from developer portal, or registered with ``self.credentials``.
+        :param command_id: TransactionReversal
+        :param transaction_id: Unique identifier to identify a transaction on M-Pesa.
+        :param amount: The amount being transacted
+        :param receiver_party: Organization/MSISDN making the transaction
+
+            - Shortcode (6 digits)
+
+            - MSISDN (12 digits).
+
+        :param receiver_identifier_type: MSISDN receiving the transaction (12 digits).
+        :param queue_timeout_url: The url that handles information of timed out transactions.
+        :param result_url: The url that receives results from M-Pesa api call.
+        :param remarks: Comments that are sent along with the transaction(maximum 100 characters)
+        :param occassion: Occassion
+        :type initiator: str
+        :type security_credential: str
+        :type command_id: str
+        :type transaction_id: str
+        :type amount: str
+        :type receiver_party: str
+        :type receiver_identifier_type: str
+        :type queue_timeout_url: str
+        :type result_url: str
+        :type remarks: str
+        :type occassion: str
+
+        :return: Dict object of
+
+            - `OriginatorConverstionID` (str): The unique request ID for tracking a transaction.
+
+            - `ConversationID` (str): The unique request ID returned by mpesa for each request made
+
+            - `ResponseDescription` (str): Response Description message
+        :rtype: dict
+        :Example:
+
+        .. code-block:: json
+
+            {
+               "Result":
+               {
+                "ResultType":0,
+                "ResultCode":0,
+                "ResultDesc":"The service request has been accepted successfully.",
+                "OriginatorConversationID":"10819-695089-1",
+                "ConversationID":"AG_20170727_00004efadacd98a01d15",
+                "TransactionID":"LGR019G3J2",
+                "ReferenceData":
+                {
+                 "ReferenceItem":
+                 {
+                   "Key":"QueueTimeoutURL",
+                   "Value":"https://internalsandbox.safaricom.co.ke/mpesa/reversalresults/v1/submit"
+                 }
+                }
+               }
+             }
+
+        """
+
+        return self._request(
+            "reverse",
+            (
+                initiator,
+                self._credential(initiator, security_credential),
+                command_id,
+                transaction_id,
+                amount,
+                receiver_party,
+                receiver_identifier_type,
+                queue_timeout_url,
+                result_url,
+                remarks,
+                occassion,
+            ),
+        )
+
+    def transaction_status(
+        self,
+        party_a: str = None,
+        identifier_type: str = None,
+        remarks: str = None,
+        initiator: str = None,
+        passcode: str = None,
+        result_url: str = None,
+        queue_timeout_url: str = None,
+        transaction_id: str = None,
+        occassion: str = None,
+        shortcode: str = None,
+    ):
+        """This method uses Mpesa's Transaction Status API to check the status of a transaction.
+
+
+        :param party_a: Organization/MSISDN receiving the transaction
+
+            - MSISDN or
+
+            - shortcode.
+
+        :param identifier_type: Type of organization receiving the transaction
+
+            .. csv-table:: identifier types
+                :header: "identifier_type","description"
+                :widths: 15,30
+
+                1,"MSISDN"
+                2,"Till Number"
+                3,"Shortcode"
+
+        :param remarks: Comments that are sent along with the transaction(maximum 100 characters).
+        :param initiator: This is the credential/username used to authenticate the transaction request.
+        :param passcode: Get from developer portal, looked up in ``self.credentials`` when ``None``.
+        :param result_url: The url that handles information from the mpesa API call.
+        :param transaction_id: Unique identifier to identify a transaction on M-Pesa.
+        :param queue_timeout_url: The url that stores information of timed out transactions.
+        :param shortcode: The short code of the organization.
+        :param occassion: Occasion
+        :type party_a: str
+        :type identifier_type: str
+        :type remarks: str
+        :type initiator: str
+        :type passcode: str
+        :type transaction_id: str
+        :type queue_timeout_url: str
+        :type result_url: str
+        :type shortcode: str
+        :type occassion: str
+
+        :return: Dict object of
+
+            - `ResultDesc`: ,
+
+            - `CheckoutRequestID`: ,
+
+            - `ResponseDescription`: ,
+
+            - `MerchantRequestID`: ,
+
+            - `ResponseCode`: ,
+
+            - `ResultCode`:
+        :rtype: dict
+        """
+
+        if passcode is None and self.credentials is not None:
+            password = self._credential(initiator, None)
+        else:
+            password = _password(shortcode, passcode, _timestamp())
+        return self._request(
+            "transaction_status",
+            (
+                party_a,
+                identifier_type,
+                remarks,
+                initiator,
+                password,
+                queue_timeout_url,
+                result_url,
+                transaction_id,
+                occassion,
+            ),
+        )
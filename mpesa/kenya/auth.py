@@ -0,0 +1,238 @@
+"""Kenya Daraja OAuth Access Token Cache."""
+import asyncio
+import logging
+import threading
+import time
+from collections import namedtuple
+
+__all__ = [
+    "AsyncTokenCache",
+    "ASYNC_TOKEN_CACHE",
+    "TokenCache",
+    "TOKEN_CACHE",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+_Token = namedtuple("_Token", ["token", "refresh_at", "expires_at"])
+
+
+class _Slot:
+    """Cached token and the single-flight lock guarding its refresh."""
+
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = None
+        self.lock = threading.Lock()
+
+
+class TokenCache:
+    """Thread-safe cache of Daraja OAuth access tokens.
+
+    Tokens are keyed by ``(env, app_key)`` and are handed out until shortly
+    before the ``expires_in`` reported by ``/oauth/v1/generate`` runs out.
+    Once a token enters its refresh window a single background thread fetches
+    the replacement while callers keep using the still valid token, and
+    callers that find no usable token all wait on one shared fetch.
+
+    :param refresh_margin: Seconds before expiry at which a background
+        refresh is started, at most half the token lifetime, defaults
+        ``300``.
+    :type refresh_margin: float
+    :param expiry_margin: Seconds before expiry after which a token is no
+        longer handed out, at most half the refresh margin, defaults ``30``.
+    :type expiry_margin: float
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = 300.0,
+        expiry_margin: float = 30.0,
+        clock=time.monotonic,
+    ):
+        """Construct."""
+        self.refresh_margin = refresh_margin
+        self.expiry_margin = expiry_margin
+        self._clock = clock
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, key) -> _Slot:
+        """Return the slot for key, creating it if missing."""
+        slot = self._slots.get(key)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.setdefault(key, _Slot())
+        return slot
+
+    def _store(self, slot: _Slot, fetch) -> _Token:
+        """Call ``fetch`` and store its ``(token, expires_in)`` in slot."""
+        token, expires_in = fetch()
+        slot.value = self._token(token, expires_in)
+        return slot.value
+
+    def _token(self, token: str, expires_in) -> _Token:
+        """Return the cache entry of a token issued now for expires_in.
+
+        The margins are clamped for short lived tokens: the refresh starts
+        no earlier than half way through the lifetime and the token is
+        handed out until half way through the refresh window.
+        """
+        issued = self._clock()
+        expires_in = max(float(expires_in), 0.0)
+        refresh_margin = min(self.refresh_margin, expires_in / 2)
+        expiry_margin = min(self.expiry_margin, refresh_margin / 2)
+        return _Token(
+            token,
+            issued + expires_in - refresh_margin,
+            issued + expires_in - expiry_margin,
+        )
+
+    def _refresh(self, slot: _Slot, fetch):
+        """Refresh slot from a background thread, releasing its lock."""
+        try:
+            self._store(slot, fetch)
+        except Exception:
+            LOGGER.warning("Background access token refresh failed.",
+                           exc_info=True)
+        finally:
+            slot.lock.release()
+
+    def get(self, key, fetch) -> str:
+        """Return a valid access token for key.
+
+        :param key: Cache key, usually ``(env, app_key)``.
+        :type key: tuple
+        :param fetch: Callable returning ``(access_token, expires_in)``.
+            Called at most once at a time per key.
+        :type fetch: callable
+        :return: `access_token`.
+        :rtype: str
+        """
+        slot = self._slot(key)
+        value = slot.value
+        now = self._clock()
+        if value is not None and now < value.expires_at:
+            if now >= value.refresh_at and slot.lock.acquire(blocking=False):
+                threading.Thread(
+                    target=self._refresh,
+                    args=(slot, fetch),
+                    name="mpesa-token-refresh",
+                    daemon=True,
+                ).start()
+            return value.token
+        with slot.lock:
+            value = slot.value
+            if value is not None and self._clock() < value.expires_at:
+                return value.token
+            return self._store(slot, fetch).token
+
+    def invalidate(self, key):
+        """Drop the cached token for key so the next call fetches anew."""
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot.value = None
+
+    def clear(self):
+        """Drop every cached token."""
+        with self._lock:
+            self._slots.clear()
+
+
+TOKEN_CACHE = TokenCache()
+"""Process wide :class:`TokenCache` used by :class:`mpesa.kenya.API`."""
+
+
+class _AsyncSlot:
+    """Cached token and, per event loop, the lock and task refreshing it."""
+
+    __slots__ = ("value", "locks", "refreshes")
+
+    def __init__(self):
+        self.value = None
+        self.locks = {}
+        self.refreshes = {}
+
+
+class AsyncTokenCache(TokenCache):
+    """Asyncio flavour of :class:`TokenCache`.
+
+    ``fetch`` is a coroutine function returning ``(access_token, expires_in)``
+    and refreshes run as tasks on the calling event loop instead of threads.
+    Tokens are shared by every loop while the locks and refresh tasks belong
+    to the loop that created them, so the cache may serve successive
+    ``asyncio.run`` calls or several loops.
+    """
+
+    def _slot(self, key) -> _AsyncSlot:
+        """Return the slot for key, creating it if missing."""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots.setdefault(key, _AsyncSlot())
+        return slot
+
+    @staticmethod
+    def _loop_lock(slot: _AsyncSlot) -> tuple:
+        """Return ``(loop, lock)`` of slot for the running event loop."""
+        loop = asyncio.get_event_loop()
+        lock = slot.locks.get(loop)
+        if lock is None:
+            for stale in [k for k in slot.locks if k.is_closed()]:
+                del slot.locks[stale]
+                slot.refreshes.pop(stale, None)
+            lock = slot.locks[loop] = asyncio.Lock()
+        return loop, lock
+
+    async def _store(self, slot: _AsyncSlot, fetch) -> _Token:
+        """Await ``fetch`` and store its ``(token, expires_in)`` in slot."""
+        token, expires_in = await fetch()
+        slot.value = self._token(token, expires_in)
+        return slot.value
+
+    async def _refresh(self, slot: _AsyncSlot, loop, lock, fetch):
+        """Refresh slot in the background."""
+        try:
+            async with lock:
+                await self._store(slot, fetch)
+        except Exception:
+            LOGGER.warning("Background access token refresh failed.",
+                           exc_info=True)
+        finally:
+            slot.refreshes.pop(loop, None)
+
+    async def get(self, key, fetch) -> str:
+        """Return a valid access token for key.
+
+        :param key: Cache key, usually ``(env, app_key)``.
+        :type key: tuple
+        :param fetch: Coroutine function returning
+            ``(access_token, expires_in)``.
+        :type fetch: callable
+        :return: `access_token`.
+        :rtype: str
+        """
+        slot = self._slot(key)
+        value = slot.value
+        now = self._clock()
+        if value is not None and now < value.expires_at:
+            if now >= value.refresh_at:
+                loop, lock = self._loop_lock(slot)
+                if loop not in slot.refreshes:
+                    slot.refreshes[loop] = asyncio.ensure_future(
+                        self._refresh(slot, loop, lock, fetch))
+            return value.token
+        lock = self._loop_lock(slot)[1]
+        async with lock:
+            value = slot.value
+            if value is not None and self._clock() < value.expires_at:
+                return value.token
+            return (await self._store(slot, fetch)).token
+
+    def clear(self):
+        """Drop every cached token."""
+        self._slots.clear()
+
+
+ASYNC_TOKEN_CACHE = AsyncTokenCache()
+"""Process wide :class:`AsyncTokenCache` used by :class:`mpesa.kenya.AsyncAPI`."""
@@ -0,0 +1,284 @@
+"""Kenya Daraja C2B Validation and Confirmation Callback Receiver."""
+import asyncio
+import json
+import logging
+import queue
+import threading
+from collections import namedtuple
+
+__all__ = [
+    "C2BCallbackApp",
+    "C2BRecord",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+C2BRecord = namedtuple("C2BRecord", ["kind", "payload"])
+C2BRecord.__doc__ = """Parsed C2B callback.
+
+``kind`` is ``"confirmation"`` or ``"validation"`` and ``payload`` the decoded
+JSON body sent by Safaricom (``TransID``, ``TransAmount``, ``MSISDN``, ...).
+"""
+
+_ACCEPTED = json.dumps({"ResultCode": 0, "ResultDesc": "Accepted"}).encode()
+_JSON = [(b"content-type", b"application/json")]
+_WSGI_JSON = [("Content-Type", "application/json")]
+_STATUS = {
+    200: "200 OK",
+    400: "400 Bad Request",
+    404: "404 Not Found",
+    405: "405 Method Not Allowed",
+    503: "503 Service Unavailable",
+}
+
+
+def _rejected(result_code) -> bytes:
+    """Return the validation response rejecting with result_code."""
+    return json.dumps(
+        {"ResultCode": result_code, "ResultDesc": "Rejected"}).encode()
+
+
+class C2BCallbackApp:
+    """ASGI and WSGI application receiving C2B callbacks.
+
+    Serves the ``ConfirmationURL`` and ``ValidationURL`` registered with
+    :meth:`mpesa.kenya.API.c2b_register_url`. Each callback is decoded,
+    acknowledged to Safaricom straight away and queued as a
+    :class:`C2BRecord` for ``sink``, which runs on worker tasks off the
+    request path. When the bounded queue is full the callback is answered
+    with ``503`` so Safaricom retries it later instead of it being lost.
+
+    Mount the instance itself on an ASGI server, or :meth:`wsgi` on a WSGI
+    server.
+
+    :param sink: Coroutine function awaited with every :class:`C2BRecord`.
+    :type sink: callable
+    :param validator: Callable deciding validation callbacks inline. Return
+        ``True`` to accept, or a Daraja result code such as ``"C2B00012"`` to
+        reject. Validations are accepted when ``None``, defaults ``None``.
+    :type validator: callable, optional.
+    :param confirmation_path: Path of the ConfirmationURL,
+        defaults ``"/confirmation"``.
+    :type confirmation_path: str
+    :param validation_path: Path of the ValidationURL,
+        defaults ``"/validation"``.
+    :type validation_path: str
+    :param queue_size: Maximum records waiting for ``sink``,
+        defaults ``10000``.
+    :type queue_size: int
+    :param workers: Concurrent ``sink`` calls, defaults ``4``.
+    :type workers: int
+
+    :Example:
+
+    .. code-block:: python
+
+        async def store(record):
+            await db.payments.insert(record.payload)
+
+        app = C2BCallbackApp(store)  # uvicorn module:app
+        wsgi_app = app.wsgi  # gunicorn module:wsgi_app
+    """
+
+    def __init__(
+        self,
+        sink,
+        validator=None,
+        confirmation_path: str = "/confirmation",
+        validation_path: str = "/validation",
+        queue_size: int = 10000,
+        workers: int = 4,
+    ):
+        """Construct."""
+        self.sink = sink
+        self.validator = validator
+        self.routes = {
+            confirmation_path: "confirmation",
+            validation_path: "validation",
+        }
+        self.queue_size = queue_size
+        self.workers = workers
+        self._queue = None
+        self._tasks = []
+        self._wsgi_queue = None
+        self._wsgi_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "dropped": 0,
+            "invalid": 0,
+            "delivered": 0,
+            "failed": 0,
+        }
+
+    def stats(self) -> dict:
+        """Return counters of handled callbacks and sink deliveries."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        if self._queue is not None:
+            stats["queued"] = self._queue.qsize()
+        elif self._wsgi_queue is not None:
+            stats["queued"] = self._wsgi_queue.qsize()
+        else:
+            stats["queued"] = 0
+        return stats
+
+    def _count(self, counter: str):
+        """Increment counter, callbacks may be handled by many threads."""
+        with self._stats_lock:
+            self._stats[counter] += 1
+
+    def _handle(self, kind: str, body: bytes, enqueue):
+        """Return ``(status, response_body)`` for a callback body."""
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._count("invalid")
+            return 400, b""
+        if kind == "validation" and self.validator is not None:
+            verdict = self.validator(payload)
+            if verdict is not True:
+                self._count("rejected")
+                return 200, _rejected(verdict or "C2B00016")
+        try:
+            enqueue(C2BRecord(kind, payload))
+        except (asyncio.QueueFull, queue.Full):
+            self._count("dropped")
+            return 503, b""
+        self._count("accepted")
+        return 200, _ACCEPTED
+
+    async def _deliver(self, record: C2BRecord):
+        """Await ``sink`` with record, logging failures."""
+        try:
+            await self.sink(record)
+        except Exception:
+            self._count("failed")
+            payload = record.payload
+            LOGGER.exception(
+                "C2B callback sink failed for %s %s.",
+                record.kind,
+                payload.get("TransID") if isinstance(payload, dict) else
+                type(payload).__name__,
+            )
+        else:
+            self._count("delivered")
+
+    # ASGI.
+
+    def _start(self):
+        """Create the queue and sink workers on the running loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [
+                asyncio.ensure_future(self._consume())
+                for _ in range(self.workers)
+            ]
+
+    async def _consume(self):
+        """Feed queued records to ``sink`` forever."""
+        while True:
+            record = await self._queue.get()
+            try:
+                await self._deliver(record)
+            finally:
+                self._queue.task_done()
+
+    async def aclose(self):
+        """Wait for queued records to reach ``sink`` and stop the workers."""
+        if self._queue is None:
+            return
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        self._queue = None
+        self._tasks = []
+
+    async def _lifespan(self, receive, send):
+        """Handle ASGI lifespan events."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        """ASGI entry point."""
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        kind = self.routes.get(scope["path"])
+        if kind is None:
+            status, body = 404, b""
+        elif scope["method"] != "POST":
+            status, body = 405, b""
+        else:
+            chunks = []
+            more = True
+            while more:
+                message = await receive()
+                chunks.append(message.get("body", b""))
+                more = message.get("more_body", False)
+            self._start()
+            status, body = self._handle(
+                kind, b"".join(chunks), self._queue.put_nowait)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": _JSON,
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    # WSGI.
+
+    def _start_wsgi(self):
+        """Start the thread feeding WSGI records to ``sink``."""
+        with self._wsgi_lock:
+            if self._wsgi_queue is None:
+                self._wsgi_queue = queue.Queue(maxsize=self.queue_size)
+                threading.Thread(
+                    target=self._pump,
+                    name="mpesa-c2b-sink",
+                    daemon=True,
+                ).start()
+
+    def _pump(self):
+        """Run ``sink`` for WSGI records on a private event loop."""
+        loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=loop.run_forever,
+            name="mpesa-c2b-loop",
+            daemon=True,
+        ).start()
+        slots = threading.Semaphore(self.workers)
+        while True:
+            record = self._wsgi_queue.get()
+            slots.acquire()
+            future = asyncio.run_coroutine_threadsafe(
+                self._deliver(record), loop)
+            future.add_done_callback(lambda f: slots.release())
+
+    def wsgi(self, environ, start_response):
+        """WSGI entry point."""
+        kind = self.routes.get(environ.get("PATH_INFO"))
+        if kind is None:
+            status, body = 404, b""
+        elif environ["REQUEST_METHOD"] != "POST":
+            status, body = 405, b""
+        else:
+            try:
+                length = int(environ.get("CONTENT_LENGTH") or 0)
+            except ValueError:
+                length = 0
+            self._start_wsgi()
+            status, body = self._handle(
+                kind,
+                environ["wsgi.input"].read(length),
+                self._wsgi_queue.put_nowait,
+            )
+        start_response(_STATUS[status], _WSGI_JSON)
+        return [body]
@@ -0,0 +1,333 @@
+"""Kenya Daraja ResultURL Callback Correlation."""
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+
+__all__ = [
+    "RequestNotAccepted",
+    "ResultCorrelator",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RequestNotAccepted(Exception):
+    """Daraja did not accept a request, so no result callback will follow.
+
+    :param response: The acknowledgement returned by Daraja.
+    :type response: dict
+    """
+
+    def __init__(self, response: dict):
+        """Construct."""
+        super(RequestNotAccepted, self).__init__(
+            response.get("ResponseDescription")
+            or response.get("errorMessage")
+            or "Request was not accepted."
+        )
+        self.response = response
+
+
+class _Pending:
+    """Request awaiting its result callback."""
+
+    __slots__ = ("future", "ids", "expires_at", "context", "requeries")
+
+    def __init__(self, future, context):
+        self.future = future
+        self.ids = ()
+        self.expires_at = 0.0
+        self.context = context
+        self.requeries = 0
+
+
+def _complete(future: Future, result: dict):
+    """Set the result of future unless its caller cancelled it."""
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        LOGGER.debug("Result of a cancelled request dropped.")
+
+
+def _fail(future: Future, error: Exception):
+    """Set the exception of future unless its caller cancelled it."""
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        LOGGER.debug("Failure of a cancelled request dropped: %s.", error)
+
+
+def _ids(message: dict) -> tuple:
+    """Return the conversation ids of an acknowledgement or callback."""
+    body = message.get("Result", message)
+    return tuple(
+        i for i in (
+            body.get("ConversationID"),
+            body.get("OriginatorConversationID"),
+        ) if i
+    )
+
+
+class ResultCorrelator:
+    """Correlate ResultURL callbacks with the requests that caused them.
+
+    ``b2b``, ``b2c``, ``balance``, ``reverse`` and ``transaction_status``
+    only acknowledge a request; the outcome arrives later on ResultURL or
+    QueueTimeOutURL. :meth:`submit` sends a request and returns a future that
+    :meth:`resolve` completes once the ResultURL handler passes the matching
+    callback in.
+
+    Pending requests are indexed by both ``ConversationID`` and
+    ``OriginatorConversationID``, expire after ``ttl`` seconds and are capped
+    at ``max_entries``; evicted futures fail with ``TimeoutError``. A
+    QueueTimeOutURL callback passed to :meth:`timeout` triggers
+    ``on_timeout``, by default a :meth:`query_status` through the client the
+    request was submitted with. Its acknowledgement is tracked in place of
+    the original so the status query result completes the same future.
+
+    :param ttl: Seconds a request waits for its callback, defaults ``3600``.
+    :type ttl: float
+    :param max_entries: Maximum pending requests, defaults ``100000``.
+    :type max_entries: int
+    :param on_timeout: Callable invoked with the ``context`` dict of a timed
+        out request (``api``, ``method``, ``kwargs`` and ``response``). It
+        should send a status query such as
+        :meth:`mpesa.kenya.API.transaction_status` and return its
+        acknowledgement, defaults to :meth:`query_status`.
+    :type on_timeout: callable, optional.
+    :param max_requeries: Status queries allowed per request, timed out
+        requests fail with ``TimeoutError`` once they are used up, defaults
+        ``1``.
+    :type max_requeries: int
+
+    :Example:
+
+    .. code-block:: python
+
+        correlator = ResultCorrelator()
+        future = correlator.submit(api.b2c, amount="10", party_b=msisdn, ...)
+
+        # ResultURL handler
+        correlator.resolve(request.json)
+
+        print(future.result(timeout=120)["ResultCode"])
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: int = 100000,
+        on_timeout=None,
+        max_requeries: int = 1,
+        clock=time.monotonic,
+    ):
+        """Construct."""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if on_timeout is None:
+            on_timeout = self.query_status
+        self.on_timeout = on_timeout
+        self.max_requeries = max_requeries
+        self._clock = clock
+        self._index = {}
+        self._order = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of pending requests."""
+        return len(self._order)
+
+    def submit(self, method, **kwargs) -> Future:
+        """Call ``method(**kwargs)`` and track its acknowledgement.
+
+        :param method: Bound client method, e.g. ``api.b2c``.
+        :type method: callable
+        :return: Future resolving to the ``Result`` of the callback.
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        response = method(**kwargs)
+        context = {
+            "api": getattr(method, "__self__", None),
+            "method": getattr(method, "__name__", None),
+            "kwargs": kwargs,
+            "response": response,
+        }
+        return self.track(response, context)
+
+    def track(self, response: dict, context: dict = None) -> Future:
+        """Track the acknowledgement of an already sent request.
+
+        :param response: Acknowledgement returned by the client method.
+        :type response: dict
+        :param context: Data handed to ``on_timeout``, see :meth:`submit`,
+            defaults ``None``.
+        :type context: dict, optional.
+        :return: Future resolving to the ``Result`` of the callback.
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        future = Future()
+        ids = _ids(response)
+        if str(response.get("ResponseCode")) != "0" or not ids:
+            future.set_exception(RequestNotAccepted(response))
+            return future
+        pending = _Pending(future, context or {"response": response})
+        with self._lock:
+            evicted = self._sweep()
+            self._add(pending, ids)
+            while len(self._order) > self.max_entries:
+                evicted.append(self._remove(next(iter(self._order))))
+        self._expire(evicted)
+        return future
+
+    def resolve(self, callback: dict) -> bool:
+        """Complete the request matching a ResultURL callback.
+
+        :param callback: Decoded callback body.
+        :type callback: dict
+        :return: Whether a pending request matched.
+        :rtype: bool
+        """
+        pending = self._pop(callback)
+        if pending is None:
+            LOGGER.debug("Unmatched result callback %s.", _ids(callback))
+            return False
+        _complete(pending.future, callback.get("Result", callback))
+        return True
+
+    @staticmethod
+    def query_status(context: dict) -> dict:
+        """Send the transaction status query of a timed out request.
+
+        The default ``on_timeout``. Queries the ``OriginatorConversationID``
+        of the acknowledgement with the client, initiator, party and callback
+        urls of the original request. The query is authorized with the
+        credential of the initiator registered in ``api.credentials``, see
+        :class:`mpesa.kenya.SecurityCredentials`.
+
+        :param context: Context of the timed out request.
+        :type context: dict
+        :raises TimeoutError: The request was tracked without its client.
+        :raises KeyError: No credential of the initiator is registered.
+        :raises TypeError: The client is an :class:`mpesa.kenya.AsyncAPI`,
+            pass an ``on_timeout`` that schedules the query on its loop.
+        :return: Acknowledgement of the status query.
+        :rtype: dict
+        """
+        api = context.get("api")
+        if api is None:
+            raise TimeoutError("No client to query the timed out request.")
+        kwargs = context.get("kwargs") or {}
+        initiator = kwargs.get("initiator_name", kwargs.get("initiator"))
+        credentials = getattr(api, "credentials", None)
+        if credentials is None or (initiator, api.env) not in credentials:
+            raise KeyError(
+                "No SecurityCredential registered for initiator {0!r} to "
+                "query the timed out request.".format(initiator))
+        response = api.transaction_status(
+            party_a=kwargs.get("party_a", kwargs.get("receiver_party")),
+            identifier_type=kwargs.get(
+                "identifier_type",
+                kwargs.get("receiver_identifier_type", "4"),
+            ),
+            remarks="Status of a timed out request",
+            initiator=initiator,
+            result_url=kwargs.get("result_url"),
+            queue_timeout_url=kwargs.get("queue_timeout_url"),
+            transaction_id=context["response"].get(
+                "OriginatorConversationID"),
+        )
+        if inspect.iscoroutine(response):
+            response.close()
+            raise TypeError(
+                "query_status needs a blocking client, pass an on_timeout "
+                "for {0}.".format(type(api).__name__))
+        return response
+
+    def timeout(self, callback: dict) -> bool:
+        """Handle a QueueTimeOutURL callback.
+
+        Runs ``on_timeout`` for the matching request and keeps waiting on the
+        status query it sends, or fails the future with ``TimeoutError``.
+
+        :param callback: Decoded callback body.
+        :type callback: dict
+        :return: Whether a pending request matched.
+        :rtype: bool
+        """
+        pending = self._pop(callback)
+        if pending is None:
+            LOGGER.debug("Unmatched timeout callback %s.", _ids(callback))
+            return False
+        if pending.future.cancelled():
+            return True
+        if pending.requeries >= self.max_requeries:
+            self._expire([pending])
+            return True
+        pending.requeries += 1
+        try:
+            response = self.on_timeout(pending.context)
+        except Exception as e:
+            _fail(pending.future, e)
+            return True
+        ids = _ids(response or {})
+        if str((response or {}).get("ResponseCode")) != "0" or not ids:
+            _fail(pending.future, RequestNotAccepted(response or {}))
+            return True
+        with self._lock:
+            self._add(pending, ids)
+        return True
+
+    def sweep(self) -> int:
+        """Expire requests older than ``ttl`` and return how many were."""
+        with self._lock:
+            evicted = self._sweep()
+        self._expire(evicted)
+        return len(evicted)
+
+    def _add(self, pending: _Pending, ids: tuple):
+        """Index pending under ids, the lock must be held."""
+        pending.ids = ids
+        pending.expires_at = self._clock() + self.ttl
+        self._order[pending] = None
+        for i in ids:
+            self._index[i] = pending
+
+    def _remove(self, pending: _Pending) -> _Pending:
+        """Drop pending from the index, the lock must be held."""
+        self._order.pop(pending, None)
+        for i in pending.ids:
+            if self._index.get(i) is pending:
+                del self._index[i]
+        return pending
+
+    def _sweep(self) -> list:
+        """Remove and return expired requests, the lock must be held."""
+        now = self._clock()
+        evicted = []
+        for pending in self._order:
+            if pending.expires_at > now:
+                break
+            evicted.append(pending)
+        for pending in evicted:
+            self._remove(pending)
+        return evicted
+
+    def _pop(self, callback: dict):
+        """Remove and return the request matching callback, if any."""
+        with self._lock:
+            for i in _ids(callback):
+                pending = self._index.get(i)
+                if pending is not None:
+                    return self._remove(pending)
+        return None
+
+    def _expire(self, evicted: list):
+        """Fail the futures of evicted requests."""
+        for pending in evicted:
+            if not pending.future.done():
+                _fail(pending.future, TimeoutError(
+                    "No result callback for {0}.".format(
+                        ", ".join(pending.ids))))
@@ -0,0 +1,114 @@
+"""Kenya Daraja Initiator Security Credentials."""
+import base64
+import threading
+from Crypto.Cipher import PKCS1_v1_5
+from Crypto.PublicKey import RSA
+
+__all__ = [
+    "SecurityCredentials",
+]
+
+
+class SecurityCredentials:
+    """Thread safe cache of initiator ``SecurityCredential`` values.
+
+    The ``SecurityCredential`` of ``b2b``, ``b2c``, ``balance``, ``reverse``
+    and ``transaction_status`` is the initiator password encrypted with the
+    public key of the Safaricom certificate of the environment. Each
+    certificate is parsed once, each credential is encrypted once by
+    :meth:`register`, and :meth:`get` is a plain dictionary lookup, so no RSA
+    work happens on the request path.
+
+    :param certificates: Safaricom certificate per environment, mapping
+        ``"sandbox"`` and ``"production"`` to a PEM/DER file path or its
+        bytes. Download them from the developer portal, defaults ``None``.
+    :type certificates: dict, optional.
+
+    :Example:
+
+    .. code-block:: python
+
+        credentials = SecurityCredentials(
+            {"production": "ProductionCertificate.cer"})
+        credentials.register("apiop37", initiator_password, env="production")
+        api = API(env="production", app_key=key, app_secret=secret,
+                  credentials=credentials)
+        api.b2c(initiator_name="apiop37", ...)
+    """
+
+    def __init__(self, certificates: dict = None):
+        """Construct."""
+        self._certificates = dict(certificates or {})
+        self._ciphers = {}
+        self._credentials = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        """Return whether an ``(initiator, env)`` credential is registered."""
+        return key in self._credentials
+
+    def add_certificate(self, env: str, certificate):
+        """Set the certificate of env, a file path or its bytes."""
+        with self._lock:
+            self._certificates[env] = certificate
+            self._ciphers.pop(env, None)
+
+    def _cipher(self, env: str):
+        """Return the cipher of env, the lock must be held."""
+        cipher = self._ciphers.get(env)
+        if cipher is None:
+            try:
+                certificate = self._certificates[env]
+            except KeyError:
+                raise KeyError(
+                    "No Safaricom certificate for env {0!r}.".format(env))
+            if isinstance(certificate, str):
+                with open(certificate, "rb") as rf:
+                    certificate = rf.read()
+            cipher = PKCS1_v1_5.new(RSA.import_key(certificate))
+            self._ciphers[env] = cipher
+        return cipher
+
+    def encrypt(self, password: str, env: str = "sandbox") -> str:
+        """Return password encrypted with the env certificate, uncached.
+
+        :param password: Initiator password.
+        :type password: str
+        :param env: ``"sandbox"`` or ``"production"``, defaults ``"sandbox"``.
+        :type env: str
+        :return: Base64 encoded ``SecurityCredential``.
+        :rtype: str
+        """
+        with self._lock:
+            cipher = self._cipher(env)
+        encrypted = cipher.encrypt(password.encode("utf-8"))
+        return base64.b64encode(encrypted).decode("utf-8")
+
+    def register(
+        self,
+        initiator: str,
+        password: str,
+        env: str = "sandbox",
+    ) -> str:
+        """Encrypt and cache the credential of initiator in env.
+
+        :param initiator: Initiator username.
+        :type initiator: str
+        :param password: Initiator password.
+        :type password: str
+        :param env: ``"sandbox"`` or ``"production"``, defaults ``"sandbox"``.
+        :type env: str
+        :return: Base64 encoded ``SecurityCredential``.
+        :rtype: str
+        """
+        credential = self.encrypt(password, env)
+        self._credentials[(initiator, env)] = credential
+        return credential
+
+    def get(self, initiator: str, env: str = "sandbox") -> str:
+        """Return the cached credential of initiator in env, or ``None``."""
+        return self._credentials.get((initiator, env))
+
+    def forget(self, initiator: str, env: str = "sandbox"):
+        """Drop the cached credential, e.g. after a password change."""
+        self._credentials.pop((initiator, env), None)
@@ -0,0 +1,233 @@
+"""Kenya Daraja Endpoint Registry.
+
+Each Daraja operation is described once by an :class:`Endpoint`: its URL path
+and the payload key of every positional value the client passes for it, plus
+any constant payload fields. Clients resolve the full URLs when they are
+built, so a call only has to fill in the payload.
+"""
+
+__all__ = [
+    "Endpoint",
+    "ENDPOINTS",
+]
+
+
+class Endpoint:
+    """Description of one Daraja operation.
+
+    :param name: Operation name, the key in :data:`ENDPOINTS`.
+    :type name: str
+    :param path: URL path relative to the environment host.
+    :type path: str
+    :param fields: Payload keys, in the order values are passed to
+        :meth:`build`.
+    :type fields: tuple
+    :param defaults: Constant payload fields, defaults ``None``.
+    :type defaults: dict, optional.
+    :param idempotent: Whether repeating the operation is harmless, which
+        lets any transient failure be retried, defaults ``False``.
+    :type idempotent: bool
+    :param shortcode: Payload key holding the organization shortcode, whose
+        value keys rate limiting, defaults ``None``.
+    :type shortcode: str, optional.
+    """
+
+    __slots__ = (
+        "name",
+        "path",
+        "fields",
+        "defaults",
+        "idempotent",
+        "shortcode",
+        "_template",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        fields: tuple = (),
+        defaults: dict = None,
+        idempotent: bool = False,
+        shortcode: str = None,
+    ):
+        """Construct."""
+        self.name = name
+        self.path = path
+        self.fields = tuple(fields)
+        self.defaults = dict(defaults or {})
+        self.idempotent = idempotent
+        self.shortcode = None
+        if shortcode is not None:
+            self.shortcode = self.fields.index(shortcode)
+        self._template = dict.fromkeys(self.fields)
+        self._template.update(self.defaults)
+
+    def __repr__(self):
+        """Return repr."""
+        return "Endpoint({0!r}, {1!r})".format(self.name, self.path)
+
+    def build(self, *values) -> dict:
+        """Return the request payload for values given in ``fields`` order.
+
+        The payload is a copy of a template holding every key in order, so
+        only the values are filled in per call.
+        """
+        payload = self._template.copy()
+        payload.update(zip(self.fields, values))
+        return payload
+
+
+ENDPOINTS = {
+    endpoint.name: endpoint
+    for endpoint in (
+        Endpoint(
+            "authenticate",
+            "/oauth/v1/generate?grant_type=client_credentials",
+            idempotent=True,
+        ),
+        Endpoint(
+            "b2b",
+            "/mpesa/b2b/v1/paymentrequest",
+            (
+                "Initiator",
+                "SecurityCredential",
+                "CommandID",
+                "SenderIdentifierType",
+                "RecieverIdentifierType",
+                "Amount",
+                "PartyA",
+                "PartyB",
+                "Remarks",
+                "AccountReference",
+                "QueueTimeOutURL",
+                "ResultURL",
+            ),
+            shortcode="PartyA",
+        ),
+        Endpoint(
+            "b2c",
+            "/mpesa/b2c/v1/paymentrequest",
+            (
+                "InitiatorName",
+                "SecurityCredential",
+                "CommandID",
+                "Amount",
+                "PartyA",
+                "PartyB",
+                "Remarks",
+                "QueueTimeOutURL",
+                "ResultURL",
+                "Occassion",
+            ),
+            shortcode="PartyA",
+        ),
+        Endpoint(
+            "balance",
+            "/mpesa/accountbalance/v1/query",
+            (
+                "Initiator",
+                "SecurityCredential",
+                "CommandID",
+                "PartyA",
+                "IdentifierType",
+                "Remarks",
+                "QueueTimeOutURL",
+                "ResultURL",
+            ),
+            idempotent=True,
+            shortcode="PartyA",
+        ),
+        Endpoint(
+            "c2b_register_url",
+            "/mpesa/c2b/v1/registerurl",
+            (
+                "ShortCode",
+                "ResponseType",
+                "ConfirmationURL",
+                "ValidationURL",
+            ),
+            idempotent=True,
+            shortcode="ShortCode",
+        ),
+        Endpoint(
+            "c2b_simulate",
+            "/mpesa/c2b/v1/simulate",
+            (
+                "ShortCode",
+                "CommandID",
+                "Amount",
+                "Msisdn",
+                "BillRefNumber",
+            ),
+            shortcode="ShortCode",
+        ),
+        Endpoint(
+            "lnmo_stkpush",
+            "/mpesa/stkpush/v1/processrequest",
+            (
+                "BusinessShortCode",
+                "Password",
+                "Timestamp",
+                "Amount",
+                "PartyA",
+                "PartyB",
+                "PhoneNumber",
+                "CallBackURL",
+                "AccountReference",
+                "TransactionDesc",
+            ),
+            defaults={"TransactionType": "CustomerPayBillOnline"},
+            shortcode="BusinessShortCode",
+        ),
+        Endpoint(
+            "lnmo_status",
+            "/mpesa/stkpushquery/v1/query",
+            (
+                "BusinessShortCode",
+                "Password",
+                "Timestamp",
+                "CheckoutRequestID",
+            ),
+            idempotent=True,
+            shortcode="BusinessShortCode",
+        ),
+        Endpoint(
+            "reverse",
+            "/mpesa/reversal/v1/request",
+            (
+                "Initiator",
+                "SecurityCredential",
+                "CommandID",
+                "TransactionID",
+                "Amount",
+                "ReceiverParty",
+                "ReceiverIdentifierType",
+                "QueueTimeOutURL",
+                "ResultURL",
+                "Remarks",
+                "Occassion",
+            ),
+            shortcode="ReceiverParty",
+        ),
+        Endpoint(
+            "transaction_status",
+            "/mpesa/transactionstatus/v1/query",
+            (
+                "PartyA",
+                "IdentifierType",
+                "Remarks",
+                "Initiator",
+                "SecurityCredential",
+                "QueueTimeOutURL",
+                "ResultURL",
+                "TransactionID",
+                "Occasion",
+            ),
+            defaults={"CommandID": "TransactionStatusQuery"},
+            idempotent=True,
+            shortcode="PartyA",
+        ),
+    )
+}
+"""Registry of every :class:`Endpoint` used by :class:`mpesa.kenya.API`."""
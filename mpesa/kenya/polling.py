@@ -0,0 +1,292 @@
+"""Kenya Lipa Na M-Pesa Online (STK Push) Status Polling."""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+
+__all__ = [
+    "STKPushPoller",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _Checkout:
+    """Pending checkout tracked by :class:`STKPushPoller`."""
+
+    __slots__ = (
+        "business_shortcode",
+        "checkout_request_id",
+        "passcode",
+        "attempts",
+        "delay",
+        "future",
+    )
+
+    def __init__(self, business_shortcode, checkout_request_id, passcode,
+                 delay):
+        self.business_shortcode = business_shortcode
+        self.checkout_request_id = checkout_request_id
+        self.passcode = passcode
+        self.attempts = 0
+        self.delay = delay
+        self.future = Future()
+
+
+class STKPushPoller:
+    """Poll :meth:`mpesa.kenya.API.lnmo_status` for pending checkouts.
+
+    Pending checkouts sit in a heap ordered by their next poll time. A
+    dispatcher thread hands due polls to a pool of ``workers`` threads, and
+    each checkout backs off exponentially between polls until
+    ``lnmo_status`` reports a final ``ResultCode``, the result arrives
+    through :meth:`resolve` or ``max_attempts`` is exhausted.
+
+    :param api: Client used to query the status.
+    :type api: :class:`mpesa.kenya.API`
+    :param workers: Maximum status queries in flight, defaults ``8``.
+    :type workers: int
+    :param initial_delay: Seconds before the first poll, defaults ``10``.
+    :type initial_delay: float
+    :param backoff: Multiplier applied to the delay after each poll,
+        defaults ``1.5``.
+    :type backoff: float
+    :param max_delay: Upper bound of the delay between polls,
+        defaults ``60``.
+    :type max_delay: float
+    :param max_attempts: Polls after which a checkout is abandoned with a
+        ``TimeoutError``, defaults ``20``.
+    :type max_attempts: int
+
+    :Example:
+
+    .. code-block:: python
+
+        poller = STKPushPoller(api)
+        response, future = poller.push(
+            business_shortcode="174379",
+            passcode=passcode,
+            amount="1",
+            phone_number="254700000000",
+            callback_url=callback_url,
+            reference_code="INV-1",
+            description="Invoice",
+        )
+        print(future.result()["ResultCode"])
+    """
+
+    def __init__(
+        self,
+        api,
+        workers: int = 8,
+        initial_delay: float = 10.0,
+        backoff: float = 1.5,
+        max_delay: float = 60.0,
+        max_attempts: int = 20,
+        clock=time.monotonic,
+    ):
+        """Construct."""
+        self.api = api
+        self.workers = workers
+        self.initial_delay = initial_delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._heap = []
+        self._pending = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(workers)
+        self._executor = None
+        self._thread = None
+        self._running = False
+
+    def __len__(self) -> int:
+        """Return the number of pending checkouts."""
+        return len(self._pending)
+
+    def start(self):
+        """Start the dispatcher thread, called by :meth:`add` if needed."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="mpesa-stk-poll",
+            )
+            self._thread = threading.Thread(
+                target=self._run,
+                name="mpesa-stk-dispatch",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop polling, leaving pending futures unresolved."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and wait:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def add(
+        self,
+        business_shortcode: str,
+        checkout_request_id: str,
+        passcode: str,
+    ) -> Future:
+        """Start tracking a checkout.
+
+        :param business_shortcode: The short code of the organization.
+        :type business_shortcode: str
+        :param checkout_request_id: ``CheckoutRequestID`` of the push.
+        :type checkout_request_id: str
+        :param passcode: Get from developer portal
+        :type passcode: str
+        :return: Future resolving to the final ``lnmo_status`` response.
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        with self._cond:
+            checkout = self._pending.get(checkout_request_id)
+            if checkout is not None:
+                return checkout.future
+            checkout = _Checkout(
+                business_shortcode,
+                checkout_request_id,
+                passcode,
+                self.initial_delay,
+            )
+            self._pending[checkout_request_id] = checkout
+            self._schedule(checkout, self.initial_delay)
+        self.start()
+        return checkout.future
+
+    def push(self, **kwargs):
+        """Send :meth:`mpesa.kenya.API.lnmo_stkpush` and track the checkout.
+
+        :return: ``(response, future)``, future being ``None`` when the push
+            was not accepted.
+        :rtype: tuple
+        """
+        response = self.api.lnmo_stkpush(**kwargs)
+        checkout_request_id = response.get("CheckoutRequestID")
+        if str(response.get("ResponseCode")) != "0" or not checkout_request_id:
+            return response, None
+        future = self.add(
+            kwargs.get("business_shortcode"),
+            checkout_request_id,
+            kwargs.get("passcode"),
+        )
+        return response, future
+
+    def resolve(self, checkout_request_id: str, result: dict) -> bool:
+        """Finish a checkout with a result received out of band.
+
+        Call this from the CallBackURL handler so the checkout is not
+        polled again.
+
+        :return: Whether the checkout was pending.
+        :rtype: bool
+        """
+        with self._cond:
+            checkout = self._pending.pop(checkout_request_id, None)
+        if checkout is None:
+            return False
+        try:
+            checkout.future.set_result(result)
+        except InvalidStateError:
+            LOGGER.debug("Checkout %s was cancelled by its caller.",
+                         checkout_request_id)
+        return True
+
+    def cancel(self, checkout_request_id: str) -> bool:
+        """Stop tracking a checkout and cancel its future."""
+        with self._cond:
+            checkout = self._pending.pop(checkout_request_id, None)
+        if checkout is None:
+            return False
+        checkout.future.cancel()
+        return True
+
+    def _schedule(self, checkout: _Checkout, delay: float):
+        """Push checkout onto the heap, the condition must be held."""
+        due = self._clock() + delay
+        heapq.heappush(self._heap, (due, next(self._seq), checkout))
+        if self._heap[0][2] is checkout:
+            self._cond.notify()
+
+    def _due(self) -> list:
+        """Wait for and pop due checkouts, the condition must be held."""
+        while self._running:
+            now = self._clock()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                checkout = heapq.heappop(self._heap)[2]
+                key = checkout.checkout_request_id
+                if self._pending.get(key) is checkout:
+                    due.append(checkout)
+            if due:
+                return due
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._cond.wait(timeout)
+        return []
+
+    def _run(self):
+        """Dispatch due polls to the worker pool until stopped."""
+        while True:
+            with self._cond:
+                due = self._due()
+            if not due:
+                return
+            for checkout in due:
+                self._slots.acquire()
+                try:
+                    self._executor.submit(self._poll, checkout)
+                except RuntimeError:
+                    self._slots.release()
+                    return
+
+    def _poll(self, checkout: _Checkout):
+        """Query the status of checkout and settle or reschedule it."""
+        try:
+            checkout.attempts += 1
+            try:
+                response = self.api.lnmo_status(
+                    business_shortcode=checkout.business_shortcode,
+                    checkout_request_id=checkout.checkout_request_id,
+                    passcode=checkout.passcode,
+                )
+            except Exception:
+                LOGGER.debug("lnmo_status(%s) failed.",
+                             checkout.checkout_request_id, exc_info=True)
+                response = None
+            if response is not None and "ResultCode" in response:
+                self.resolve(checkout.checkout_request_id, response)
+                return
+            key = checkout.checkout_request_id
+            with self._cond:
+                if self._pending.get(key) is not checkout:
+                    return
+                if checkout.attempts >= self.max_attempts:
+                    del self._pending[key]
+                    expired = True
+                else:
+                    expired = False
+                    checkout.delay = min(
+                        checkout.delay * self.backoff, self.max_delay)
+                    self._schedule(checkout, checkout.delay)
+            if expired:
+                try:
+                    checkout.future.set_exception(TimeoutError(
+                        "No final ResultCode for {0} after {1} polls.".format(
+                            checkout.checkout_request_id, checkout.attempts)))
+                except InvalidStateError:
+                    pass
+        finally:
+            self._slots.release()
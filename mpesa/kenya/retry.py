@@ -0,0 +1,249 @@
+"""Kenya Daraja Failure Classification and Retry Policy.
+
+A failed call is sorted into one of four kinds before anything is resent:
+
+- :data:`CONNECT`: the connection was never established, so the request
+  cannot have reached Daraja.
+- :data:`TIMEOUT`: the request may have been received but no response came
+  back, including connections dropped after sending.
+- :data:`THROTTLED`: Daraja answered ``429`` or ``503`` and did not process
+  the request.
+- :data:`SERVER`: any other ``5xx``; the request may have been processed.
+
+Payments are only resent after :data:`CONNECT` or :data:`THROTTLED`, queries
+and other idempotent operations after any kind. TLS failures and ``4xx``
+responses are never retried. The body of the final response is decoded by
+:func:`decode_body`, which raises :class:`HTTPStatusError` for an error
+status whose body is not JSON, e.g. the HTML page of a gateway.
+"""
+import asyncio
+import json
+import random
+import threading
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from mpesa.kenya.sessions import aiohttp
+
+__all__ = [
+    "CONNECT",
+    "HTTPStatusError",
+    "RetryBudget",
+    "RetryPolicy",
+    "SERVER",
+    "THROTTLED",
+    "TIMEOUT",
+    "classify_error",
+    "classify_status",
+    "decode_body",
+]
+
+CONNECT = "connect"
+TIMEOUT = "timeout"
+THROTTLED = "throttled"
+SERVER = "server"
+
+_SAFE_FOR_PAYMENTS = frozenset([CONNECT, THROTTLED])
+
+
+class HTTPStatusError(Exception):
+    """Daraja answered an error status without a JSON body.
+
+    :param status_code: HTTP status code.
+    :type status_code: int
+    :param headers: Response headers.
+    :type headers: dict
+    :param content: Raw response body.
+    :type content: bytes
+    """
+
+    def __init__(self, status_code: int, headers, content: bytes):
+        """Construct."""
+        super(HTTPStatusError, self).__init__(
+            "Daraja answered HTTP {0} without a JSON body.".format(
+                status_code))
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+def decode_body(status: int, headers, content: bytes):
+    """Return the JSON body of the final response of a call.
+
+    :param status: HTTP status code.
+    :type status: int
+    :param headers: Response headers.
+    :type headers: dict
+    :param content: Raw response body.
+    :type content: bytes
+    :raises HTTPStatusError: status is ``4xx`` or ``5xx`` and content is not
+        JSON.
+    :raises ValueError: content of a successful response is not JSON.
+    """
+    try:
+        return json.loads(content)
+    except ValueError as e:
+        if status >= 400:
+            raise HTTPStatusError(status, headers, content) from e
+        raise
+
+
+def classify_error(error: Exception) -> str:
+    """Return the failure kind of a transport error, ``None`` if fatal.
+
+    :param error: Exception raised by ``requests`` or ``aiohttp``.
+    :type error: Exception
+    :rtype: str
+    """
+    if isinstance(error, requests.exceptions.SSLError):
+        return None
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return CONNECT
+    if isinstance(error, requests.exceptions.Timeout):
+        return TIMEOUT
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = error.args[0] if error.args else None
+        reason = getattr(reason, "reason", reason)
+        if isinstance(reason, NewConnectionError):
+            return CONNECT
+        return TIMEOUT
+    if aiohttp is not None:
+        if isinstance(error, aiohttp.ClientSSLError):
+            return None
+        if isinstance(error, aiohttp.ClientConnectorError):
+            return CONNECT
+        if isinstance(error, (aiohttp.ServerDisconnectedError,
+                              aiohttp.ServerTimeoutError,
+                              aiohttp.ClientOSError)):
+            return TIMEOUT
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return TIMEOUT
+    return None
+
+
+def classify_status(status: int) -> str:
+    """Return the failure kind of an HTTP status, ``None`` if not retryable.
+
+    :param status: HTTP status code.
+    :type status: int
+    :rtype: str
+    """
+    if status < 429:
+        return None
+    if status == 429 or status == 503:
+        return THROTTLED
+    if status >= 500:
+        return SERVER
+    return None
+
+
+class RetryBudget:
+    """Cap on the retries of one client.
+
+    Every request deposits ``ratio`` of a retry and every retry withdraws a
+    whole one, the balance being capped at ``reserve``. Retries therefore
+    stay below ``ratio`` of the traffic once the initial ``reserve`` is spent,
+    so an outage does not multiply the load on Daraja.
+
+    :param ratio: Retries earned per request, defaults ``0.2``.
+    :type ratio: float
+    :param reserve: Retries available up front and the balance cap,
+        defaults ``10``.
+    :type reserve: float
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0):
+        """Construct."""
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = reserve
+        self._lock = threading.Lock()
+
+    @property
+    def balance(self) -> float:
+        """Return the retries currently available."""
+        return self._balance
+
+    def deposit(self):
+        """Credit one request."""
+        if self._balance >= self.reserve:
+            return
+        with self._lock:
+            self._balance = min(self.reserve, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take one retry, returning whether the budget allowed it."""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class RetryPolicy:
+    """Decide whether and when a failed call is sent again.
+
+    Delays follow full jitter exponential backoff: a uniform draw between
+    zero and ``min(max_delay, base_delay * 2 ** attempt)``, or the
+    ``Retry-After`` of a throttled response when it is given.
+
+    :param attempts: Maximum sends per call, defaults ``3``.
+    :type attempts: int
+    :param base_delay: Seconds of the first backoff ceiling,
+        defaults ``0.5``.
+    :type base_delay: float
+    :param max_delay: Upper bound of a backoff, defaults ``8``.
+    :type max_delay: float
+    :param budget: Retry budget shared by the calls of one client,
+        defaults to a new :class:`RetryBudget`.
+    :type budget: :class:`RetryBudget`, optional.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        budget: RetryBudget = None,
+        rng=random.random,
+    ):
+        """Construct."""
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = RetryBudget() if budget is None else budget
+        self._rng = rng
+
+    def begin(self):
+        """Record the first send of a call with the budget."""
+        self.budget.deposit()
+
+    def backoff(self, kind: str, idempotent: bool, attempt: int,
+                retry_after=None) -> float:
+        """Return the seconds to wait before resending, ``None`` to give up.
+
+        :param kind: Failure kind from :func:`classify_error` or
+            :func:`classify_status`.
+        :type kind: str
+        :param idempotent: Whether the operation is safe to repeat.
+        :type idempotent: bool
+        :param attempt: Zero based number of the failed send.
+        :type attempt: int
+        :param retry_after: ``Retry-After`` header of the response.
+        :type retry_after: str, optional.
+        :rtype: float
+        """
+        if kind is None or attempt + 1 >= self.attempts:
+            return None
+        if not idempotent and kind not in _SAFE_FOR_PAYMENTS:
+            return None
+        if not self.budget.withdraw():
+            return None
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return self._rng() * ceiling
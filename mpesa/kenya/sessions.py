@@ -0,0 +1,276 @@
+"""Kenya Daraja Keep-Alive HTTP Session Pools."""
+import asyncio
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+__all__ = [
+    "AsyncSessionPool",
+    "SessionPool",
+    "shared_async_session_pool",
+    "shared_session_pool",
+]
+
+
+class SessionPool:
+    """Persistent ``requests.Session`` backed by a keep-alive connection pool.
+
+    Connections to the Daraja hosts are kept open between calls so that only
+    the first request to a host pays for the TCP and TLS handshakes.
+
+    :param pool_connections: Number of per host connection pools to keep,
+        defaults ``10``.
+    :type pool_connections: int
+    :param pool_maxsize: Maximum connections kept alive per host,
+        defaults ``10``.
+    :type pool_maxsize: int
+    :param pool_block: Block when every connection to a host is busy instead
+        of opening a throwaway one, defaults ``False``.
+    :type pool_block: bool
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+    ):
+        """Construct."""
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request over the pooled session."""
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            if self._in_flight > self._peak_in_flight:
+                self._peak_in_flight = self._in_flight
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request over the pooled session."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request over the pooled session."""
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        """Return pool statistics.
+
+        :return: Dict object of
+
+            - `requests` (int): Requests sent through this pool.
+
+            - `in_flight` (int): Requests currently awaiting a response.
+
+            - `peak_in_flight` (int): Most concurrent requests seen.
+
+            - `pool_maxsize` (int): Connections kept alive per host.
+
+            - `hosts` (list): One dict per host with ``host``, ``port``,
+              ``connections`` opened (pool misses), ``requests`` sent,
+              ``reused`` connections (pool hits), ``idle`` connections
+              currently parked in the pool and ``discarded`` connections,
+              opened but neither idle nor in use, mostly evicted because
+              more than ``pool_maxsize`` were open at once.
+        :rtype: dict
+        """
+        hosts = []
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            queue = list(getattr(pool.pool, "queue", ()))
+            idle = sum(1 for conn in queue if conn is not None)
+            in_use = max(getattr(pool.pool, "maxsize", 0) - len(queue), 0)
+            hosts.append(
+                {
+                    "host": pool.host,
+                    "port": pool.port,
+                    "connections": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "reused": pool.num_requests - pool.num_connections,
+                    "idle": idle,
+                    "discarded": max(
+                        pool.num_connections - idle - in_use, 0),
+                }
+            )
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+                "pool_maxsize": self.pool_maxsize,
+                "hosts": hosts,
+            }
+
+    def close(self):
+        """Close every pooled connection."""
+        self.session.close()
+
+
+_SHARED = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_session_pool(
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+) -> SessionPool:
+    """Return the process wide :class:`SessionPool` for the given sizes."""
+    key = (pool_connections, pool_maxsize)
+    pool = _SHARED.get(key)
+    if pool is None:
+        with _SHARED_LOCK:
+            pool = _SHARED.get(key)
+            if pool is None:
+                pool = _SHARED[key] = SessionPool(
+                    pool_connections, pool_maxsize)
+    return pool
+
+
+class AsyncSessionPool:
+    """Non-blocking keep-alive connection pool backed by ``aiohttp``.
+
+    An ``aiohttp.ClientSession`` is created on first use inside each running
+    event loop, so a pool may serve successive ``asyncio.run`` calls or
+    several loops. Await :meth:`close` before a loop ends to release its
+    connections, sessions left behind by closed loops are dropped when the
+    next one is created.
+
+    :param limit: Maximum simultaneous connections, ``0`` for no limit,
+        defaults ``100``.
+    :type limit: int
+    :param limit_per_host: Maximum simultaneous connections per host,
+        ``0`` for no limit, defaults ``0``.
+    :type limit_per_host: int
+    :param keepalive_timeout: Seconds an idle connection is kept open,
+        defaults ``30``.
+    :type keepalive_timeout: float
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+    ):
+        """Construct."""
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncSessionPool requires aiohttp, "
+                "install it with `pip install tekmpesa[async]`."
+            )
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._sessions = {}
+        self._requests = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    @property
+    def session(self):
+        """Return the ``aiohttp.ClientSession`` of the running event loop.
+
+        Creates it if needed, must be called from a coroutine.
+        """
+        loop = asyncio.get_event_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            for stale in [k for k in self._sessions if k.is_closed()]:
+                self._sessions.pop(stale).detach()
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def request(self, method: str, url: str, **kwargs):
+        """Send a request and return ``(status, headers, content)``.
+
+        The body is read as raw bytes, so that the caller can classify the
+        status before deciding whether to decode it.
+        """
+        self._requests += 1
+        self._in_flight += 1
+        if self._in_flight > self._peak_in_flight:
+            self._peak_in_flight = self._in_flight
+        try:
+            async with self.session.request(method, url, **kwargs) as r:
+                return r.status, r.headers, await r.read()
+        finally:
+            self._in_flight -= 1
+
+    async def get(self, url: str, **kwargs):
+        """Send a GET request, see :meth:`request`."""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        """Send a POST request, see :meth:`request`."""
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        """Return pool statistics.
+
+        Same ``requests``, ``in_flight`` and ``peak_in_flight`` figures as
+        :meth:`SessionPool.stats` plus the connector ``limit`` and
+        ``limit_per_host``.
+        """
+        return {
+            "requests": self._requests,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+        }
+
+    async def close(self):
+        """Close the pooled connections of the running event loop."""
+        session = self._sessions.pop(asyncio.get_event_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+def shared_async_session_pool(
+    limit: int = 100,
+    limit_per_host: int = 0,
+) -> AsyncSessionPool:
+    """Return the process wide :class:`AsyncSessionPool` for the limits."""
+    key = ("async", limit, limit_per_host)
+    pool = _SHARED.get(key)
+    if pool is None:
+        with _SHARED_LOCK:
+            pool = _SHARED.get(key)
+            if pool is None:
+                pool = _SHARED[key] = AsyncSessionPool(limit, limit_per_host)
+    return pool
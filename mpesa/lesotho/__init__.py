@@ -1,5 +1,56 @@
-"""Lesotho MPESA SDK Implementation.
+"""Lesotho MPESA SDK Implementation."""
+from mpesa.portalsdk.openapi import MARKETS, AsyncMarketAPI, MarketAPI
 
-.. todo::
-    To be Implemented when the Public API is made available.
-"""
+
+class API(MarketAPI):
+    """Lesotho Market API.
+
+    :class:`mpesa.portalsdk.MarketAPI` bound to ``MARKETS["lesotho"]``.
+
+    :param public_key: Public key from developers portal.
+    :type public_key: str.
+    :param api_key: API key from developers portal.
+    :type api_key: str.
+    :param env: Environment either ``"sandbox"`` or ``"production"``, defaults ``"sandbox"``.
+    :type env: str, optional.
+    :param transport: HTTP transport of every request, defaults to the
+        keep-alive transport shared per host and port.
+    :type transport: :class:`mpesa.portalsdk.Transport`, optional.
+    :param sessions: Cache of live SessionIDs, defaults to the shared
+        :data:`mpesa.portalsdk.SESSION_MANAGER`.
+    :type sessions: :class:`mpesa.portalsdk.SessionManager`, optional.
+
+    **Attributes.**
+
+    .. attribute:: sandbox_path
+
+        The sandbox prefix path ``"/sandbox/ipg/v2/vodacomLES/"``.
+
+    .. attribute:: live_path
+
+        The live/openapi prefix path ``"/openapi/ipg/v2/vodacomLES/"``.
+
+    .. attribute:: Currency
+
+        The Currency used for this API. default ``"LSL"``.
+
+    .. attribute:: Country
+
+        The Country used for this API. default ``"LES"``.
+
+    **Methods.**
+
+
+    """
+
+    market = MARKETS["lesotho"]
+
+
+class AsyncAPI(AsyncMarketAPI, API):
+    """Asyncio twin of :class:`API`.
+
+    Each operation returns an awaitable, see
+    :class:`mpesa.portalsdk.AsyncMarketAPI`.
+    """
+
+    market = MARKETS["lesotho"]
@@ -1,10 +1,31 @@
 """Mozambique MPESA SDK Implementation."""
+import asyncio
+import logging
+
+from mpesa.batch import run_batch, run_batch_async
 from mpesa.portalsdk import (
     APIContext,
     APIMethodType,
+    APIOutput,
     APIRequest,
+    BearerCache,
+    Transport,
+    background_loop,
+    shared_transport,
 )
 
+LOGGER = logging.getLogger(__name__)
+
+
+def _payout_key(payout: dict) -> str:
+    """Return the checkpoint key of a :meth:`API.b2c_batch` payout."""
+    return payout["ThirdPartyReference"]
+
+
+def _accepted(output) -> bool:
+    """Return whether the portal accepted the request of output."""
+    return output.get("ResponseCode") == "INS-0"
+
 
 class API:
     """Mozambique Market API.
@@ -15,6 +36,12 @@ class API:
     :type api_key: str.
     :param env: Environment either ``"sandbox"`` or ``"production"``, defaults ``"sandbox"``.
     :type env: str, optional.
+    :param transport: HTTP transport of every request, defaults to the
+        keep-alive transport shared per host and port.
+    :type transport: :class:`mpesa.portalsdk.Transport`, optional.
+
+    The bearer is encrypted once and reused for the life of the client, and
+    each endpoint port has its own keep-alive pool, see :meth:`warmup`.
 
     **Attributes.**
 
@@ -26,52 +53,88 @@ class API:
 
         The live/openapi api host ``"api.vm.co.mz"``.
 
+    .. attribute:: ports
+
+        The port of each operation.
+
 
     **Methods.**
 
 
     """
 
+    ports = {
+        "c2b": 18352,
+        "b2c": 18345,
+        "b2b": 18349,
+        "reverse": 18354,
+        "transaction_status": 18353,
+    }
+
     def __init__(
         self,
         public_key: str,
         api_key: str,
         env: str = "sandbox",
+        transport: Transport = None,
     ):
         """Initialize API."""
         self.public_key = public_key
         self.api_key = api_key
         self.env = env
+        self.transport = transport
+        self.bearer_cache = BearerCache(lifetime=None)
+        self._transports = {}
+        self._base = None
+        self._twin = None
         self.sandbox_host = "api.sandbox.vm.co.mz"
         self.live_host = "api.vm.co.mz"
 
-    def _pretty(self, body: dict) -> dict:
-        """Return new dict from body with output_ key prefix trimmed."""
-        pretty = {k.replace("output_", ""): v for k, v in body.items()}
-        return pretty
+    def _pretty(self, body: dict) -> APIOutput:
+        """Return a dict of body with the output_ key prefix trimmed."""
+        return APIOutput(body)
+
+    def _base_context(self) -> APIContext:
+        """Return the frozen context every request derives from."""
+        key = (self.public_key, self.api_key, self.env)
+        if self._base is None or self._base[0] != key:
+            if self.env == "production":
+                address = self.live_host
+            else:
+                address = self.sandbox_host
+            base = APIContext(
+                api_key=self.api_key,
+                public_key=self.public_key,
+                ssl=True,
+                address=address,
+                headers={
+                    "Origin": "*",
+                    "Authorization": self.bearer_cache.get(
+                        self.api_key, self.public_key),
+                    "Content-Type": "application/json",
+                    "Host": address,
+                },
+            ).freeze()
+            self._base = (key, base)
+        return self._base[1]
 
     def _create_context(
         self,
         path: str = "",
         method_type: APIMethodType = APIMethodType.GET,
         port: int = 80,
-        headers: dict = {"Origin": "*"},
-        params: dict = {},
+        headers: dict = None,
+        params: dict = None,
     ):
-        """Return APIContext."""
-        api_context = APIContext()
-        api_context.public_key = self.public_key
-        api_context.api_key = self.api_key
-        if self.env == "production":
-            api_context.address = self.live_host
-        else:
-            api_context.address = self.sandbox_host
-        api_context.ssl = True
-        api_context.port = port
-        api_context.path = path
-        api_context.method_type = method_type
-        [api_context.add_header(k, v) for k, v in headers.items()]
-        [api_context.add_parameter(k, v) for k, v in params.items()]
+        """Return APIContext derived from the base context."""
+        api_context = self._base_context().derive(
+            parameters=params,
+            port=port,
+            path=path,
+            method_type=method_type,
+        )
+        for k, v in (headers or {}).items():
+            api_context.add_header(k, v)
         return api_context
 
     def _execute(self, context: APIContext):
@@ -81,7 +144,11 @@ class API:
         :return: API Response body.
         :rtype: ``APIResponse``.
         """
-        api_request = APIRequest(context)
+        api_request = APIRequest(
+            context,
+            bearer_cache=self.bearer_cache,
+            transport=self._transport(context.address, context.port),
+        )
         result = None
         try:
             result = api_request.execute()
@@ -92,6 +159,61 @@ class API:
         # print(result.body)  # , type(result.body))-->dict
         return result.body
 
+    def _call(
+        self,
+        path: str,
+        method_type: APIMethodType,
+        port: int,
+        params: dict,
+    ):
+        """Send a request to path on port and return its trimmed output.
+
+        Every operation goes through this hook.
+        """
+        context = self._create_context(
+            path,
+            method_type,
+            port=port,
+            params=params,
+        )
+        return self._pretty(self._execute(context))
+
+    def _transport(self, address: str, port: int) -> Transport:
+        """Return the transport of a host and port.
+
+        ``self.transport`` when given, otherwise the keep-alive pool of the
+        host and port, held by the client once looked up.
+        """
+        if self.transport is not None:
+            return self.transport
+        transport = self._transports.get((address, port))
+        if transport is None:
+            transport = shared_transport(address, port, True)
+            self._transports[(address, port)] = transport
+        return transport
+
+    def warmup(self) -> list:
+        """Encrypt the bearer and open a connection to every endpoint port.
+
+        Call it at start up so the first request of each operation skips the
+        RSA encryption and the TCP and TLS handshakes. Ports that cannot be
+        reached are logged and skipped.
+
+        :return: The ports connected.
+        :rtype: list
+        """
+        address = self._base_context().address
+        connected = []
+        for port in sorted(set(self.ports.values())):
+            url = "https://{}:{}/".format(address, port)
+            try:
+                self._transport(address, port).connect(url)
+            except Exception:
+                LOGGER.warning("Could not warm up %s.", url, exc_info=True)
+            else:
+                connected.append(port)
+        return connected
+
     @property
     def bearer_token(self):
         """Return Bearer Token."""
@@ -136,7 +258,7 @@ class API:
             }
         """
         path = "/ipg/v1x/c2bPayment/singleStage/"
-        port = 18352
+        port = self.ports["c2b"]
         method_type = APIMethodType.POST
         params = {
             "input_Amount": Amount,
@@ -145,14 +267,34 @@ class API:
             "input_ThirdPartyReference": ThirdPartyReference,
             "input_TransactionReference": TransactionReference,
         }
-        context = self._create_context(
-            path,
-            method_type,
-            port=port,
-            params=params,
-        )
-        body = self._execute(context)
-        return self._pretty(body)
+        return self._call(path, method_type, port, params)
+
+    def _background_twin(self):
+        """Return the :class:`AsyncAPI` run on the background loop."""
+        twin = self._twin
+        if twin is None:
+            transport = background_loop().transport_for(self.transport)
+            twin = AsyncAPI(
+                self.public_key, self.api_key, self.env, transport=transport)
+            twin.bearer_cache = self.bearer_cache
+            self._twin = twin
+        return twin
+
+    def c2b_submit(self, *args, **kwargs):
+        """Submit a :meth:`c2b` without waiting for the customer.
+
+        Takes the arguments of :meth:`c2b`. The USSD push request is parked
+        on the process wide :class:`mpesa.portalsdk.BackgroundLoop` until the
+        customer answers, so pending collections hold no thread.
+        A blocking ``transport`` of the client is still used, see
+        :meth:`mpesa.portalsdk.BackgroundLoop.transport_for`, at the cost of
+        a thread per pending call.
+
+        :return: Future resolving to the :meth:`c2b` output.
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        twin = self._background_twin()
+        return background_loop().submit(twin.c2b(*args, **kwargs))
 
     def b2c(
         self,
@@ -192,7 +334,7 @@ class API:
             }
         """
         path = "/ipg/v1x/b2cPaymemt/"
-        port = 18345
+        port = self.ports["b2c"]
         method_type = APIMethodType.POST
         params = {
             "input_Amount": Amount,
@@ -201,14 +343,7 @@ class API:
             "input_ThirdPartyReference": ThirdPartyReference,
             "input_TransactionReference": TransactionReference,
         }
-        context = self._create_context(
-            path,
-            method_type,
-            port=port,
-            params=params,
-        )
-        body = self._execute(context)
-        return self._pretty(body)
+        return self._call(path, method_type, port, params)
 
     def b2b(
         self,
@@ -249,7 +384,7 @@ class API:
 
         """
         path = "/ipg/v1x/b2bPayment/"
-        port = 18349
+        port = self.ports["b2b"]
         method_type = APIMethodType.POST
         params = {
             "input_Amount": Amount,
@@ -258,14 +393,7 @@ class API:
             "input_ThirdPartyReference": ThirdPartyReference,
             "input_TransactionReference": TransactionReference,
         }
-        context = self._create_context(
-            path,
-            method_type,
-            port=port,
-            params=params,
-        )
-        body = self._execute(context)
-        return self._pretty(body)
+        return self._call(path, method_type, port, params)
 
     def reverse(
         self,
@@ -311,7 +439,7 @@ class API:
             }
         """
         path = "/ipg/v1x/reversal/"
-        port = 18354
+        port = self.ports["reverse"]
         method_type = APIMethodType.PUT
         params = {
             "input_InitiatorIdentifier": InitiatorIdentifier,
@@ -321,14 +449,7 @@ class API:
             "input_ThirdPartyReference": ThirdPartyReference,
             "input_TransactionID": TransactionID,
         }
-        context = self._create_context(
-            path,
-            method_type,
-            port=port,
-            params=params,
-        )
-        body = self._execute(context)
-        return self._pretty(body)
+        return self._call(path, method_type, port, params)
 
     def transaction_status(
         self,
@@ -364,18 +485,146 @@ class API:
             }
         """
         path = "/ipg/v1x/queryTransactionStatus/"
-        port = 18353
+        port = self.ports["transaction_status"]
         method_type = APIMethodType.GET
         params = {
             "input_QueryReference": QueryReference,
             "input_ServiceProviderCode": ServiceProviderCode,
             "input_ThirdPartyReference": ThirdPartyReference,
         }
+        return self._call(path, method_type, port, params)
+
+    def _b2c_payout(self, payout: dict):
+        """Return :meth:`b2c` of a :meth:`b2c_batch` payout."""
+        return self.b2c(**payout)
+
+    def b2c_batch(self, payouts, concurrency: int = 8, checkpoint=None):
+        """Disburse many B2C payouts with bounded concurrency.
+
+        Payouts are pulled lazily from ``payouts`` and at most
+        ``concurrency`` :meth:`b2c` calls are in flight at once, all
+        authorized by the shared cached bearer. Each result is yielded as
+        soon as its call finishes.
+
+        Accepted payouts (``ResponseCode`` ``"INS-0"``) are recorded in
+        ``checkpoint`` so rerunning the same batch after a crash skips them.
+        Rejected payouts are cleared and sent again by a rerun. Calls that
+        raised, e.g. timed out, may still have been processed: they stay in
+        ``checkpoint.unknown`` and are skipped until their
+        :meth:`transaction_status` is checked and settled with
+        :meth:`mpesa.batch.Checkpoint.reconcile`.
+
+        :param payouts: Iterable of dicts of :meth:`b2c` keyword arguments,
+            whose ``ThirdPartyReference`` uniquely identifies the payout
+            within the batch.
+        :type payouts: iterable
+        :param concurrency: Maximum calls in flight, defaults ``8``.
+        :type concurrency: int
+        :param checkpoint: Checkpoint of completed
+            ``ThirdPartyReference`` values or the path of its file.
+        :type checkpoint: :class:`mpesa.batch.Checkpoint` or str, optional.
+
+        :return: Iterator of :class:`mpesa.batch.BatchResult` keyed by
+            ``ThirdPartyReference`` in completion order.
+
+        :Example:
+
+        .. code-block:: python
+
+            payouts = (
+                {
+                    "Amount": row["amount"],
+                    "CustomerMSISDN": row["msisdn"],
+                    "ServiceProviderCode": "171717",
+                    "TransactionReference": "Payroll",
+                    "ThirdPartyReference": row["id"],
+                }
+                for row in csv.DictReader(open("payroll.csv"))
+            )
+            for result in api.b2c_batch(payouts, 32, "payroll.done"):
+                print(result.key, result.error or result.response)
+        """
+        return run_batch(
+            self._b2c_payout,
+            payouts,
+            key=_payout_key,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            succeeded=_accepted,
+        )
+
+
+class AsyncAPI(API):
+    """Asyncio twin of :class:`API`.
+
+    Exposes the same operations with the same arguments, but each call
+    returns an awaitable resolving to the trimmed output. Requests share the
+    non-blocking pool of :func:`mpesa.portalsdk.shared_async_transport`.
+
+    :param public_key: Public key from developers portal.
+    :type public_key: str.
+    :param api_key: API key from developers portal.
+    :type api_key: str.
+    :param env: Environment either ``"sandbox"`` or ``"production"``, defaults ``"sandbox"``.
+    :type env: str, optional.
+    :param transport: Non-blocking HTTP transport, defaults to the shared
+        async pool.
+    :type transport: :class:`mpesa.portalsdk.AsyncTransport`, optional.
+    """
+
+    async def _execute(self, context: APIContext):
+        """Return result.body after making the request without blocking."""
+        api_request = APIRequest(
+            context, bearer_cache=self.bearer_cache, transport=self.transport)
+        result = await api_request.execute_async()
+        if not result:
+            raise Exception("API Call Failed to get Result. Please Check.")
+        return result.body
+
+    async def _call(
+        self,
+        path: str,
+        method_type: APIMethodType,
+        port: int,
+        params: dict,
+    ):
+        """Send a request to path on port, see :meth:`API._call`."""
         context = self._create_context(
             path,
             method_type,
             port=port,
             params=params,
         )
-        body = self._execute(context)
-        return self._pretty(body)
+        return self._pretty(await self._execute(context))
+
+    async def warmup(self) -> list:
+        """Encrypt the bearer ahead of the first request.
+
+        The non-blocking pool opens its connections on first use.
+
+        :return: The ports connected, always empty.
+        :rtype: list
+        """
+        self._base_context()
+        return []
+
+    def c2b_submit(self, *args, **kwargs):
+        """Schedule a :meth:`c2b` on the running loop and return its task.
+
+        :rtype: :class:`asyncio.Task`
+        """
+        return asyncio.ensure_future(self.c2b(*args, **kwargs))
+
+    def b2c_batch(self, payouts, concurrency: int = 8, checkpoint=None):
+        """Disburse many B2C payouts, see :meth:`API.b2c_batch`.
+
+        :return: Async iterator of :class:`mpesa.batch.BatchResult`.
+        """
+        return run_batch_async(
+            self._b2c_payout,
+            payouts,
+            key=_payout_key,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            succeeded=_accepted,
+        )
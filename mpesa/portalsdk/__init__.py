@@ -1,15 +1,22 @@
 """Portalsdk subpackage.
 
 .. note::
-    This module provides an abstraction over the API mechanisms of three submodules.
+    This module provides an abstraction over the API mechanisms of four submodules.
     Namely:
 
     - :mod:`mpesa.tanzania`
 
     - :mod:`mpesa.ghana`
 
+    - :mod:`mpesa.lesotho`
+
     - :mod:`mpesa.mozambique`
 
+    The OpenAPI markets share one client,
+    :class:`mpesa.portalsdk.MarketAPI`, driven by the
+    :class:`mpesa.portalsdk.Market` descriptors of
+    :data:`mpesa.portalsdk.MARKETS`.
+
     It Provides the following classes which are used internally in the
     implementation of the respective API classes.
 
@@ -17,19 +24,110 @@
 
     - :class:`mpesa.portalsdk.APIMethodType`
 
+    - :class:`mpesa.portalsdk.APIOutput`
+
     - :class:`mpesa.portalsdk.APIRequest`
 
     - :class:`mpesa.portalsdk.APIResponse`
 
+    - :class:`mpesa.portalsdk.BearerCache`
+
+    - :class:`mpesa.portalsdk.BillingEngine`
+
+    - :class:`mpesa.portalsdk.SessionManager`
+
+    - :class:`mpesa.portalsdk.SessionPool`
+
+    - :class:`mpesa.portalsdk.TimingHooks`
+
+    Requests go through a :class:`mpesa.portalsdk.Transport`, by default the
+    keep-alive :class:`mpesa.portalsdk.PooledTransport` shared per host and
+    port; :class:`mpesa.portalsdk.InMemoryTransport` answers from memory.
+    :meth:`mpesa.portalsdk.APIRequest.execute_async` uses the
+    :class:`mpesa.portalsdk.AsyncTransport` counterparts.
+
+    USSD push C2B calls of the synchronous clients can be parked on the
+    :class:`mpesa.portalsdk.BackgroundLoop` with ``c2b_submit``.
+
+    Hooks added to :data:`mpesa.portalsdk.TIMING_HOOKS` receive the
+    :class:`mpesa.portalsdk.PhaseTimings` of every request, see
+    :mod:`mpesa.portalsdk.hooks`.
+
 """
 from mpesa.portalsdk.api import APIContext
 from mpesa.portalsdk.api import APIMethodType
+from mpesa.portalsdk.api import APIOutput
 from mpesa.portalsdk.api import APIRequest
 from mpesa.portalsdk.api import APIResponse
+from mpesa.portalsdk.auth import BearerCache, BEARER_CACHE
+from mpesa.portalsdk.background import BackgroundLoop, background_loop
+from mpesa.portalsdk.billing import BillingEngine
+from mpesa.portalsdk.sessions import (
+    AsyncSessionManager,
+    ASYNC_SESSION_MANAGER,
+    AsyncSessionPool,
+    SessionManager,
+    SESSION_MANAGER,
+    SessionPool,
+)
+from mpesa.portalsdk.openapi import (
+    AsyncMarketAPI,
+    Market,
+    MARKETS,
+    MarketAPI,
+)
+from mpesa.portalsdk.hooks import (
+    PHASES,
+    PhaseTimings,
+    TimingHooks,
+    TIMING_HOOKS,
+)
+from mpesa.portalsdk.transport import (
+    AsyncInMemoryTransport,
+    AsyncPooledTransport,
+    AsyncTransport,
+    ExecutorTransport,
+    InMemoryTransport,
+    PooledTransport,
+    Transport,
+    TransportResponse,
+    shared_async_transport,
+    shared_transport,
+)
 
 __all__ = [
     "APIContext",
     "APIMethodType",
+    "APIOutput",
     "APIRequest",
     "APIResponse",
+    "BearerCache",
+    "BEARER_CACHE",
+    "BackgroundLoop",
+    "background_loop",
+    "BillingEngine",
+    "AsyncMarketAPI",
+    "Market",
+    "MARKETS",
+    "MarketAPI",
+    "AsyncSessionManager",
+    "ASYNC_SESSION_MANAGER",
+    "AsyncSessionPool",
+    "SessionManager",
+    "SESSION_MANAGER",
+    "SessionPool",
+    "PHASES",
+    "PhaseTimings",
+    "TimingHooks",
+    "TIMING_HOOKS",
+    "AsyncInMemoryTransport",
+    "AsyncPooledTransport",
+    "AsyncTransport",
+    "ExecutorTransport",
+    "InMemoryTransport",
+    "PooledTransport",
+    "Transport",
+    "TransportResponse",
+    "shared_async_transport",
+    "shared_transport",
 ]
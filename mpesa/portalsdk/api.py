@@ -1,11 +1,20 @@
 """Mpesa PortalSDK API Helper Module."""
 import json
+import logging
+from collections.abc import Mapping
 from enum import Enum
+from time import perf_counter
 
 import requests
-from base64 import b64decode, b64encode
-from Crypto.PublicKey import RSA
-from Crypto.Cipher import PKCS1_v1_5 as Cipher_PKCS1_v1_5
+from mpesa.portalsdk.auth import BEARER_CACHE, BearerCache, encrypt_api_key
+from mpesa.portalsdk.hooks import TIMING_HOOKS, PhaseTimings, TimingHooks
+from mpesa.portalsdk.transport import (
+    Transport,
+    shared_async_transport,
+    shared_transport,
+)
+
+LOGGER = logging.getLogger(__name__)
 
 
 class APIRequest:
@@ -13,11 +22,48 @@ class APIRequest:
 
     :param context: context under which to create the API Request.
     :type context: :class:`mpesa.portalsdk.APIContext`.
+    :param bearer_cache: Cache of encrypted bearers, defaults to the shared
+        :data:`mpesa.portalsdk.BEARER_CACHE`.
+    :type bearer_cache: :class:`mpesa.portalsdk.BearerCache`.
+    :param transport: HTTP transport, defaults to the keep-alive transport
+        shared by every request to the context host and port, or to the
+        shared :class:`mpesa.portalsdk.AsyncPooledTransport` for
+        :meth:`execute_async`.
+    :type transport: :class:`mpesa.portalsdk.Transport`.
+    :param hooks: Hooks receiving the per-phase timings of the request,
+        defaults to the shared :data:`mpesa.portalsdk.TIMING_HOOKS`.
+    :type hooks: :class:`mpesa.portalsdk.TimingHooks`.
     """
 
-    def __init__(self, context=None):
+    def __init__(
+        self,
+        context=None,
+        bearer_cache: BearerCache = None,
+        transport: Transport = None,
+        hooks: TimingHooks = None,
+    ):
         """Construct."""
         self.context = context
+        if bearer_cache is None:
+            bearer_cache = BEARER_CACHE
+        self.bearer_cache = bearer_cache
+        self._transport = transport
+        if hooks is None:
+            hooks = TIMING_HOOKS
+        self.hooks = hooks
+
+    @property
+    def transport(self) -> Transport:
+        """Return the transport, the shared one of the context by default."""
+        if self._transport is None:
+            context = self.context
+            self._transport = shared_transport(
+                context.address, context.port, context.ssl)
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: Transport):
+        self._transport = transport
 
     def execute(self):
         """Execute API Request using ``self.context``.
@@ -27,81 +73,110 @@ class APIRequest:
         :return: response object of ``mpesa.portalsdk.APIResponse``.
         :rtype: :class:`mpesa.portalsdk.APIResponse`.
         """
-        if self.context is not None:
-            self.create_default_headers()
-            try:
-                return {
-                    APIMethodType.GET: self.__get,
-                    APIMethodType.POST: self.__post,
-                    APIMethodType.PUT: self.__put,
-                }.get(self.context.method_type, self.__unknown)()
-            except requests.exceptions.ConnectionError as ce:
-                raise ce
+        if self.hooks:
+            return self._execute_timed()
+        method, url, headers, params, body = self._prepare()
+        try:
+            r = self.transport.send(
+                method, url, headers, params=params, json=body)
+        except requests.exceptions.ConnectionError as ce:
+            raise ce
+        LOGGER.debug("%s %s %s", method, url, r.status_code)
+        return APIResponse(r.status_code, r.headers, content=r.content)
+
+    def _execute_timed(self):
+        """Execute like :meth:`execute` and report the phase timings."""
+        timings = PhaseTimings()
+        method, url, headers, params, body = self._prepare(timings)
+        r = self.transport.send(
+            method, url, headers, params=params, json=body, timings=timings)
+        LOGGER.debug("%s %s %s", method, url, r.status_code)
+        return self._report(timings, r)
+
+    async def execute_async(self):
+        """Execute API Request using ``self.context`` without blocking.
+
+        Sends through the transport given on construction, which must then be
+        a :class:`mpesa.portalsdk.AsyncTransport`, or the shared
+        :class:`mpesa.portalsdk.AsyncPooledTransport`.
+
+        :raises: ``TypeError``
+        :return: response object of ``mpesa.portalsdk.APIResponse``.
+        :rtype: :class:`mpesa.portalsdk.APIResponse`.
+        """
+        timings = PhaseTimings() if self.hooks else None
+        method, url, headers, params, body = self._prepare(timings)
+        transport = self._transport
+        if transport is None:
+            transport = shared_async_transport()
+        if timings is None:
+            r = await transport.send(
+                method, url, headers, params=params, json=body)
         else:
+            r = await transport.send(
+                method, url, headers, params=params, json=body,
+                timings=timings)
+        LOGGER.debug("%s %s %s", method, url, r.status_code)
+        if timings is not None:
+            return self._report(timings, r)
+        return APIResponse(r.status_code, r.headers, content=r.content)
+
+    def _report(self, timings: PhaseTimings, r):
+        """Return the APIResponse of r after reporting timings."""
+        start = perf_counter()
+        try:
+            return APIResponse(r.status_code, r.headers, content=r.content)
+        finally:
+            timings.decode = perf_counter() - start
+            timings.status_code = r.status_code
+            self.hooks(timings)
+
+    def _prepare(self, timings: PhaseTimings = None) -> tuple:
+        """Return ``(method, url, headers, params, json)`` of the request.
+
+        GET parameters go in the query string, other methods send them as
+        the JSON body. The ``encrypt`` phase is recorded on timings when
+        given.
+        """
+        if self.context is None:
             raise TypeError("Context cannot be None.")
+        method = _METHODS.get(self.context.method_type)
+        if method is None:
+            self.__unknown()
+        if timings is None:
+            self.create_default_headers()
+        else:
+            start = perf_counter()
+            self.create_default_headers()
+            timings.encrypt = perf_counter() - start
+        url = self.context.get_url()
+        headers = self.context.get_headers()
+        parameters = self.context.get_parameters()
+        if timings is not None:
+            timings.method = method
+            timings.url = url
+        if method == "GET":
+            return method, url, headers, parameters, None
+        return method, url, headers, None, parameters
 
     def create_bearer_token(self):
         """Return encrypted context api_key using the context public_key."""
-        key_der = b64decode(self.context.public_key)
-        key_pub = RSA.importKey(key_der)
-        cipher = Cipher_PKCS1_v1_5.new(key_pub)
-        cipher_text = cipher.encrypt(self.context.api_key.encode("ascii"))
-        encrypted_msg = b64encode(cipher_text)
-
-        return encrypted_msg
+        return encrypt_api_key(self.context.api_key, self.context.public_key)
 
     def create_default_headers(self):
-        """Add some default headers to ``self.context``."""
+        """Add some default headers to ``self.context``.
+
+        The ``Authorization`` value comes from ``self.bearer_cache`` so the
+        api_key is only encrypted again once the cached bearer expires.
+        """
         self.context.add_header(
             "Authorization",
-            "Bearer {}".format(self.create_bearer_token().decode("utf-8")),
+            self.bearer_cache.get(
+                self.context.api_key, self.context.public_key),
         )
         self.context.add_header("Content-Type", "application/json")
         self.context.add_header("Host", self.context.address)
 
-    def __get(self):
-        """Return ``mpesa.portalsdk.APIResponse`` after GET Request."""
-        r = requests.get(
-            self.context.get_url(),
-            params=self.context.get_parameters(),
-            headers=self.context.get_headers(),
-        )
-        print(r)
-        return APIResponse(
-            r.status_code,
-            json.loads(r.headers.__str__().replace("'", '"')),
-            json.loads(r.text),
-        )
-
-    def __post(self):
-        """Return ``mpesa.portalsdk.APIResponse`` after POST Request."""
-        r = requests.post(
-            self.context.get_url(),
-            headers=self.context.get_headers(),
-            json=self.context.get_parameters(),
-        )
-        print(r)
-        return APIResponse(
-            r.status_code,
-            json.loads(r.headers.__str__().replace("'", '"')),
-            json.loads(r.text),
-        )
-
-    def __put(self):
-        """Return ``mpesa.portalsdk.APIResponse`` after PUT Request."""
-        print("PUT")
-        r = requests.put(
-            self.context.get_url(),
-            headers=self.context.get_headers(),
-            json=self.context.get_parameters(),
-        )
-        print("PUT", r)
-        return APIResponse(
-            r.status_code,
-            json.loads(r.headers.__str__().replace("'", '"')),
-            json.loads(r.text),
-        )
-
     def __unknown(self):
         """Raise Unknown Method Exception.
 
@@ -113,20 +188,35 @@ class APIRequest:
 class APIResponse(dict):
     """API Response Class.
 
+    Nothing is lazy: the body is decoded from the raw bytes, without an
+    intermediate ``str``, and the header mapping is copied into a plain dict
+    as soon as the response is built, so that it serialises, compares and
+    iterates like any dict. The raw bytes stay available as ``content``.
+
     :param status_code: String representing HTTP Status Code.
-    :param headers: Dict object of key,value headers.
-    :param body: Dict object of key,value pairs.
+    :param headers: Mapping of key,value headers.
+    :param body: Dict object of key,value pairs, decoded from content when
+        ``None``.
+    :param content: Raw JSON body bytes.
     :type status_code: str
     :type headers: dict
     :type body: dict
+    :type content: bytes
+    :raises ValueError: content is not valid JSON.
     """
 
-    def __init__(self, status_code, headers, body):
+    def __init__(self, status_code, headers=None, body=None, content=None):
         """Construct."""
         super(APIResponse, self).__init__()
+        if type(headers) is not dict:
+            headers = dict(headers or ())
+        if body is None:
+            body = json.loads(content) if content else {}
         self["status_code"]: str = status_code
         self["headers"]: dict = headers
         self["body"]: dict = body
+        self._content = content
+        self._output = None
 
     @property
     def status_code(self) -> int:
@@ -147,7 +237,7 @@ class APIResponse(dict):
 
     @headers.setter
     def headers(self, headers: dict):
-        if type(headers) is not dict:
+        if not isinstance(headers, Mapping):
             raise TypeError("headers must be a dict")
         else:
             self["headers"] = headers
@@ -163,6 +253,48 @@ class APIResponse(dict):
             raise TypeError("body must be a dict")
         else:
             self["body"] = body
+            self._output = None
+
+    @property
+    def content(self) -> bytes:
+        """Return the raw HTTP Body bytes, ``None`` if not kept."""
+        return self._content
+
+    @property
+    def output(self) -> "APIOutput":
+        """Return ``body`` with the ``output_`` key prefix trimmed."""
+        if self._output is None:
+            self._output = APIOutput(self.body)
+        return self._output
+
+
+class APIOutput(dict):
+    """Response body with the ``output_`` key prefix trimmed.
+
+    ``output["ResponseCode"]`` holds ``body["output_ResponseCode"]`` and keys
+    without the prefix are kept as they are. Only the top level keys are
+    copied, the values are shared with the body.
+
+    :param body: Decoded response body.
+    :type body: dict
+    """
+
+    __slots__ = ()
+
+    _PREFIX = "output_"
+
+    def __init__(self, body: dict):
+        """Construct."""
+        prefix = self._PREFIX
+        size = len(prefix)
+        super(APIOutput, self).__init__(
+            (key[size:] if key.startswith(prefix) else key, value)
+            for key, value in body.items()
+        )
+
+    def __repr__(self):
+        """Return repr."""
+        return "APIOutput({0!r})".format(dict(self))
 
 
 class APIMethodType(Enum):
@@ -174,9 +306,22 @@ class APIMethodType(Enum):
     DELETE: int = 4
 
 
-class APIContext(dict):
+_METHODS = {
+    APIMethodType.GET: "GET",
+    APIMethodType.POST: "POST",
+    APIMethodType.PUT: "PUT",
+}
+
+
+class APIContext:
     """API Context Class.
 
+    A compact ``__slots__`` object holding everything needed to send one
+    request. Clients build a base context with the fields shared by all
+    their requests once, :meth:`freeze` it, and :meth:`derive` a child per
+    request. Children share the base headers and parameters until they add
+    their own, at which point only the child gets a copy.
+
     :param api_key: API Key.
     :param public_key: Public Key.
     :param ssl: Whether to use ssl, defaults ``False``.
@@ -184,8 +329,8 @@ class APIContext(dict):
     :param address: Address, defaults ``""``.
     :param port: Port, defaults ``80``.
     :param path: URL path, defaults ``""``.
-    :param headers: Headers, defaults ``{}``.
-    :param parameters: Parameters, defaults ``{}``.
+    :param headers: Headers, copied, defaults ``None``.
+    :param parameters: Parameters, copied, defaults ``None``.
     :type api_key: str.
     :type public_key: str.
     :type ssl: bool.
@@ -197,6 +342,30 @@ class APIContext(dict):
     :type parameters: dict.
     """
 
+    __slots__ = (
+        "_api_key",
+        "_public_key",
+        "_ssl",
+        "_method_type",
+        "_address",
+        "_port",
+        "_path",
+        "_headers",
+        "_parameters",
+        "_owns",
+        "_frozen",
+    )
+
+    _FIELDS = (
+        "api_key",
+        "public_key",
+        "ssl",
+        "method_type",
+        "address",
+        "port",
+        "path",
+    )
+
     def __init__(
         self,
         api_key="",
@@ -206,124 +375,216 @@ class APIContext(dict):
         address="",
         port=80,
         path="",
-        headers={},
-        parameters={},
+        headers=None,
+        parameters=None,
     ):
-        super(APIContext, self).__init__()
-
-        self["api_key"]: str = api_key
-        self["public_key"]: str = public_key
-        self["ssl"]: bool = ssl
-        self["method_type"]: Enum = method_type
-        self["address"]: str = address
-        self["port"]: int = port
-        self["path"]: str = path
-        self["headers"]: dict = headers
-        self["parameters"]: dict = parameters
+        """Construct."""
+        self._frozen = False
+        self.api_key = api_key
+        self.public_key = public_key
+        self.ssl = ssl
+        self.method_type = method_type
+        self.address = address
+        self.port = port
+        self.path = path
+        self._headers = dict(headers or {})
+        self._parameters = dict(parameters or {})
+        self._owns = (True, True)
+
+    def __repr__(self):
+        """Return repr."""
+        return "APIContext({0})".format(", ".join(
+            "{0}={1!r}".format(field, getattr(self, field))
+            for field in self._FIELDS + ("headers", "parameters")
+        ))
+
+    def freeze(self) -> "APIContext":
+        """Make this context read only and return it."""
+        self._frozen = True
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        """Return whether the context is read only."""
+        return self._frozen
+
+    def derive(self, parameters: dict = None, **fields) -> "APIContext":
+        """Return a child context sharing this context's data.
+
+        :param parameters: Parameters of the child, taken over without a
+            copy, defaults to sharing this context's parameters.
+        :type parameters: dict, optional.
+        :param fields: Fields to override, any of ``api_key``,
+            ``public_key``, ``ssl``, ``method_type``, ``address``, ``port``
+            and ``path``.
+        :rtype: :class:`mpesa.portalsdk.APIContext`
+        """
+        child = APIContext.__new__(APIContext)
+        child._frozen = False
+        child._api_key = self._api_key
+        child._public_key = self._public_key
+        child._ssl = self._ssl
+        child._method_type = self._method_type
+        child._address = self._address
+        child._port = self._port
+        child._path = self._path
+        child._headers = self._headers
+        if parameters is None:
+            child._parameters = self._parameters
+            child._owns = (False, False)
+        else:
+            child._parameters = parameters
+            child._owns = (False, True)
+        for field, value in fields.items():
+            if field not in self._FIELDS:
+                raise TypeError("Unknown APIContext field {0!r}.".format(
+                    field))
+            setattr(child, field, value)
+        return child
+
+    def _writable(self):
+        """Raise ``TypeError`` if the context is frozen."""
+        if self._frozen:
+            raise TypeError("APIContext is frozen, derive() a child.")
 
     def get_url(self):
         """Return formed url from context data."""
-        if self.ssl is True:
-            return "https://{}:{}{}".format(self.address, self.port, self.path)
+        if self._ssl is True:
+            return "https://{}:{}{}".format(
+                self._address, self._port, self._path)
         else:
-            return "http://{}:{}{}".format(self.address, self.port, self.path)
+            return "http://{}:{}{}".format(
+                self._address, self._port, self._path)
 
     def add_header(self, header, value):
-        """Update Headers dict with header,value."""
-        self["headers"].update({header: value})
+        """Update Headers dict with header,value.
+
+        Setting a header to the value it already has leaves a derived
+        context sharing the headers of its base.
+        """
+        self._writable()
+        if header in self._headers and self._headers[header] == value:
+            return
+        own_headers, own_parameters = self._owns
+        if not own_headers:
+            self._headers = dict(self._headers)
+            self._owns = (True, own_parameters)
+        self._headers[header] = value
 
     def get_headers(self):
         """Return self headers."""
-        return self["headers"]
+        return self._headers
 
     def add_parameter(self, key, value):
         """Update Parameters dict with key,value."""
-        self["parameters"].update({key: value})
+        self._writable()
+        own_headers, own_parameters = self._owns
+        if not own_parameters:
+            self._parameters = dict(self._parameters)
+            self._owns = (own_headers, True)
+        self._parameters[key] = value
 
     def get_parameters(self):
         """Return self parameters."""
-        return self["parameters"]
+        return self._parameters
+
+    @property
+    def headers(self) -> dict:
+        """Return self headers."""
+        return self._headers
+
+    @property
+    def parameters(self) -> dict:
+        """Return self parameters."""
+        return self._parameters
 
     @property
     def api_key(self) -> str:
         """Return self api_key."""
-        return self["api_key"]
+        return self._api_key
 
     @api_key.setter
     def api_key(self, api_key: str):
+        self._writable()
         if type(api_key) is not str:
             raise TypeError("api_key must be a str")
         else:
-            self["api_key"] = api_key
+            self._api_key = api_key
 
     @property
     def public_key(self) -> str:
         """Return self public_key."""
-        return self["public_key"]
+        return self._public_key
 
     @public_key.setter
     def public_key(self, public_key: str):
+        self._writable()
         if type(public_key) is not str:
             raise TypeError("public_key must be a str")
         else:
-            self["public_key"] = public_key
+            self._public_key = public_key
 
     @property
     def ssl(self) -> bool:
         """Return self ssl."""
-        return self["ssl"]
+        return self._ssl
 
     @ssl.setter
     def ssl(self, ssl: bool):
+        self._writable()
         if type(ssl) is not bool:
             raise TypeError("ssl must be a bool")
         else:
-            self["ssl"] = ssl
+            self._ssl = ssl
 
     @property
     def method_type(self) -> APIMethodType:
         """Return self method_type."""
-        return self["method_type"]
+        return self._method_type
 
     @method_type.setter
     def method_type(self, method_type: APIMethodType):
+        self._writable()
         if type(method_type) is not APIMethodType:
             raise TypeError("method_type must be a APIMethodType")
         else:
-            self["method_type"] = method_type
+            self._method_type = method_type
 
     @property
     def address(self) -> str:
         """Return self address."""
-        return self["address"]
+        return self._address
 
     @address.setter
     def address(self, address: str):
+        self._writable()
         if type(address) is not str:
             raise TypeError("address must be a str")
         else:
-            self["address"] = address
+            self._address = address
 
     @property
     def port(self) -> int:
         """Return self port."""
-        return self["port"]
+        return self._port
 
     @port.setter
     def port(self, port: int):
+        self._writable()
         if type(port) is not int:
             raise TypeError("port must be a int")
         else:
-            self["port"] = port
+            self._port = port
 
     @property
     def path(self) -> str:
         """Return self path."""
-        return self["path"]
+        return self._path
 
     @path.setter
     def path(self, path: str):
+        self._writable()
         if type(path) is not str:
             raise TypeError("path must be a str")
         else:
-            self["path"] = path
+            self._path = path
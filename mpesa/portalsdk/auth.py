@@ -0,0 +1,99 @@
+"""Mpesa PortalSDK Bearer Token Caching.
+
+The portal bearer is the API key encrypted with the market public key. Parsing
+the key and encrypting are by far the most expensive steps of a request, so
+parsed keys are kept per public key and the ``Authorization`` value per
+``(api_key, public_key)`` for a configurable lifetime.
+"""
+import threading
+import time
+from base64 import b64decode, b64encode
+
+from Crypto.Cipher import PKCS1_v1_5 as Cipher_PKCS1_v1_5
+from Crypto.PublicKey import RSA
+
+__all__ = [
+    "BearerCache",
+    "BEARER_CACHE",
+    "encrypt_api_key",
+]
+
+_CIPHERS = {}
+_CIPHERS_LOCK = threading.Lock()
+
+
+def _cipher(public_key: str):
+    """Return the PKCS#1 v1.5 cipher of a base64 DER public key, cached."""
+    cipher = _CIPHERS.get(public_key)
+    if cipher is None:
+        with _CIPHERS_LOCK:
+            cipher = _CIPHERS.get(public_key)
+            if cipher is None:
+                key_pub = RSA.importKey(b64decode(public_key))
+                cipher = Cipher_PKCS1_v1_5.new(key_pub)
+                _CIPHERS[public_key] = cipher
+    return cipher
+
+
+def encrypt_api_key(api_key: str, public_key: str) -> bytes:
+    """Return api_key encrypted with public_key and base64 encoded.
+
+    :param api_key: Portal API key.
+    :type api_key: str
+    :param public_key: Base64 DER encoded market public key.
+    :type public_key: str
+    :rtype: bytes
+    """
+    return b64encode(_cipher(public_key).encrypt(api_key.encode("ascii")))
+
+
+class BearerCache:
+    """Memoize the ``Authorization`` header value per API and public key.
+
+    :param lifetime: Seconds a bearer is reused before it is encrypted
+        again, ``None`` to keep it for the life of the process,
+        defaults ``3600``.
+    :type lifetime: float, optional.
+    """
+
+    def __init__(self, lifetime: float = 3600.0, clock=time.monotonic):
+        """Construct."""
+        self.lifetime = lifetime
+        self._clock = clock
+        self._bearers = {}
+
+    def __len__(self) -> int:
+        """Return the number of cached bearers."""
+        return len(self._bearers)
+
+    def get(self, api_key: str, public_key: str) -> str:
+        """Return ``"Bearer <encrypted api_key>"``, encrypting when stale.
+
+        :param api_key: Portal API key.
+        :type api_key: str
+        :param public_key: Base64 DER encoded market public key.
+        :type public_key: str
+        :rtype: str
+        """
+        key = (api_key, public_key)
+        cached = self._bearers.get(key)
+        now = self._clock()
+        if cached is not None and (cached[1] is None or cached[1] > now):
+            return cached[0]
+        bearer = "Bearer {}".format(
+            encrypt_api_key(api_key, public_key).decode("utf-8"))
+        expires_at = None if self.lifetime is None else now + self.lifetime
+        self._bearers[key] = (bearer, expires_at)
+        return bearer
+
+    def invalidate(self, api_key: str, public_key: str):
+        """Drop the cached bearer of ``(api_key, public_key)``."""
+        self._bearers.pop((api_key, public_key), None)
+
+    def clear(self):
+        """Drop every cached bearer."""
+        self._bearers.clear()
+
+
+BEARER_CACHE = BearerCache()
+"""Process wide :class:`BearerCache` used by default by every APIRequest."""
@@ -0,0 +1,106 @@
+"""Mpesa PortalSDK Background Event Loop.
+
+USSD push C2B calls keep their HTTP request open until the customer enters
+their PIN, often for a minute or more. Synchronous clients hand such calls to
+a :class:`BackgroundLoop`, an asyncio event loop running on a daemon thread
+with its own non-blocking connection pool, and get a
+:class:`concurrent.futures.Future` back at once. A single loop holds
+thousands of pending calls without a thread each.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from mpesa.portalsdk.transport import (
+    AsyncPooledTransport,
+    AsyncTransport,
+    ExecutorTransport,
+    Transport,
+)
+
+__all__ = [
+    "BackgroundLoop",
+    "background_loop",
+]
+
+
+class BackgroundLoop:
+    """Asyncio event loop running on a daemon thread.
+
+    :param limit: Maximum simultaneous connections of :attr:`transport`,
+        defaults ``1000``.
+    :type limit: int
+    :param timeout: Total seconds allowed per request, defaults ``300``.
+    :type timeout: float
+    """
+
+    def __init__(self, limit: int = 1000, timeout: float = 300.0):
+        """Construct."""
+        self.limit = limit
+        self.timeout = timeout
+        self._transport = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="mpesa-portal-loop",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def transport(self) -> AsyncPooledTransport:
+        """Return the non-blocking pool used on the loop, created lazily."""
+        if self._transport is None:
+            self._transport = AsyncPooledTransport(
+                limit=self.limit, timeout=self.timeout)
+        return self._transport
+
+    def transport_for(self, transport: Transport = None) -> AsyncTransport:
+        """Return the transport run on the loop for a client's transport.
+
+        :attr:`transport` when the client has none, a non-blocking one as
+        is and a blocking one wrapped in an
+        :class:`mpesa.portalsdk.ExecutorTransport`.
+
+        :param transport: Transport configured on the client.
+        :type transport: :class:`mpesa.portalsdk.Transport`, optional.
+        :rtype: :class:`mpesa.portalsdk.AsyncTransport`
+        """
+        if transport is None:
+            return self.transport
+        if isinstance(transport, AsyncTransport):
+            return transport
+        return ExecutorTransport(transport)
+
+    def submit(self, coro) -> Future:
+        """Schedule coro on the loop.
+
+        :param coro: Coroutine to run.
+        :return: Future resolving to the result of coro.
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def close(self):
+        """Close the pool and stop the loop."""
+        if self._transport is not None:
+            self.submit(self._transport.close()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+
+def background_loop() -> BackgroundLoop:
+    """Return the process wide :class:`BackgroundLoop`, started on first use.
+
+    :rtype: :class:`BackgroundLoop`
+    """
+    global _LOOP
+    if _LOOP is None:
+        with _LOOP_LOCK:
+            if _LOOP is None:
+                _LOOP = BackgroundLoop()
+    return _LOOP
@@ -0,0 +1,192 @@
+"""Mpesa PortalSDK Recurring Direct Debit Billing.
+
+A :class:`BillingEngine` runs the charges of a billing cycle through
+:meth:`mpesa.portalsdk.MarketAPI.direct_debit_payment` with bounded
+concurrency, see :func:`mpesa.batch.run_batch`. It creates missing mandates
+through :meth:`mpesa.portalsdk.MarketAPI.direct_debit_create` on the way.
+
+Created mandates are kept in an index, a :class:`mpesa.batch.Checkpoint`
+of mandate keys, so a mandate is only ever created once. Accepted charges are
+recorded in the checkpoint of the cycle, so an interrupted cycle resumes with
+the charges it had not finished.
+"""
+import logging
+import threading
+
+from mpesa.batch import Checkpoint, run_batch
+
+__all__ = [
+    "BillingEngine",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _charge_key(charge: dict) -> str:
+    """Return the checkpoint key of a charge."""
+    return charge["ThirdPartyConversationID"]
+
+
+def _mandate_key(mandate: dict) -> str:
+    """Return ``"<ServiceProviderCode>:<CustomerMSISDN>"`` of a mandate."""
+    return "{}:{}".format(
+        mandate["ServiceProviderCode"], mandate["CustomerMSISDN"])
+
+
+def _accepted(output) -> bool:
+    """Return whether the portal accepted the request of output."""
+    return output.get("ResponseCode") == "INS-0"
+
+
+class BillingEngine:
+    """Recurring direct debit billing over an OpenAPI market client.
+
+    :param api: Client of the market billed.
+    :type api: :class:`mpesa.portalsdk.MarketAPI`
+    :param mandates: Index of created mandate keys or the path of its file,
+        defaults to an index kept in memory.
+    :type mandates: :class:`mpesa.batch.Checkpoint` or str, optional.
+    :param rate_limiter: Limiter every portal call waits on, keyed by
+        ``ServiceProviderCode``, defaults ``None``.
+    :type rate_limiter: :class:`mpesa.ratelimit.RateLimiter`, optional.
+    :param concurrency: Maximum charges in flight, defaults ``8``.
+    :type concurrency: int
+    :param mandate_key: Callable returning the index key of the
+        :meth:`mpesa.portalsdk.MarketAPI.direct_debit_create` arguments of a
+        mandate, defaults to ``"<ServiceProviderCode>:<CustomerMSISDN>"``.
+    :type mandate_key: callable
+
+    :Example:
+
+    .. code-block:: python
+
+        engine = BillingEngine(
+            tanzania.API(public_key, api_key),
+            mandates="mandates.idx",
+            rate_limiter=RateLimiter(20),
+            concurrency=32,
+        )
+        charges = (
+            {
+                "Amount": sub.price,
+                "CustomerMSISDN": sub.msisdn,
+                "ServiceProviderCode": "000000",
+                "ThirdPartyConversationID": "{}-{}".format(cycle, sub.id),
+                "ThirdPartyReference": sub.id,
+                "mandate": {...},  # direct_debit_create arguments
+            }
+            for sub in subscriptions
+        )
+        for result in engine.run_cycle(charges, "cycle-2020-07.done"):
+            ...
+    """
+
+    def __init__(
+        self,
+        api,
+        mandates=None,
+        rate_limiter=None,
+        concurrency: int = 8,
+        mandate_key=_mandate_key,
+    ):
+        """Construct."""
+        self.api = api
+        if mandates is None or isinstance(mandates, str):
+            mandates = Checkpoint(mandates)
+        self.mandates = mandates
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.mandate_key = mandate_key
+        # Mandate key -> [lock, callers using it], dropped by the last one.
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _limit(self, params: dict):
+        """Wait for the rate limiter of the service provider of params."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(params["ServiceProviderCode"])
+
+    def ensure_mandate(self, **mandate):
+        """Create the mandate unless the index already holds it.
+
+        Takes the arguments of
+        :meth:`mpesa.portalsdk.MarketAPI.direct_debit_create`. Concurrent
+        calls for the same mandate create it once.
+
+        :return: The creation output, ``None`` when the mandate existed.
+        :rtype: :class:`mpesa.portalsdk.APIOutput`
+        """
+        key = self.mandate_key(mandate)
+        if key in self.mandates:
+            return None
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                if key in self.mandates:
+                    return None
+                self._limit(mandate)
+                output = self.api.direct_debit_create(**mandate)
+                if _accepted(output):
+                    self.mandates.add(key)
+                else:
+                    LOGGER.warning("Mandate %s not created: %s.", key,
+                                   output.get("ResponseCode"))
+                return output
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def charge(self, charge: dict):
+        """Return the output of one charge.
+
+        :param charge: :meth:`mpesa.portalsdk.MarketAPI.direct_debit_payment`
+            arguments, with an optional ``"mandate"`` dict of
+            :meth:`ensure_mandate` arguments created first when missing.
+        :type charge: dict
+        :rtype: :class:`mpesa.portalsdk.APIOutput`
+        """
+        kwargs = dict(charge)
+        mandate = kwargs.pop("mandate", None)
+        if mandate is not None:
+            output = self.ensure_mandate(**mandate)
+            if output is not None and not _accepted(output):
+                return output
+        self._limit(kwargs)
+        return self.api.direct_debit_payment(**kwargs)
+
+    def run_cycle(self, charges, checkpoint=None):
+        """Run the charges of a billing cycle.
+
+        Charges are pulled lazily from ``charges`` and at most
+        ``self.concurrency`` are in flight at once. Accepted charges
+        (``ResponseCode`` ``"INS-0"``) are recorded in ``checkpoint``, so
+        rerunning the cycle after a crash only sends the unfinished ones.
+        Charges whose call raised stay in ``checkpoint.unknown`` until
+        reconciled, see :class:`mpesa.batch.Checkpoint`.
+
+        :param charges: Iterable of :meth:`charge` dicts whose
+            ``ThirdPartyConversationID`` is unique within the cycle.
+        :type charges: iterable
+        :param checkpoint: Checkpoint of the cycle or the path of its file.
+        :type checkpoint: :class:`mpesa.batch.Checkpoint` or str, optional.
+        :return: Iterator of :class:`mpesa.batch.BatchResult` keyed by
+            ``ThirdPartyConversationID`` in completion order.
+        """
+        return run_batch(
+            self.charge,
+            charges,
+            key=_charge_key,
+            concurrency=self.concurrency,
+            checkpoint=checkpoint,
+            succeeded=_accepted,
+        )
+
+    def close(self):
+        """Close the mandate index."""
+        self.mandates.close()
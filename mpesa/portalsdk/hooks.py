@@ -0,0 +1,130 @@
+"""Mpesa PortalSDK Per-Phase Request Timing Hooks.
+
+Every :class:`mpesa.portalsdk.APIRequest` reports to a :class:`TimingHooks`
+registry, the process wide :data:`TIMING_HOOKS` by default. While the
+registry is empty nothing is timed, so the hooks cost a single truth test per
+request. Once a hook is added each request is timed phase by phase and the
+hooks receive a :class:`PhaseTimings` after the response has been decoded.
+
+The phases, in seconds, are:
+
+- ``encrypt``: fetching or encrypting the bearer.
+- ``serialize``: encoding the parameters into the HTTP request.
+- ``wait``: sending the request until the response headers arrive. It
+  includes any connection set up and the server processing time, which
+  the HTTP clients do not report apart.
+- ``transfer``: reading the response body.
+- ``decode``: decoding the JSON body and copying the headers.
+
+A phase the transport cannot observe is left ``None``, e.g. with the
+in-memory transports.
+
+.. code-block:: python
+
+    from mpesa.portalsdk import TIMING_HOOKS
+
+    @TIMING_HOOKS.add
+    def report(timings):
+        metrics.observe(timings.url, timings.total)
+"""
+import logging
+import threading
+
+__all__ = [
+    "PHASES",
+    "PhaseTimings",
+    "TimingHooks",
+    "TIMING_HOOKS",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+PHASES = ("encrypt", "serialize", "wait", "transfer", "decode")
+
+
+class PhaseTimings:
+    """Seconds spent in each phase of a request.
+
+    :param method: HTTP method, defaults ``""``.
+    :type method: str
+    :param url: Request url, defaults ``""``.
+    :type url: str
+    """
+
+    __slots__ = ("method", "url", "status_code") + PHASES
+
+    def __init__(self, method: str = "", url: str = ""):
+        """Construct."""
+        self.method = method
+        self.url = url
+        self.status_code = None
+        for phase in PHASES:
+            setattr(self, phase, None)
+
+    def __repr__(self) -> str:
+        """Return repr."""
+        return "PhaseTimings({})".format(", ".join(
+            "{}={!r}".format(k, getattr(self, k)) for k in self.__slots__))
+
+    @property
+    def total(self) -> float:
+        """Return the seconds spent in the measured phases."""
+        return sum(getattr(self, phase) or 0.0 for phase in PHASES)
+
+    def as_dict(self) -> dict:
+        """Return the phase timings as a dict."""
+        return {phase: getattr(self, phase) for phase in PHASES}
+
+
+class TimingHooks:
+    """Registry of callables receiving the :class:`PhaseTimings` of requests.
+
+    Hooks run in the thread, or event loop, that made the request, so they
+    should only record the timings. A failing hook is logged and ignored.
+    """
+
+    def __init__(self):
+        """Construct."""
+        self._hooks = ()
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        """Return whether any hook is registered."""
+        return bool(self._hooks)
+
+    def __len__(self) -> int:
+        """Return the number of registered hooks."""
+        return len(self._hooks)
+
+    def add(self, hook):
+        """Register hook, returned so add can be used as a decorator.
+
+        :param hook: Callable invoked as ``hook(timings)``.
+        :type hook: callable
+        :rtype: callable
+        """
+        with self._lock:
+            self._hooks = self._hooks + (hook,)
+        return hook
+
+    def remove(self, hook):
+        """Unregister hook, ignoring hooks that are not registered."""
+        with self._lock:
+            self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def clear(self):
+        """Unregister every hook."""
+        with self._lock:
+            self._hooks = ()
+
+    def __call__(self, timings: PhaseTimings):
+        """Hand timings to every registered hook."""
+        for hook in self._hooks:
+            try:
+                hook(timings)
+            except Exception:
+                LOGGER.exception("Timing hook %r failed.", hook)
+
+
+TIMING_HOOKS = TimingHooks()
+"""Process wide :class:`TimingHooks` used by default by every APIRequest."""
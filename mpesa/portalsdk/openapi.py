@@ -0,0 +1,1032 @@
+"""Mpesa PortalSDK OpenAPI Market Client.
+
+The OpenAPI markets expose the same operations under
+``openapi.m-pesa.com`` and differ only by their path prefix, country and
+currency. A :class:`Market` describes one of them, with its path prefixes
+computed once, and :class:`MarketAPI` serves any market it is given.
+:mod:`mpesa.tanzania`, :mod:`mpesa.ghana` and :mod:`mpesa.lesotho` are thin
+subclasses bound to their entry of :data:`MARKETS`.
+
+Every client shares the keep-alive transport of ``openapi.m-pesa.com`` and
+the process wide session manager, whichever markets a process serves.
+Adding a market is a new :class:`Market` in :data:`MARKETS`.
+"""
+import asyncio
+from collections import namedtuple
+
+from mpesa.batch import run_batch, run_batch_async
+from mpesa.portalsdk.api import (
+    APIContext,
+    APIMethodType,
+    APIOutput,
+    APIRequest,
+)
+from mpesa.portalsdk.background import background_loop
+from mpesa.portalsdk.sessions import (
+    AsyncSessionManager,
+    ASYNC_SESSION_MANAGER,
+    SessionManager,
+    SESSION_MANAGER,
+)
+from mpesa.portalsdk.transport import Transport
+
+__all__ = [
+    "AsyncMarketAPI",
+    "Market",
+    "MARKETS",
+    "MarketAPI",
+]
+
+
+def _payout_key(payout: dict) -> str:
+    """Return the checkpoint key of a :meth:`MarketAPI.b2c_batch` payout."""
+    return payout["ThirdPartyConversationID"]
+
+
+def _accepted(output) -> bool:
+    """Return whether the portal accepted the request of output."""
+    return output.get("ResponseCode") == "INS-0"
+
+
+class _SyncSessions:
+    """Sessions of a :class:`MarketAPI` seen by its background twin.
+
+    The session is made live in the submitting thread by
+    :meth:`MarketAPI.c2b_submit`. It is still read on the default executor
+    of the loop, as it may have expired and need a blocking renewal.
+    """
+
+    __slots__ = ("api",)
+
+    def __init__(self, api):
+        self.api = api
+
+    def _session_id(self) -> str:
+        return self.api.session_id
+
+    async def get(self, key, fetch) -> str:
+        """Return the live session of the sync API."""
+        return await asyncio.get_event_loop().run_in_executor(
+            None, self._session_id)
+
+
+_Market = namedtuple(
+    "_Market",
+    ["name", "code", "country", "currency", "sandbox_path", "live_path"],
+)
+
+
+class Market(_Market):
+    """OpenAPI market descriptor.
+
+    :param name: Market name, e.g. ``"tanzania"``.
+    :type name: str
+    :param code: Market code of the paths, e.g. ``"vodacomTZN"``.
+    :type code: str
+    :param country: ``input_Country`` of the market, e.g. ``"TZN"``.
+    :type country: str
+    :param currency: ``input_Currency`` of the market, e.g. ``"TZS"``.
+    :type currency: str
+    :param sandbox_path: Sandbox path prefix, defaults
+        ``"/sandbox/ipg/v2/<code>/"``.
+    :type sandbox_path: str, optional.
+    :param live_path: Live path prefix, defaults
+        ``"/openapi/ipg/v2/<code>/"``.
+    :type live_path: str, optional.
+    """
+
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        name: str,
+        code: str,
+        country: str,
+        currency: str,
+        sandbox_path: str = None,
+        live_path: str = None,
+    ):
+        """Construct."""
+        if sandbox_path is None:
+            sandbox_path = "/sandbox/ipg/v2/{}/".format(code)
+        if live_path is None:
+            live_path = "/openapi/ipg/v2/{}/".format(code)
+        return super().__new__(
+            cls, name, code, country, currency, sandbox_path, live_path)
+
+    def path(self, env: str) -> str:
+        """Return the path prefix of env."""
+        if env == "production":
+            return self.live_path
+        return self.sandbox_path
+
+
+MARKETS = {
+    market.name: market
+    for market in (
+        Market("tanzania", "vodacomTZN", "TZN", "TZS"),
+        Market("ghana", "vodafoneGHA", "GHA", "GHS"),
+        Market("lesotho", "vodacomLES", "LES", "LSL"),
+    )
+}
+"""OpenAPI markets by name."""
+
+
+class MarketAPI:
+    """OpenAPI Market API.
+
+    :param public_key: Public key from developers portal.
+    :type public_key: str.
+    :param api_key: API key from developers portal.
+    :type api_key: str.
+    :param env: Environment either ``"sandbox"`` or ``"production"``, defaults ``"sandbox"``.
+    :type env: str, optional.
+    :param transport: HTTP transport of every request, defaults to the
+        keep-alive transport shared per host and port.
+    :type transport: :class:`mpesa.portalsdk.Transport`, optional.
+    :param sessions: Cache of live SessionIDs, defaults to the shared
+        :data:`mpesa.portalsdk.SESSION_MANAGER`.
+    :type sessions: :class:`mpesa.portalsdk.SessionManager`, optional.
+    :param market: Market served, or its name in :data:`MARKETS`, defaults
+        to the ``market`` of the class.
+    :type market: :class:`Market` or str, optional.
+
+    **Attributes.**
+
+    .. attribute:: market
+
+        The :class:`Market` served.
+
+    .. attribute:: sandbox_path
+
+        The sandbox prefix path of the market. Assigning it overrides the
+        path for this instance only.
+
+    .. attribute:: live_path
+
+        The live/openapi prefix path of the market. Assigning it overrides
+        the path for this instance only.
+
+    .. attribute:: Currency
+
+        The Currency of the market.
+
+    .. attribute:: Country
+
+        The Country of the market.
+
+    **Methods.**
+
+
+    """
+
+    market = None
+
+    def __init__(
+        self,
+        public_key: str,
+        api_key: str,
+        env: str = "sandbox",
+        transport: Transport = None,
+        sessions: SessionManager = None,
+        market=None,
+    ):
+        """Initialize API.
+
+        **Arguments.**
+
+        :param public_key: Public key from developers portal.
+        :type public_key: str.
+        :param api_key: API key from developers portal.
+        :type api_key: str.
+        :param env: Environment either **sandbox** or **production**, defaults **sandbox**.
+        :type env: str, optional.
+        :param transport: HTTP transport of every request.
+        :type transport: :class:`mpesa.portalsdk.Transport`, optional.
+        :param sessions: Cache of live SessionIDs.
+        :type sessions: :class:`mpesa.portalsdk.SessionManager`, optional.
+        :param market: Market served.
+        :type market: :class:`Market` or str, optional.
+        """
+        if market is None:
+            market = self.market
+        elif isinstance(market, str):
+            market = MARKETS[market]
+        if market is None:
+            raise TypeError("market is required.")
+        self.market = market
+        self.public_key = public_key
+        self.api_key = api_key
+        self.env = env
+        self.transport = transport
+        if sessions is None:
+            sessions = SESSION_MANAGER
+        self.sessions = sessions
+        self._base = None
+        self._twin = None
+        self.Country = market.country
+        self.Currency = market.currency
+
+    def _pretty(self, body: dict) -> APIOutput:
+        """Return a dict of body with the output_ key prefix trimmed."""
+        return APIOutput(body)
+
+    def _base_context(self) -> APIContext:
+        """Return the frozen context every request derives from."""
+        base = self._base
+        if base is None or base.public_key != self.public_key:
+            base = APIContext(
+                public_key=self.public_key,
+                ssl=True,
+                address="openapi.m-pesa.com",
+                port=443,
+                headers={"Origin": "*"},
+            ).freeze()
+            self._base = base
+        return base
+
+    def _create_context(
+        self,
+        path: str,
+        method_type: APIMethodType,
+        api_key: str,
+        headers: dict = None,
+        params: dict = None,
+    ):
+        """Return APIContext derived from the base context."""
+        api_context = self._base_context().derive(
+            parameters=params,
+            api_key=api_key,
+            path=path,
+            method_type=method_type,
+        )
+        for k, v in (headers or {}).items():
+            api_context.add_header(k, v)
+        return api_context
+
+    def _execute(self, context: APIContext):
+        """Return result.body after makiing request with `context`.
+
+        :raises: ``Exception``.
+        :return: API Response body.
+        :rtype: ``APIResponse``.
+        """
+        api_request = APIRequest(context, transport=self.transport)
+        result = None
+        try:
+            result = api_request.execute()
+        except Exception as e:
+            raise e
+        if not result:
+            raise Exception("API Call Failed to get Result. Please Check.")
+        # print(result.body)  # , type(result.body))-->dict
+        return result.body
+
+    @property
+    def env(self) -> str:
+        """Return the environment, ``"sandbox"`` or ``"production"``."""
+        return self._env
+
+    @env.setter
+    def env(self, env: str):
+        self._env = env
+        self._prefix = self.market.path(env)
+
+    @property
+    def sandbox_path(self) -> str:
+        """Return the sandbox prefix path of the market."""
+        return self.market.sandbox_path
+
+    @sandbox_path.setter
+    def sandbox_path(self, path: str):
+        self._override_market(sandbox_path=path)
+
+    @property
+    def live_path(self) -> str:
+        """Return the live/openapi prefix path of the market."""
+        return self.market.live_path
+
+    @live_path.setter
+    def live_path(self, path: str):
+        self._override_market(live_path=path)
+
+    def _override_market(self, **paths):
+        """Serve a copy of ``self.market`` with paths, for this API only."""
+        self.market = self.market._replace(**paths)
+        self._prefix = self.market.path(self._env)
+        self._twin = None
+
+    def _path(self, endpoint: str) -> str:
+        """Return the full path of endpoint in ``self.env``."""
+        return self._prefix + endpoint
+
+    def _call(
+        self,
+        endpoint: str,
+        method_type: APIMethodType,
+        params: dict = None,
+        api_key: str = None,
+    ):
+        """Send a request to endpoint and return its trimmed output.
+
+        Every operation goes through this hook. Without api_key the live
+        session of ``self.sessions`` is used.
+        """
+        if api_key is None:
+            api_key = self.session_id
+        context = self._create_context(
+            self._path(endpoint),
+            method_type,
+            api_key=api_key,
+            params=params or {},
+        )
+        return self._pretty(self._execute(context))
+
+    @property
+    def _session_key(self) -> tuple:
+        """Return the key of the session in ``self.sessions``."""
+        return (self._path(""), self.api_key)
+
+    @property
+    def session_id(self) -> str:
+        """Return session_id.
+
+        The SessionID is shared with every API of the same market, env and
+        api_key, and is only returned once it is live.
+
+        :return: The sessionID to be used in subsequent requests.
+        :rtype: str.
+        """
+        return self.sessions.get(self._session_key, self._new_session_id)
+
+    def _ensure_session(self):
+        """Block until the session of ``self.sessions`` is live."""
+        self.sessions.get(self._session_key, self._new_session_id)
+
+    def _new_session_id(self) -> str:
+        """Return a new SessionID from ``getSession/``."""
+        return self._call(
+            "getSession/",
+            APIMethodType.GET,
+            api_key=self.api_key,
+        )["SessionID"]
+
+    def c2b(
+        self,
+        Amount: str,
+        CustomerMSISDN: str,
+        ServiceProviderCode: str,
+        ThirdPartyConversationID: str,
+        TransactionReference: str,
+        PurchasedItemsDesc: str,
+        **kwargs,
+    ):
+        """C2B Single Stage.
+
+        :param Amount: Amount.
+        :type Amount: str.
+        :param CustomerMSISDN: Customer MSISDN.
+        :type CustomerMSISDN: str.
+        :param ServiceProviderCode: Service Provider Code.
+        :type ServiceProviderCode: str.
+        :param ThirdPartyConversationID: Third Party Conversation ID.
+        :type ThirdPartyConversationID: str.
+        :param TransactionReference: Transaction Reference.
+        :type TransactionReference: str.
+        :param PurchasedItemsDesc: Purchased Items Description.
+        :type PurchasedItemsDesc: str.
+
+
+        :returns: A dictionary object from the C2B API.
+        :rtype: dict.
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ConversationID": "d3502e5958774f7ba228d83d0d689761",
+              "ResponseCode": "INS-0",
+              "ResponseDesc": "Request processed successfully",
+              "TransactionID": "49XCD123F6",
+              "ThirdPartyConversationID": "asv02e5958774f7ba228d83d0d689761"
+            }
+        """
+        method_type = APIMethodType.POST
+        endpoint = "c2bPayment/singleStage/"
+        params = {
+            "input_Amount": Amount,
+            "input_Country": self.Country,
+            "input_Currency": self.Currency,
+            "input_CustomerMSISDN": CustomerMSISDN,
+            "input_ServiceProviderCode": ServiceProviderCode,
+            "input_ThirdPartyConversationID": ThirdPartyConversationID,
+            "input_TransactionReference": TransactionReference,
+            "input_PurchasedItemsDesc": PurchasedItemsDesc,
+        }
+        return self._call(endpoint, method_type, params)
+
+    def _background_twin(self):
+        """Return the :class:`AsyncMarketAPI` run on the background loop."""
+        twin = self._twin
+        if twin is None:
+            transport = background_loop().transport_for(self.transport)
+            twin = AsyncMarketAPI(
+                self.public_key,
+                self.api_key,
+                self.env,
+                transport=transport,
+                sessions=_SyncSessions(self),
+                market=self.market,
+            )
+            self._twin = twin
+        return twin
+
+    def c2b_submit(self, *args, **kwargs):
+        """Submit a :meth:`c2b` without waiting for the customer.
+
+        Takes the arguments of :meth:`c2b`. The USSD push request is parked
+        on the process wide :class:`mpesa.portalsdk.BackgroundLoop` until the
+        customer answers, so pending collections hold no thread. Only the
+        first call of a session may wait, for the session to become live.
+        A blocking ``transport`` of the client is still used, see
+        :meth:`mpesa.portalsdk.BackgroundLoop.transport_for`, at the cost of
+        a thread per pending call.
+
+        :return: Future resolving to the :meth:`c2b` output.
+        :rtype: :class:`concurrent.futures.Future`
+
+        :Example:
+
+        .. code-block:: python
+
+            pending = [api.c2b_submit(**c2b) for c2b in collections]
+            for future in concurrent.futures.as_completed(pending):
+                print(future.result())
+        """
+        # Activate the session here, the twin then finds it live.
+        self._ensure_session()
+        twin = self._background_twin()
+        return background_loop().submit(twin.c2b(*args, **kwargs))
+
+    def b2c(
+        self,
+        Amount: str,
+        CustomerMSISDN: str,
+        ServiceProviderCode: str,
+        ThirdPartyConversationID: str,
+        TransactionReference: str,
+        PaymentItemsDesc: str,
+        **kwargs,
+    ):
+        """B2C Single Stage.
+
+        The B2C API Call is used as a standard business-to-customer funds disbursement.
+
+        Funds from the business account's wallet will be deducted and paid to the mobile money wallet of the customer.
+
+        Use cases for the B2C includes:
+
+        - Salary payments
+
+        - Funds transfers from business
+
+        - Charity pay-out
+
+        :param Amount: Amount.
+        :type Amount: str.
+        :param CustomerMSISDN: Customer MSISDN.
+        :type CustomerMSISDN: str.
+        :param ServiceProviderCode: Service Provider Code.
+        :type ServiceProviderCode: str.
+        :param ThirdPartyConversationID: Third Party Conversation ID.
+        :type ThirdPartyConversationID: str.
+        :param TransactionReference: Transaction Reference.
+        :type TransactionReference: str.
+        :param PaymentItemsDesc: Payment Items Description.
+        :type PaymentItemsDesc: str.
+
+        :returns: A dictionary object from the B2C API.
+        :rtype: dict.
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ConversationID": "d3502e5958774f7ba228d83d0d689761",
+              "ResponseCode": "INS-0",
+              "ResponseDesc": "Request processed successfully",
+              "TransactionID": "49XCD123F6",
+              "ThirdPartyConversationID": "asv02e5958774f7ba228d83d0d689761"
+            }
+        """
+        params = {
+            "input_Amount": Amount,
+            "input_Country": self.Country,
+            "input_Currency": self.Currency,
+            "input_CustomerMSISDN": CustomerMSISDN,
+            "input_ServiceProviderCode": ServiceProviderCode,
+            "input_ThirdPartyConversationID": ThirdPartyConversationID,
+            "input_TransactionReference": TransactionReference,
+            "input_PaymentItemsDesc": PaymentItemsDesc,
+        }
+        endpoint = "b2cPayment/"
+        method_type = APIMethodType.POST
+        return self._call(endpoint, method_type, params)
+
+    def b2b(
+        self,
+        Amount: str,
+        PrimaryPartyCode: str,
+        ReceiverPartyCode: str,
+        ThirdPartyConversationID: str,
+        TransactionReference: str,
+        PurchasedItemsDesc: str,
+        **kwargs,
+    ):
+        """B2B Single Stage.
+
+        The B2B API Call is used for business-to-business transactions.
+
+        Funds from the business' mobile money wallet will be deducted and transferred to the mobile money wallet of the other business.
+
+        Use cases for the B2B includes:
+
+        - Stock purchases
+
+        - Bill payment
+
+        - Adhoc payment
+
+        :param Amount: Amount.
+        :type Amount: str.
+        :param ReceiverPartyCode: Receiver Party Code.
+        :type ReceiverPartyCode: str.
+        :param PrimaryPartyCode: Primary Party Code.
+        :type PrimaryPartyCode: str.
+        :param ThirdPartyConversationID: Third Party Conversation ID.
+        :type ThirdPartyConversationID: str.
+        :param TransactionReference: Transaction Reference.
+        :type TransactionReference: str.
+        :param PurchasedItemsDesc: Purchased Items Description.
+        :type PurchasedItemsDesc: str.
+
+        :returns: A dictionary object from the B2B API.
+        :rtype: dict.
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ConversationID": "d3502e5958774f7ba228d83d0d689761",
+              "ResponseCode": "INS-0",
+              "ResponseDesc": "Request processed successfully",
+              "TransactionID": "49XCD123F6",
+              "ThirdPartyConversationID": "asv02e5958774f7ba228d83d0d689761"
+            }
+
+        """
+        endpoint = "b2bPayment/"
+        method_type = APIMethodType.POST
+        params = {
+            "input_Amount": Amount,
+            "input_Country": self.Country,
+            "input_Currency": self.Currency,
+            "input_PrimaryPartyCode": PrimaryPartyCode,
+            "input_ReceiverPartyCode": ReceiverPartyCode,
+            "input_ThirdPartyConversationID": ThirdPartyConversationID,
+            "input_TransactionReference": TransactionReference,
+            "input_PurchasedItemsDesc": PurchasedItemsDesc,
+        }
+        return self._call(endpoint, method_type, params)
+
+    def reverse(
+        self,
+        ReversalAmount: str,
+        ServiceProviderCode: str,
+        ThirdPartyConversationID: str,
+        TransactionID: str,
+        **kwargs,
+    ):
+        """Reversal API.
+
+        The Reversal API is used to reverse a successful transaction.
+        Using the Transaction ID of a previously successful transaction, the OpenAPI will withdraw the funds from the recipient party’s mobile money wallet and revert the funds to the mobile money wallet of the initiating party of the original transaction.
+
+        :param ReversalAmount: Reversal Amount.
+        :type ReversalAmount: str.
+        :param ServiceProviderCode: Service Provider Code.
+        :type ServiceProviderCode: str.
+        :param ThirdPartyConversationID: Third Party Conversation ID.
+        :type ThirdPartyConversationID: str.
+        :param TransactionID: Transaction ID.
+        :type TransactionID: str.
+
+        :returns: A dictionary object from the Reversal API.
+        :rtype: dict.
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ResponseCode": "INS-0",
+              "ResponseDesc": "Request processed successfully",
+              "TransactionID": "49XCD123F6",
+              "ConversationID": "d3502e5958774f7ba228d83d0d689761",
+              "ThirdPartyConversationID": "asv02e5958774f7ba228d83d0d689761"
+            }
+        """
+        endpoint = "reversal/"
+        method_type = APIMethodType.PUT
+        params = {
+            "input_Country": self.Country,
+            "input_ReversalAmount": ReversalAmount,
+            "input_ServiceProviderCode": ServiceProviderCode,
+            "input_ThirdPartyConversationID": ThirdPartyConversationID,
+            "input_TransactionID": TransactionID,
+        }
+        return self._call(endpoint, method_type, params)
+
+    def transaction_status(
+        self,
+        QueryReference: str,
+        ServiceProviderCode: str,
+        ThirdPartyConversationID: str,
+        **kwargs,
+    ):
+        """Query Transaction Status.
+
+        The Query Transaction Status API call is used to query the status of the transaction that has been initiated.
+
+        :param ServiceProviderCode: Service Provider Code.
+        :type ServiceProviderCode: str.
+        :param ThirdPartyConversationID: Third Party Conversation ID.
+        :type ThirdPartyConversationID: str.
+        :param QueryReference: Query Reference.
+        :type QueryReference: str.
+
+        :returns: A dictionary object from the QueryTransactionStatus API.
+        :rtype: dict.
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ConversationID": "d3502e5958774f7ba228d83d0d689761",
+              "ResponseCode": "INS-0",
+              "ResponseDesc": "Request processed successfully",
+              "ResponseTransactionStatus": "Completed",
+              "ThirdPartyConversationID": "asv02e5958774f7ba228d83d0d689761"
+            }
+        """
+        endpoint = "queryTransactionStatus/"
+        method_type = APIMethodType.GET
+        params = {
+            "input_QueryReference": QueryReference,
+            "input_ServiceProviderCode": ServiceProviderCode,
+            "input_ThirdPartyConversationID": ThirdPartyConversationID,
+            "input_Country": self.Country,
+        }
+        return self._call(endpoint, method_type, params)
+
+    def direct_debit_create(
+        self,
+        AgreedTC: str,
+        CustomerMSISDN: str,
+        ServiceProviderCode: str,
+        ThirdPartyConversationID: str,
+        ThirdPartyReference: str,
+        StartRangeOfDays: str,
+        EndRangeOfDays: str,
+        ExpiryDate: str,
+        FirstPaymentDate: str,
+        Frequency: str,
+        **kwargs,
+    ):
+        """Direct Debit Create API.
+
+        Direct Debits are payments in M-Pesa that are initiated by the Payee alone without any Payer interaction, but permission must first be granted by the Payer.
+
+        The granted permission from the Payer to Payee is commonly termed a ‘Mandate’, and M-Pesa must hold details of this Mandate.
+
+        The Direct Debit API set allows an organisation to get the initial consent of their customers to create the Mandate that allows the organisation to debit customer's account at an agreed frequency and amount for services rendered.
+
+        After the initial consent, the debit of the account will not involve any customer interaction.
+
+        The Direct Debit feature makes use of the following API calls:
+
+        - Create a Direct Debit mandate
+
+        - Pay a mandate
+
+        The customer is able to view and cancel the Direct Debit mandate from G2 menu accessible via USSD menu or the Smartphone Application.
+
+        :param AgreedTC: The customer agreed to the terms and conditions.
+            Can only use 1 or 0.
+        :type AgreedTC: str.
+        :param CustomerMSISDN: Customer MSISDN.
+        :type CustomerMSISDN: str.
+        :param ServiceProviderCode: Service Provider Code.
+        :type ServiceProviderCode: str.
+        :param ThirdPartyConversationID: Third Party Conversation ID.
+        :type ThirdPartyConversationID: str.
+        :param ThirdPartyReference: Third Party Reference.
+        :type ThirdPartyReference: str.
+        :param StartRangeOfDays: The start range of days in the month.
+        :type StartRangeOfDays: str, optional.
+        :param EndRangeOfDays: The end range of days in the month.
+        :type EndRangeOfDays: str, optional.
+        :param ExpiryDate: The expiry date of the Mandate.
+        :type ExpiryDate: str, optional.
+        :param FirstPaymentDate: The Start date of the Mandate.
+        :type FirstPaymentDate: str, optional.
+        :param Frequency: The frequency of the payments.
+        :type Frequency: str, optional.
+
+        .. csv-table:: List of Possible Frequency Values.
+            :header: "Frequency", "Description"
+            :widths: 12, 25
+
+                "01", "Once off"
+                "02", "Daily"
+                "03", "Weekly"
+                "04", "Monthly"
+                "05", "Quarterly"
+                "06", "Half Yearly"
+                "07", "Yearly"
+                "08", "On Demand"
+
+        :returns: A dictionary object from the DirectDebitCreation API.
+        :rtype: dict.
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ResponseCode": "INS-0",
+              "ResponseDesc": "Request processed successfully",
+              "TransactionReference": "vgisfyn4b22w6tmqjftatq75lyuie6vc",
+              "ConversationID": "51a1d9191acc4674ab1dfd321a24ba20",
+              "ThirdPartyConversationID": "AAA6d1f9391a0052de0b5334a912jbsj1j2kk"
+            }
+        """
+        endpoint = "directDebitCreation/"
+        method_type = APIMethodType.POST
+        params = {
+            "input_AgreedTC": AgreedTC,
+            "input_Country": self.Country,
+            "input_CustomerMSISDN": CustomerMSISDN,
+            "input_EndRangeOfDays": EndRangeOfDays,
+            "input_ExpiryDate": ExpiryDate,
+            "input_FirstPaymentDate": FirstPaymentDate,
+            "input_Frequency": Frequency,
+            "input_ServiceProviderCode": ServiceProviderCode,
+            "input_StartRangeOfDays": StartRangeOfDays,
+            "input_ThirdPartyConversationID": ThirdPartyConversationID,
+            "input_ThirdPartyReference": ThirdPartyReference,
+        }
+        return self._call(endpoint, method_type, params)
+
+    def direct_debit_payment(
+        self,
+        Amount: str,
+        CustomerMSISDN: str,
+        ServiceProviderCode: str,
+        ThirdPartyConversationID: str,
+        ThirdPartyReference: str,
+        **kwargs,
+    ):
+        """Direct Debit Payment.
+
+        The Direct Debit API set allows an organisation to get the initial consent of their customers to create the Mandate that allows the organisation to debit customer's account at an agreed frequency and amount for services rendered.
+
+        After the initial consent, the debit of the account will not involve any customer interaction.
+
+        The Direct Debit feature makes use of the following API calls:
+
+        - Create a Direct Debit mandate
+
+        - Pay a mandate
+
+        The customer is able to view and cancel the Direct Debit mandate from G2 menu accessible via USSD menu or the Smartphone Application.
+
+        :param Amount: Amount.
+        :type Amount: str.
+        :param CustomerMSISDN: Customer MSISDN.
+        :type CustomerMSISDN: str.
+        :param ServiceProviderCode: Service Provider Code.
+        :type ServiceProviderCode: str.
+        :param ThirdPartyConversationID: Third Party Conversation ID.
+        :type ThirdPartyConversationID: str.
+        :param ThirdPartyReference: Third Party Reference.
+        :type ThirdPartyReference: str.
+
+        :returns: A dictionary object from the DirectDebitPayment API.
+        :rtype: dict.
+
+        :Example:
+
+        .. code-block:: json
+
+            {
+              "ResponseCode": "INS-0",
+              "ResponseDesc": "Request processed successfully",
+              "TransactionReference": "vgisfyn4b22w6tmqjftatq75lyuie6vc",
+              "ConversationID": "51a1d9191acc4674ab1dfd321a24ba20",
+              "ThirdPartyConversationID": "AAA6d1f9391a0052de0b5334a912jbsj1j2kk"
+
+            }
+
+        """
+        endpoint = "directDebitPayment/"
+        method_type = APIMethodType.POST
+        params = {
+            "input_Amount": Amount,
+            "input_Country": self.Country,
+            "input_Currency": self.Currency,
+            "input_CustomerMSISDN": CustomerMSISDN,
+            "input_ServiceProviderCode": ServiceProviderCode,
+            "input_ThirdPartyConversationID": ThirdPartyConversationID,
+            "input_ThirdPartyReference": ThirdPartyReference,
+        }
+        return self._call(endpoint, method_type, params)
+
+    def _b2c_payout(self, payout: dict):
+        """Return :meth:`b2c` of a :meth:`b2c_batch` payout."""
+        return self.b2c(**payout)
+
+    def b2c_batch(self, payouts, concurrency: int = 8, checkpoint=None):
+        """Disburse many B2C payouts with bounded concurrency.
+
+        Payouts are pulled lazily from ``payouts`` and at most
+        ``concurrency`` :meth:`b2c` calls are in flight at once, all under
+        the shared live session of ``self.sessions``. Each result is yielded
+        as soon as its call finishes.
+
+        Accepted payouts (``ResponseCode`` ``"INS-0"``) are recorded in
+        ``checkpoint`` so rerunning the same batch after a crash skips them.
+        Rejected payouts are cleared and sent again by a rerun. Calls that
+        raised, e.g. timed out, may still have been processed: they stay in
+        ``checkpoint.unknown`` and are skipped until their
+        :meth:`transaction_status` is checked and settled with
+        :meth:`mpesa.batch.Checkpoint.reconcile`.
+
+        :param payouts: Iterable of dicts of :meth:`b2c` keyword arguments,
+            whose ``ThirdPartyConversationID`` uniquely identifies the payout
+            within the batch.
+        :type payouts: iterable
+        :param concurrency: Maximum calls in flight, defaults ``8``.
+        :type concurrency: int
+        :param checkpoint: Checkpoint of completed
+            ``ThirdPartyConversationID`` values or the path of its file.
+        :type checkpoint: :class:`mpesa.batch.Checkpoint` or str, optional.
+
+        :return: Iterator of :class:`mpesa.batch.BatchResult` keyed by
+            ``ThirdPartyConversationID`` in completion order.
+
+        :Example:
+
+        .. code-block:: python
+
+            payouts = (
+                {
+                    "Amount": row["amount"],
+                    "CustomerMSISDN": row["msisdn"],
+                    "ServiceProviderCode": "000000",
+                    "ThirdPartyConversationID": row["id"],
+                    "TransactionReference": "Payroll",
+                    "PaymentItemsDesc": "Salary",
+                }
+                for row in csv.DictReader(open("payroll.csv"))
+            )
+            for result in api.b2c_batch(payouts, 32, "payroll.done"):
+                print(result.key, result.error or result.response)
+        """
+        return run_batch(
+            self._b2c_payout,
+            payouts,
+            key=_payout_key,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            succeeded=_accepted,
+        )
+
+
+class AsyncMarketAPI(MarketAPI):
+    """Asyncio twin of :class:`MarketAPI`.
+
+    Exposes the same operations with the same arguments, but each call
+    returns an awaitable resolving to the trimmed output, and so does
+    ``session_id``. Requests share the non-blocking pool of
+    :func:`mpesa.portalsdk.shared_async_transport`, so one event loop can
+    hold many USSD push calls open at once.
+
+    :param public_key: Public key from developers portal.
+    :type public_key: str.
+    :param api_key: API key from developers portal.
+    :type api_key: str.
+    :param env: Environment either ``"sandbox"`` or ``"production"``, defaults ``"sandbox"``.
+    :type env: str, optional.
+    :param transport: Non-blocking HTTP transport, defaults to the shared
+        async pool.
+    :type transport: :class:`mpesa.portalsdk.AsyncTransport`, optional.
+    :param sessions: Cache of live SessionIDs, defaults to the shared
+        :data:`mpesa.portalsdk.ASYNC_SESSION_MANAGER`.
+    :type sessions: :class:`mpesa.portalsdk.AsyncSessionManager`, optional.
+    :param market: Market served, defaults to the ``market`` of the class.
+    :type market: :class:`Market` or str, optional.
+
+    :Example:
+
+    .. code-block:: python
+
+        api = AsyncMarketAPI(public_key, api_key, market="tanzania")
+        output = await api.c2b(Amount="10", CustomerMSISDN=msisdn, ...)
+    """
+
+    def __init__(
+        self,
+        public_key: str,
+        api_key: str,
+        env: str = "sandbox",
+        transport=None,
+        sessions: AsyncSessionManager = None,
+        market=None,
+    ):
+        """Construct."""
+        if sessions is None:
+            sessions = ASYNC_SESSION_MANAGER
+        super().__init__(
+            public_key,
+            api_key,
+            env,
+            transport=transport,
+            sessions=sessions,
+            market=market,
+        )
+
+    async def _execute(self, context: APIContext):
+        """Return result.body after making the request without blocking."""
+        api_request = APIRequest(context, transport=self.transport)
+        result = await api_request.execute_async()
+        if not result:
+            raise Exception("API Call Failed to get Result. Please Check.")
+        return result.body
+
+    async def _call(
+        self,
+        endpoint: str,
+        method_type: APIMethodType,
+        params: dict = None,
+        api_key: str = None,
+    ):
+        """Send a request to endpoint, see :meth:`MarketAPI._call`."""
+        if api_key is None:
+            api_key = await self.session_id
+        context = self._create_context(
+            self._path(endpoint),
+            method_type,
+            api_key=api_key,
+            params=params or {},
+        )
+        return self._pretty(await self._execute(context))
+
+    @property
+    def session_id(self):
+        """Return an awaitable of the live session_id."""
+        return self.sessions.get(self._session_key, self._new_session_id)
+
+    async def _new_session_id(self) -> str:
+        """Return a new SessionID from ``getSession/``."""
+        output = await self._call(
+            "getSession/",
+            APIMethodType.GET,
+            api_key=self.api_key,
+        )
+        return output["SessionID"]
+
+    def c2b_submit(self, *args, **kwargs):
+        """Schedule a :meth:`c2b` on the running loop and return its task.
+
+        :rtype: :class:`asyncio.Task`
+        """
+        return asyncio.ensure_future(self.c2b(*args, **kwargs))
+
+    def b2c_batch(self, payouts, concurrency: int = 8, checkpoint=None):
+        """Disburse many B2C payouts, see :meth:`MarketAPI.b2c_batch`.
+
+        :return: Async iterator of :class:`mpesa.batch.BatchResult`.
+        """
+        return run_batch_async(
+            self._b2c_payout,
+            payouts,
+            key=_payout_key,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            succeeded=_accepted,
+        )
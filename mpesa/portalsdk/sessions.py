@@ -0,0 +1,563 @@
+"""Mpesa PortalSDK Session Cache.
+
+The OpenAPI markets, :mod:`mpesa.tanzania` and :mod:`mpesa.ghana`, authorize
+operations with a SessionID obtained from ``getSession/``. A new SessionID
+takes up to 30 seconds to become live, so the SessionID is cached together
+with the time it becomes live. Callers only wait for what is left of the
+activation, once per session, and the session is reused until it expires.
+Shortly before expiry a replacement is fetched in the background and swapped
+in only once it is live.
+
+:class:`SessionPool` goes further and keeps several sessions per key warm
+from a background worker, independently of traffic, so that requests never
+wait for an activation after the first session of a key is live.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import namedtuple
+
+__all__ = [
+    "AsyncSessionManager",
+    "ASYNC_SESSION_MANAGER",
+    "AsyncSessionPool",
+    "SessionManager",
+    "SESSION_MANAGER",
+    "SessionPool",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+_Session = namedtuple(
+    "_Session", ["session_id", "live_at", "refresh_at", "expires_at"])
+
+
+class _Slot:
+    """Cached session and the single-flight lock guarding its refresh."""
+
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = None
+        self.lock = threading.Lock()
+
+
+class SessionManager:
+    """Thread-safe cache of portal SessionIDs.
+
+    Sessions are keyed by the market path and api key, see
+    :meth:`mpesa.tanzania.API.session_id`.
+
+    :param activation: Seconds a new SessionID needs to become live,
+        defaults ``30``.
+    :type activation: float
+    :param lifetime: Seconds a SessionID is used after it was issued,
+        defaults ``3600``.
+    :type lifetime: float
+    :param refresh_margin: Seconds before expiry at which a replacement is
+        fetched in the background, defaults ``300``. Must exceed activation
+        for the replacement to be live in time.
+    :type refresh_margin: float
+    """
+
+    def __init__(
+        self,
+        activation: float = 30.0,
+        lifetime: float = 3600.0,
+        refresh_margin: float = 300.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        """Construct."""
+        self.activation = activation
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._sleep = sleep
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, key) -> _Slot:
+        """Return the slot for key, creating it if missing."""
+        slot = self._slots.get(key)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.setdefault(key, _Slot())
+        return slot
+
+    def _issue(self, session_id: str) -> _Session:
+        """Return the cache entry of a SessionID issued now."""
+        issued = self._clock()
+        return _Session(
+            session_id,
+            issued + self.activation,
+            issued + max(self.lifetime - self.refresh_margin, 0.0),
+            issued + self.lifetime,
+        )
+
+    def _refresh(self, slot: _Slot, fetch):
+        """Swap in a new session once live, releasing the slot lock."""
+        try:
+            value = self._issue(fetch())
+            self._sleep(max(value.live_at - self._clock(), 0.0))
+            slot.value = value
+        except Exception:
+            LOGGER.warning("Background session refresh failed.",
+                           exc_info=True)
+        finally:
+            slot.lock.release()
+
+    def get(self, key, fetch) -> str:
+        """Return a live SessionID for key.
+
+        Waits for the remaining activation time of a session that is not
+        live yet.
+
+        :param key: Cache key, usually ``(path, api_key)``.
+        :type key: tuple
+        :param fetch: Callable returning a new SessionID. Called at most once
+            at a time per key.
+        :type fetch: callable
+        :return: `SessionID`.
+        :rtype: str
+        """
+        slot = self._slot(key)
+        value = slot.value
+        now = self._clock()
+        if value is None or now >= value.expires_at:
+            with slot.lock:
+                value = slot.value
+                if value is None or self._clock() >= value.expires_at:
+                    value = slot.value = self._issue(fetch())
+            now = self._clock()
+        elif now >= value.refresh_at and slot.lock.acquire(blocking=False):
+            threading.Thread(
+                target=self._refresh,
+                args=(slot, fetch),
+                name="mpesa-session-refresh",
+                daemon=True,
+            ).start()
+        if now < value.live_at:
+            self._sleep(value.live_at - now)
+        return value.session_id
+
+    def invalidate(self, key):
+        """Drop the cached session for key so the next call fetches anew."""
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot.value = None
+
+    def clear(self):
+        """Drop every cached session."""
+        with self._lock:
+            self._slots.clear()
+
+
+SESSION_MANAGER = SessionManager()
+"""Process wide :class:`SessionManager` of the portal market APIs."""
+
+
+class _AsyncSlot:
+    """Cached session and, per event loop, the lock and task refreshing it."""
+
+    __slots__ = ("value", "locks", "refreshes")
+
+    def __init__(self):
+        self.value = None
+        self.locks = {}
+        self.refreshes = {}
+
+
+class AsyncSessionManager(SessionManager):
+    """Asyncio flavour of :class:`SessionManager`.
+
+    ``fetch`` is a coroutine function returning a new SessionID, waits use
+    ``asyncio.sleep`` and refreshes run as tasks on the calling event loop.
+    Sessions are shared by every loop while the locks and refresh tasks
+    belong to the loop that created them, so the manager may serve
+    successive ``asyncio.run`` calls or several loops.
+    """
+
+    def __init__(
+        self,
+        activation: float = 30.0,
+        lifetime: float = 3600.0,
+        refresh_margin: float = 300.0,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+    ):
+        """Construct."""
+        super().__init__(
+            activation, lifetime, refresh_margin, clock=clock, sleep=sleep)
+
+    def _slot(self, key) -> _AsyncSlot:
+        """Return the slot for key, creating it if missing."""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots.setdefault(key, _AsyncSlot())
+        return slot
+
+    @staticmethod
+    def _loop_lock(slot: _AsyncSlot) -> tuple:
+        """Return ``(loop, lock)`` of slot for the running event loop."""
+        loop = asyncio.get_event_loop()
+        lock = slot.locks.get(loop)
+        if lock is None:
+            for stale in [k for k in slot.locks if k.is_closed()]:
+                del slot.locks[stale]
+                slot.refreshes.pop(stale, None)
+            lock = slot.locks[loop] = asyncio.Lock()
+        return loop, lock
+
+    async def _refresh(self, slot: _AsyncSlot, loop, lock, fetch):
+        """Swap in a new session once live."""
+        try:
+            async with lock:
+                value = self._issue(await fetch())
+                await self._sleep(max(value.live_at - self._clock(), 0.0))
+                slot.value = value
+        except Exception:
+            LOGGER.warning("Background session refresh failed.",
+                           exc_info=True)
+        finally:
+            slot.refreshes.pop(loop, None)
+
+    async def get(self, key, fetch) -> str:
+        """Return a live SessionID for key.
+
+        :param key: Cache key, usually ``(path, api_key)``.
+        :type key: tuple
+        :param fetch: Coroutine function returning a new SessionID.
+        :type fetch: callable
+        :return: `SessionID`.
+        :rtype: str
+        """
+        slot = self._slot(key)
+        value = slot.value
+        now = self._clock()
+        if value is None or now >= value.expires_at:
+            lock = self._loop_lock(slot)[1]
+            async with lock:
+                value = slot.value
+                if value is None or self._clock() >= value.expires_at:
+                    value = slot.value = self._issue(await fetch())
+            now = self._clock()
+        elif now >= value.refresh_at:
+            loop, lock = self._loop_lock(slot)
+            if loop not in slot.refreshes:
+                slot.refreshes[loop] = asyncio.ensure_future(
+                    self._refresh(slot, loop, lock, fetch))
+        if now < value.live_at:
+            await self._sleep(value.live_at - now)
+        return value.session_id
+
+    def clear(self):
+        """Drop every cached session."""
+        self._slots.clear()
+
+
+ASYNC_SESSION_MANAGER = AsyncSessionManager()
+"""Process wide :class:`AsyncSessionManager` of the portal AsyncAPIs."""
+
+
+class _Warm:
+    """Sessions of a key and the worker keeping them warm."""
+
+    __slots__ = ("sessions", "error", "worker", "turn", "changed", "refill")
+
+    def __init__(self, changed):
+        self.sessions = ()
+        self.error = None
+        self.worker = None
+        self.turn = itertools.count()
+        self.changed = changed
+        self.refill = False
+
+
+def _plan(pool, sessions: tuple, now: float) -> tuple:
+    """Return ``(kept sessions, sessions to fetch, seconds to next check)``.
+
+    Sessions are kept until they expire, and replaced as soon as they enter
+    their refresh window so the replacement is live before they expire.
+    """
+    kept = tuple(s for s in sessions if s.expires_at > now)
+    fresh = sum(1 for s in kept if s.refresh_at > now)
+    times = [t for s in kept for t in (s.live_at, s.refresh_at) if t > now]
+    wake = min(times) - now if times else pool.activation
+    return kept, max(pool.size - fresh, 0), wake
+
+
+def _pick(slot: _Warm, now: float):
+    """Return a live session of slot, round robin, ``None`` if none."""
+    live = [s for s in slot.sessions if s.live_at <= now < s.expires_at]
+    if not live:
+        return None
+    return live[next(slot.turn) % len(live)]
+
+
+class SessionPool(SessionManager):
+    """Keep ``size`` live sessions per key, warmed in the background.
+
+    The first :meth:`get` of a key starts a daemon thread that issues
+    ``size`` sessions through fetch and replaces each one when it enters its
+    refresh window. Requests are spread over the live sessions and only the
+    very first ones of a key wait for an activation.
+
+    :param size: Sessions kept per key, defaults ``2``.
+    :type size: int
+    :param activation: Seconds a new SessionID needs to become live,
+        defaults ``30``.
+    :type activation: float
+    :param lifetime: Seconds a SessionID is used after it was issued,
+        defaults ``3600``.
+    :type lifetime: float
+    :param refresh_margin: Seconds before expiry at which a session is
+        replaced, defaults ``300``. Must exceed activation.
+    :type refresh_margin: float
+
+    :Example:
+
+    .. code-block:: python
+
+        pool = SessionPool(size=4)
+        api = tanzania.API(public_key, api_key, sessions=pool)
+        pool.warm(api._session_key, api._new_session_id)
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        activation: float = 30.0,
+        lifetime: float = 3600.0,
+        refresh_margin: float = 300.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        """Construct."""
+        super().__init__(
+            activation, lifetime, refresh_margin, clock=clock, sleep=sleep)
+        self.size = size
+        self._stopped = threading.Event()
+
+    def _slot(self, key) -> _Warm:
+        """Return the warm slot for key, creating it if missing."""
+        slot = self._slots.get(key)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.setdefault(
+                    key, _Warm(threading.Condition()))
+        return slot
+
+    def warm(self, key, fetch) -> _Warm:
+        """Start keeping sessions of key warm, if not done already.
+
+        :param key: Cache key, usually ``(path, api_key)``.
+        :type key: tuple
+        :param fetch: Callable returning a new SessionID.
+        :type fetch: callable
+        """
+        slot = self._slot(key)
+        if slot.worker is None:
+            with self._lock:
+                if slot.worker is None:
+                    slot.worker = threading.Thread(
+                        target=self._work,
+                        args=(slot, fetch),
+                        name="mpesa-session-warmer",
+                        daemon=True,
+                    )
+                    slot.worker.start()
+        return slot
+
+    def _work(self, slot: _Warm, fetch):
+        """Keep slot filled with sessions until the pool is closed."""
+        while not self._stopped.is_set():
+            kept, missing, wake = _plan(self, slot.sessions, self._clock())
+            slot.sessions = kept
+            for _ in range(missing):
+                try:
+                    session = self._issue(fetch())
+                except Exception as e:
+                    LOGGER.warning("Session warm up failed.", exc_info=True)
+                    slot.error = e
+                    wake = self.activation
+                    break
+                else:
+                    slot.error = None
+                    slot.sessions = slot.sessions + (session,)
+                finally:
+                    with slot.changed:
+                        slot.changed.notify_all()
+            else:
+                if missing:
+                    continue
+            with slot.changed:
+                if not slot.refill and not self._stopped.is_set():
+                    slot.changed.wait(wake)
+                slot.refill = False
+
+    def get(self, key, fetch) -> str:
+        """Return a live SessionID for key, see :meth:`SessionManager.get`.
+
+        Waits for a session that is still activating, and otherwise wakes
+        the worker of key to issue one, e.g. when every session expired.
+
+        :raises: the last fetch error while no session of key is usable.
+        """
+        slot = self.warm(key, fetch)
+        session = _pick(slot, self._clock())
+        while session is None:
+            now = self._clock()
+            pending = [s.live_at for s in slot.sessions if s.live_at > now]
+            if pending:
+                self._sleep(min(pending) - now)
+            else:
+                with slot.changed:
+                    if slot.error is not None:
+                        raise slot.error
+                    if _pick(slot, self._clock()) is None:
+                        slot.refill = True
+                        slot.changed.notify_all()
+                        slot.changed.wait(self.activation)
+            session = _pick(slot, self._clock())
+        return session.session_id
+
+    def invalidate(self, key):
+        """Drop the sessions of key, the worker issues new ones."""
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot.sessions = ()
+
+    def close(self):
+        """Stop every worker."""
+        self._stopped.set()
+        for slot in list(self._slots.values()):
+            with slot.changed:
+                slot.changed.notify_all()
+
+
+def _pulse(event: asyncio.Event):
+    """Wake the current waiters of event."""
+    event.set()
+    event.clear()
+
+
+class AsyncSessionPool(AsyncSessionManager):
+    """Asyncio flavour of :class:`SessionPool`.
+
+    ``fetch`` is a coroutine function and the worker of each key runs as a
+    task on the event loop of the first :meth:`get` of the key. Sessions are
+    shared by every loop, and the worker is restarted on the calling loop
+    once its own loop is closed.
+
+    :param size: Sessions kept per key, defaults ``2``.
+    :type size: int
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        activation: float = 30.0,
+        lifetime: float = 3600.0,
+        refresh_margin: float = 300.0,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+    ):
+        """Construct."""
+        super().__init__(
+            activation, lifetime, refresh_margin, clock=clock, sleep=sleep)
+        self.size = size
+
+    def _slot(self, key) -> _Warm:
+        """Return the warm slot for key, creating it if missing."""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots.setdefault(key, _Warm({}))
+        return slot
+
+    def warm(self, key, fetch) -> _Warm:
+        """Start keeping sessions of key warm, see :meth:`SessionPool.warm`.
+
+        Must be called from the event loop the sessions are used on.
+        """
+        slot = self._slot(key)
+        worker = slot.worker
+        if (worker is None or worker.done()
+                or worker.get_loop().is_closed()):
+            slot.worker = asyncio.ensure_future(self._work(slot, fetch))
+        return slot
+
+    @staticmethod
+    def _changed(slot: _Warm) -> asyncio.Event:
+        """Return the event of slot waking waiters of the running loop."""
+        loop = asyncio.get_event_loop()
+        event = slot.changed.get(loop)
+        if event is None:
+            for stale in [k for k in slot.changed if k.is_closed()]:
+                del slot.changed[stale]
+            event = slot.changed[loop] = asyncio.Event()
+        return event
+
+    @staticmethod
+    def _notify(slot: _Warm):
+        """Wake the waiters of slot on every loop."""
+        for loop, event in list(slot.changed.items()):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_pulse, event)
+
+    async def _work(self, slot: _Warm, fetch):
+        """Keep slot filled with sessions until cancelled."""
+        while True:
+            kept, missing, wake = _plan(self, slot.sessions, self._clock())
+            slot.sessions = kept
+            for _ in range(missing):
+                try:
+                    session = self._issue(await fetch())
+                except Exception as e:
+                    LOGGER.warning("Session warm up failed.", exc_info=True)
+                    slot.error = e
+                    wake = self.activation
+                    break
+                else:
+                    slot.error = None
+                    slot.sessions = slot.sessions + (session,)
+                finally:
+                    self._notify(slot)
+            else:
+                if missing:
+                    continue
+            await self._sleep(wake)
+
+    async def get(self, key, fetch) -> str:
+        """Return a live SessionID for key, see :meth:`SessionPool.get`."""
+        slot = self.warm(key, fetch)
+        session = _pick(slot, self._clock())
+        while session is None:
+            now = self._clock()
+            pending = [s.live_at for s in slot.sessions if s.live_at > now]
+            if pending:
+                await self._sleep(min(pending) - now)
+            elif slot.error is not None:
+                raise slot.error
+            else:
+                try:
+                    await asyncio.wait_for(
+                        self._changed(slot).wait(), self.activation)
+                except asyncio.TimeoutError:
+                    pass
+            session = _pick(slot, self._clock())
+        return session.session_id
+
+    def invalidate(self, key):
+        """Drop the sessions of key, the worker issues new ones."""
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot.sessions = ()
+
+    def close(self):
+        """Cancel every worker."""
+        for slot in self._slots.values():
+            if slot.worker is not None:
+                slot.worker.cancel()
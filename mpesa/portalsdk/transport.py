@@ -0,0 +1,410 @@
+"""Mpesa PortalSDK HTTP Transports.
+
+:class:`mpesa.portalsdk.APIRequest` hands the prepared request to a
+:class:`Transport` and turns the :class:`TransportResponse` it returns into an
+:class:`mpesa.portalsdk.APIResponse`. By default requests go through a
+keep-alive :class:`PooledTransport` shared by every request to the same host
+and port, see :func:`shared_transport`, and
+:meth:`mpesa.portalsdk.APIRequest.execute_async` goes through the
+non-blocking :class:`AsyncPooledTransport` returned by
+:func:`shared_async_transport`.
+"""
+import asyncio
+import functools
+import json as _json
+import threading
+from collections import namedtuple
+from time import perf_counter
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+__all__ = [
+    "AsyncInMemoryTransport",
+    "AsyncPooledTransport",
+    "AsyncTransport",
+    "ExecutorTransport",
+    "InMemoryTransport",
+    "PooledTransport",
+    "Transport",
+    "TransportResponse",
+    "shared_async_transport",
+    "shared_transport",
+]
+
+TransportResponse = namedtuple(
+    "TransportResponse", ["status_code", "headers", "content"])
+TransportResponse.__doc__ = """Raw HTTP response returned by a transport.
+
+``headers`` is a case insensitive mapping and ``content`` the undecoded body
+bytes.
+"""
+
+
+class Transport:
+    """Interface of the HTTP layer used by APIRequest."""
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        params: dict = None,
+        json: dict = None,
+        timings=None,
+    ) -> TransportResponse:
+        """Send a request and return its :class:`TransportResponse`.
+
+        :param method: ``"GET"``, ``"POST"`` or ``"PUT"``.
+        :type method: str
+        :param url: Full request url.
+        :type url: str
+        :param headers: Request headers.
+        :type headers: dict
+        :param params: Query string parameters, defaults ``None``.
+        :type params: dict, optional.
+        :param json: JSON body, defaults ``None``.
+        :type json: dict, optional.
+        :param timings: Record the ``serialize``, ``wait`` and
+            ``transfer`` phases on it when given, defaults ``None``.
+        :type timings: :class:`mpesa.portalsdk.PhaseTimings`, optional.
+        :rtype: :class:`TransportResponse`
+        """
+        raise NotImplementedError
+
+    def connect(self, url: str):
+        """Open a connection to the host and port of url ahead of use.
+
+        Does nothing unless the transport keeps connections alive.
+        """
+
+    def close(self):
+        """Release the resources held by the transport."""
+
+
+class PooledTransport(Transport):
+    """Transport over a keep-alive ``requests.Session``.
+
+    :param pool_maxsize: Maximum connections kept alive per host and port,
+        defaults ``10``.
+    :type pool_maxsize: int
+    :param pool_block: Block when every connection is busy instead of
+        opening a throwaway one, defaults ``False``.
+    :type pool_block: bool
+    :param pool_connections: Number of host and port pools kept, defaults
+        ``10``.
+    :type pool_connections: int
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        pool_connections: int = 10,
+    ):
+        """Construct."""
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def send(self, method, url, headers, params=None, json=None,
+             timings=None):
+        """Send a request over the pooled session.
+
+        When timed, the steps of ``session.request(..., stream=True)`` are
+        run one by one so the phases can be told apart: the request is
+        prepared, the environment settings merged and it is sent, then the
+        body is read. Nothing else differs from the untimed path.
+        """
+        if timings is None:
+            r = self.session.request(
+                method, url, headers=headers, params=params, json=json)
+            return TransportResponse(r.status_code, r.headers, r.content)
+        session = self.session
+        start = perf_counter()
+        prepared = session.prepare_request(requests.Request(
+            method, url, headers=headers, params=params, json=json))
+        settings = session.merge_environment_settings(
+            prepared.url, {}, True, None, None)
+        sent = perf_counter()
+        r = session.send(prepared, allow_redirects=True, **settings)
+        received = perf_counter()
+        content = r.content
+        timings.serialize = sent - start
+        timings.wait = received - sent
+        timings.transfer = perf_counter() - received
+        return TransportResponse(r.status_code, r.headers, content)
+
+    def connect(self, url: str):
+        """Open a verified connection to url and return it to the pool."""
+        verify = self.session.merge_environment_settings(
+            url, {}, None, self.session.verify, None)["verify"]
+        if hasattr(self.adapter, "get_connection_with_tls_context"):
+            pool = self.adapter.get_connection_with_tls_context(
+                requests.Request("GET", url).prepare(), verify)
+        else:  # requests < 2.32.2
+            pool = self.adapter.get_connection(url)
+            self.adapter.cert_verify(pool, url, verify, None)
+        conn = pool._get_conn()
+        try:
+            conn.connect()
+        except Exception:
+            conn.close()
+            raise
+        finally:
+            pool._put_conn(conn)
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+
+class InMemoryTransport(Transport):
+    """Transport answering from memory, for tests and benchmarks.
+
+    :param handler: Callable invoked as ``handler(method, url, headers,
+        params, json)`` returning a :class:`TransportResponse` or a
+        ``(status_code, headers, content)`` tuple. Every request is answered
+        with ``status_code``, ``headers`` and ``content`` when ``None``,
+        defaults ``None``.
+    :type handler: callable, optional.
+    :param status_code: Canned status code, defaults ``200``.
+    :type status_code: int
+    :param headers: Canned headers, defaults ``None``.
+    :type headers: dict, optional.
+    :param content: Canned body bytes, defaults ``b"{}"``.
+    :type content: bytes
+
+    .. attribute:: requests
+
+        Number of requests sent.
+
+    .. attribute:: last_request
+
+        ``(method, url, headers, params, json)`` of the latest request.
+    """
+
+    def __init__(
+        self,
+        handler=None,
+        status_code: int = 200,
+        headers: dict = None,
+        content: bytes = b"{}",
+    ):
+        """Construct."""
+        self.handler = handler
+        self.response = TransportResponse(
+            status_code, dict(headers or {}), content)
+        self.requests = 0
+        self.last_request = None
+
+    def send(self, method, url, headers, params=None, json=None,
+             timings=None):
+        """Return the canned or handler response."""
+        self.requests += 1
+        self.last_request = (method, url, headers, params, json)
+        if self.handler is None:
+            return self.response
+        return TransportResponse(*self.handler(
+            method, url, headers, params, json))
+
+
+class AsyncTransport:
+    """Interface of the non-blocking HTTP layer used by execute_async."""
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        params: dict = None,
+        json: dict = None,
+        timings=None,
+    ) -> TransportResponse:
+        """Send a request, see :meth:`Transport.send`."""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release the resources held by the transport."""
+
+
+class AsyncPooledTransport(AsyncTransport):
+    """Non-blocking keep-alive transport backed by ``aiohttp``.
+
+    An ``aiohttp.ClientSession`` is created on first use inside each running
+    event loop, so a transport may serve successive ``asyncio.run`` calls or
+    several loops. Await :meth:`close` before a loop ends to release its
+    connections, sessions left behind by closed loops are dropped when the
+    next one is created. Requests wait
+    for the response as long as ``timeout`` allows without holding a thread,
+    which suits the long lived USSD push C2B calls.
+
+    :param limit: Maximum simultaneous connections, ``0`` for no limit,
+        defaults ``100``.
+    :type limit: int
+    :param limit_per_host: Maximum simultaneous connections per host,
+        ``0`` for no limit, defaults ``0``.
+    :type limit_per_host: int
+    :param timeout: Total seconds allowed per request, defaults ``300``.
+    :type timeout: float
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        timeout: float = 300.0,
+    ):
+        """Construct."""
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncPooledTransport requires aiohttp, "
+                "install it with `pip install tekmpesa[async]`."
+            )
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._sessions = {}
+
+    @property
+    def session(self):
+        """Return the ``aiohttp.ClientSession`` of the running event loop.
+
+        Creates it if needed, must be called from a coroutine.
+        """
+        loop = asyncio.get_event_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            for stale in [k for k in self._sessions if k.is_closed()]:
+                self._sessions.pop(stale).detach()
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def send(self, method, url, headers, params=None, json=None,
+                   timings=None):
+        """Send a request over the pooled session."""
+        if timings is None:
+            async with self.session.request(
+                method, url, headers=headers, params=params, json=json,
+            ) as r:
+                return TransportResponse(r.status, r.headers, await r.read())
+        start = perf_counter()
+        data = None if json is None else _json.dumps(json).encode("utf-8")
+        sent = perf_counter()
+        async with self.session.request(
+            method, url, headers=headers, params=params, data=data,
+        ) as r:
+            received = perf_counter()
+            content = await r.read()
+        timings.serialize = sent - start
+        timings.wait = received - sent
+        timings.transfer = perf_counter() - received
+        return TransportResponse(r.status, r.headers, content)
+
+    async def close(self):
+        """Close the pooled connections of the running event loop."""
+        session = self._sessions.pop(asyncio.get_event_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+class AsyncInMemoryTransport(InMemoryTransport, AsyncTransport):
+    """Asyncio flavour of :class:`InMemoryTransport`."""
+
+    async def send(self, method, url, headers, params=None, json=None,
+                   timings=None):
+        """Return the canned or handler response."""
+        return InMemoryTransport.send(
+            self, method, url, headers, params=params, json=json)
+
+
+class ExecutorTransport(AsyncTransport):
+    """Run a blocking :class:`Transport` from an event loop.
+
+    Each request is sent on the default executor of the running loop, so it
+    holds a thread but not the loop. Lets a client configured with a
+    blocking transport, e.g. an :class:`InMemoryTransport` in tests, keep
+    using it from its async twin.
+
+    :param transport: Blocking transport wrapped.
+    :type transport: :class:`Transport`
+    """
+
+    def __init__(self, transport: Transport):
+        """Construct."""
+        self.transport = transport
+
+    async def send(self, method, url, headers, params=None, json=None,
+                   timings=None):
+        """Send the request through the wrapped transport on the executor."""
+        return await asyncio.get_event_loop().run_in_executor(
+            None,
+            functools.partial(
+                self.transport.send, method, url, headers,
+                params=params, json=json, timings=timings),
+        )
+
+
+_SHARED = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_transport(address: str, port: int, ssl: bool) -> PooledTransport:
+    """Return the process wide :class:`PooledTransport` of a host and port.
+
+    :param address: Host name.
+    :type address: str
+    :param port: Port.
+    :type port: int
+    :param ssl: Whether the host is reached over https.
+    :type ssl: bool
+    :rtype: :class:`PooledTransport`
+    """
+    key = (address, port, ssl)
+    transport = _SHARED.get(key)
+    if transport is None:
+        with _SHARED_LOCK:
+            transport = _SHARED.get(key)
+            if transport is None:
+                transport = PooledTransport()
+                _SHARED[key] = transport
+    return transport
+
+
+def shared_async_transport(limit: int = 1000) -> AsyncPooledTransport:
+    """Return the process wide :class:`AsyncPooledTransport` for limit.
+
+    A single non-blocking pool serves every host, its connector keeping the
+    connections of each host apart. The default limit is high because USSD
+    push calls hold their connection until the customer answers.
+
+    :param limit: Maximum simultaneous connections, defaults ``1000``.
+    :type limit: int
+    :rtype: :class:`AsyncPooledTransport`
+    """
+    key = ("async", limit)
+    transport = _SHARED.get(key)
+    if transport is None:
+        with _SHARED_LOCK:
+            transport = _SHARED.get(key)
+            if transport is None:
+                transport = AsyncPooledTransport(limit=limit)
+                _SHARED[key] = transport
+    return transport
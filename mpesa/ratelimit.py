@@ -0,0 +1,223 @@
+"""Token Bucket Rate Limiting.
+
+A :class:`TokenBucket` admits ``rate`` calls per second with bursts of up to
+``capacity``. Callers that find it empty reserve the next free token and
+wait for it, so waiting callers are served in arrival order and the bucket
+never admits more than its rate even under contention. A
+:class:`RateLimiter` keeps one bucket per key, such as a shortcode or an
+app key, and can be shared by every client and thread of a process.
+"""
+import asyncio
+import threading
+import time
+
+__all__ = [
+    "RateLimiter",
+    "TokenBucket",
+]
+
+
+class TokenBucket:
+    """Thread safe token bucket.
+
+    :param rate: Tokens added per second.
+    :type rate: float
+    :param capacity: Maximum tokens held, i.e. the largest burst,
+        defaults to ``rate``.
+    :type capacity: float, optional.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = None,
+        clock=time.monotonic,
+    ):
+        """Construct."""
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(rate if capacity is None else capacity)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self._granted = 0
+        self._waited = 0
+        self._wait_time = 0.0
+        self._window_start = self._updated
+        self._window_granted = 0
+        self._current_rate = 0.0
+
+    def _refill(self, now: float):
+        """Add the tokens earned since the last update, lock held."""
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _grant(self, now: float, n: float, wait: float):
+        """Record granted tokens in the metrics, lock held."""
+        self._granted += n
+        if wait > 0:
+            self._waited += 1
+            self._wait_time += wait
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self._current_rate = self._window_granted / elapsed
+            self._window_start = now
+            self._window_granted = 0
+        self._window_granted += n
+
+    def try_acquire(self, n: float = 1) -> bool:
+        """Take n tokens if they are available right now.
+
+        :return: Whether the tokens were taken.
+        :rtype: bool
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self._tokens < n:
+                return False
+            self._tokens -= n
+            self._grant(now, n, 0.0)
+            return True
+
+    def reserve(self, n: float = 1, timeout: float = None) -> float:
+        """Take n tokens, borrowing against future refills if needed.
+
+        :param n: Tokens to take, defaults ``1``.
+        :type n: float
+        :param timeout: Longest acceptable wait, defaults to unbounded.
+        :type timeout: float, optional.
+        :return: Seconds to wait before proceeding, or ``None`` when that
+            would exceed timeout, in which case nothing was taken.
+        :rtype: float
+        """
+        if n > self.capacity:
+            raise ValueError("n exceeds the bucket capacity.")
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            wait = max(0.0, (n - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return None
+            self._tokens -= n
+            self._grant(now, n, wait)
+            return wait
+
+    def acquire(self, n: float = 1, timeout: float = None) -> bool:
+        """Block until n tokens are available and take them.
+
+        :return: ``False`` if the wait would exceed timeout.
+        :rtype: bool
+        """
+        wait = self.reserve(n, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, n: float = 1, timeout: float = None) -> bool:
+        """Asyncio flavour of :meth:`acquire`, waiting without blocking."""
+        wait = self.reserve(n, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def stats(self) -> dict:
+        """Return the bucket configuration and usage metrics.
+
+        ``current_rate`` is the rate granted over the last full second,
+        ``waited`` and ``wait_time`` count the callers that had to wait.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            elapsed = now - self._window_start
+            current_rate = self._current_rate
+            if elapsed >= 1.0:
+                current_rate = self._window_granted / elapsed
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "tokens": self._tokens,
+                "granted": self._granted,
+                "waited": self._waited,
+                "wait_time": self._wait_time,
+                "current_rate": current_rate,
+            }
+
+
+class RateLimiter:
+    """Collection of :class:`TokenBucket` keyed by shortcode or app key.
+
+    Buckets are created on first use with the default ``rate`` and
+    ``capacity`` unless ``limits`` configures the key.
+
+    :param rate: Default calls per second of a key.
+    :type rate: float
+    :param capacity: Default burst of a key, defaults to ``rate``.
+    :type capacity: float, optional.
+    :param limits: ``{key: rate}`` or ``{key: (rate, capacity)}`` overrides,
+        defaults ``None``.
+    :type limits: dict, optional.
+
+    :Example:
+
+    .. code-block:: python
+
+        limiter = RateLimiter(rate=10, limits={"600000": (50, 50)})
+        api = mpesa.kenya.API(app_key=key, app_secret=secret,
+                              rate_limiter=limiter)
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = None,
+        limits: dict = None,
+    ):
+        """Construct."""
+        self.rate = rate
+        self.capacity = capacity
+        self.limits = dict(limits or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key) -> TokenBucket:
+        """Return the bucket of key, creating it on first use."""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    limit = self.limits.get(key, (self.rate, self.capacity))
+                    if not isinstance(limit, (tuple, list)):
+                        limit = (limit, None)
+                    bucket = TokenBucket(*limit)
+                    self._buckets[key] = bucket
+        return bucket
+
+    def try_acquire(self, key, n: float = 1) -> bool:
+        """Take n tokens of key now, see :meth:`TokenBucket.try_acquire`."""
+        return self.bucket(key).try_acquire(n)
+
+    def acquire(self, key, n: float = 1, timeout: float = None) -> bool:
+        """Block for n tokens of key, see :meth:`TokenBucket.acquire`."""
+        return self.bucket(key).acquire(n, timeout)
+
+    async def acquire_async(self, key, n: float = 1,
+                            timeout: float = None) -> bool:
+        """Await n tokens of key, see :meth:`TokenBucket.acquire_async`."""
+        return await self.bucket(key).acquire_async(n, timeout)
+
+    def stats(self) -> dict:
+        """Return :meth:`TokenBucket.stats` of every key."""
+        return {
+            key: bucket.stats()
+            for key, bucket in list(self._buckets.items())
+        }
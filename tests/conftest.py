@@ -0,0 +1,77 @@
+"""Shared fixtures of the tekmpesa tests."""
+import json
+import threading
+import time
+from base64 import b64encode
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import pytest
+from Crypto.PublicKey import RSA
+
+
+@pytest.fixture(scope="session")
+def public_key():
+    """Return a base64 DER RSA public key as issued by the portals."""
+    key = RSA.generate(1024)
+    return b64encode(key.publickey().exportKey("DER")).decode("ascii")
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answer from the script of the server, then with its JSON body."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _answer(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+            script = self.server.script
+            answer = script.pop(0) if script else None
+        if answer is None:
+            answer = (
+                200,
+                {"Content-Type": "application/json"},
+                json.dumps(self.server.body).encode("utf-8"),
+            )
+        status, headers, content = answer
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = _answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """Serve ``server.body`` as JSON on localhost, recording requests.
+
+    ``server.script`` holds ``(status, headers, content)`` answers served,
+    in order, before falling back to ``server.body``. Every answer waits
+    ``server.delay`` seconds.
+    """
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.body = {"output_ResponseCode": "INS-0"}
+    server.requests = []
+    server.script = []
+    server.delay = 0.0
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
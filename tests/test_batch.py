@@ -0,0 +1,124 @@
+"""Tests of mpesa.batch."""
+import asyncio
+import threading
+
+from mpesa.batch import Checkpoint, run_batch, run_batch_async
+
+
+def call(item):
+    """Accept, reject or fail an item by its outcome."""
+    if item["outcome"] == "error":
+        raise TimeoutError(item["id"])
+    return {"accepted": item["outcome"] == "ok"}
+
+
+def items(*outcomes):
+    return [
+        {"id": str(n), "outcome": outcome}
+        for n, outcome in enumerate(outcomes)
+    ]
+
+
+def key(item):
+    return item["id"]
+
+
+def accepted(response):
+    return response["accepted"]
+
+
+def test_checkpoint_states_survive_a_restart(tmp_path):
+    path = str(tmp_path / "batch.done")
+    checkpoint = Checkpoint(path)
+    checkpoint.begin("a")
+    checkpoint.add("a")
+    checkpoint.begin("b")
+    checkpoint.begin("c")
+    checkpoint.clear("c")
+    checkpoint.begin("d")
+    checkpoint.close()
+    with open(path, "a") as wf:
+        wf.write("legacy\n")
+    checkpoint = Checkpoint(path)
+    assert "a" in checkpoint and "legacy" in checkpoint
+    assert "b" in checkpoint and "d" in checkpoint
+    assert "c" not in checkpoint
+    assert checkpoint.unknown == {"b", "d"}
+    assert len(checkpoint) == 2
+    checkpoint.reconcile("b", completed=True)
+    checkpoint.reconcile("d", completed=False)
+    checkpoint.close()
+    checkpoint = Checkpoint(path)
+    assert checkpoint.unknown == frozenset()
+    assert "b" in checkpoint and "d" not in checkpoint
+    checkpoint.close()
+
+
+def test_resume_skips_completed_and_unknown_items(tmp_path):
+    path = str(tmp_path / "batch.done")
+    batch = items("ok", "rejected", "error", "ok")
+    results = {r.key: r for r in run_batch(
+        call, batch, key, concurrency=2, checkpoint=path,
+        succeeded=accepted)}
+    assert isinstance(results["2"].error, TimeoutError)
+    assert results["1"].response == {"accepted": False}
+    checkpoint = Checkpoint(path)
+    assert checkpoint.unknown == {"2"}
+    sent = []
+
+    def record(item):
+        sent.append(item["id"])
+        return {"accepted": True}
+
+    list(run_batch(record, batch, key, checkpoint=checkpoint,
+                   succeeded=accepted))
+    assert sent == ["1"]
+    checkpoint.reconcile("2", completed=False)
+    list(run_batch(record, batch, key, checkpoint=checkpoint,
+                   succeeded=accepted))
+    assert sent == ["1", "2"]
+    assert checkpoint.unknown == frozenset()
+    checkpoint.close()
+
+
+def test_stopped_run_settles_in_flight_and_clears_unstarted_items():
+    checkpoint = Checkpoint()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(item):
+        if item["id"] == "1":
+            started.set()
+            release.wait(5)
+        return {"accepted": True}
+
+    batch = items("ok", "ok", "ok", "ok")
+    run = run_batch(slow, batch, key, concurrency=2, checkpoint=checkpoint,
+                    succeeded=accepted)
+    first = next(run)
+    assert first.key == "0"
+    assert started.wait(5)
+    threading.Timer(0.1, release.set).start()
+    run.close()
+    assert "1" in checkpoint and "1" not in checkpoint.unknown
+    assert checkpoint.unknown <= {"2"}
+    assert "3" not in checkpoint
+
+
+def test_async_batch_leaves_failed_items_unknown():
+    checkpoint = Checkpoint()
+
+    async def acall(item):
+        await asyncio.sleep(0)
+        return call(item)
+
+    async def run():
+        return [r async for r in run_batch_async(
+            acall, items("ok", "error", "rejected"), key,
+            checkpoint=checkpoint, succeeded=accepted)]
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert "0" in checkpoint
+    assert checkpoint.unknown == {"1"}
+    assert "2" not in checkpoint
@@ -0,0 +1,57 @@
+"""Tests of the compiled XML envelopes of mpesa.drc.generators."""
+import pytest
+
+from mpesa.drc import generators
+
+TEMPLATES = (
+    "login_request.xml",
+    "c2b_request.xml",
+    "b2c_request.xml",
+    "c2b_ack_response.xml",
+    "b2c_ack_response.xml",
+    "w2b_request.xml",
+)
+
+
+def full_context(template_name):
+    """Return a value for every variable of template."""
+    return {
+        name: "value-{}".format(name)
+        for name in generators.get_variables(template_name)
+    }
+
+
+@pytest.mark.parametrize("template_name", TEMPLATES)
+def test_envelope_matches_the_jinja_render(template_name):
+    context = full_context(template_name)
+    expected = generators.environment.get_template(
+        template_name).render(context)
+    assert generators.envelope(template_name).build(context) == expected
+
+
+def test_envelope_fills_in_defaults_of_optional_variables():
+    envelope = generators.envelope("c2b_request.xml")
+    context = {name: "v" for name in envelope.required}
+    expected = generators.environment.get_template(
+        "c2b_request.xml").render(context)
+    assert "Currency" not in envelope.required
+    assert envelope.build(context) == expected
+    assert "CDF" in envelope.build(context)
+
+
+def test_envelope_escapes_values():
+    envelope = generators.envelope("c2b_request.xml")
+    context = {name: "v" for name in envelope.required}
+    context["ThirdPartyReference"] = "<a&b>"
+    content = envelope.build(context)
+    assert "&lt;a&amp;b&gt;" in content
+    assert "<a&b>" not in content
+
+
+def test_envelope_rejects_a_missing_required_variable():
+    # Jinja2 rendered a missing variable as an empty string.
+    envelope = generators.envelope("c2b_request.xml")
+    context = {name: "v" for name in envelope.required}
+    del context["Amount"], context["Token"]
+    with pytest.raises(ValueError, match="Amount, Token"):
+        envelope.build(context)
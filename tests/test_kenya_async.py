@@ -0,0 +1,75 @@
+"""Tests of mpesa.kenya.AsyncAPI and its async helpers."""
+import asyncio
+
+import pytest
+
+from mpesa.kenya import AsyncAPI, AsyncSessionPool, AsyncTokenCache
+
+pytest.importorskip("aiohttp")
+
+
+def daraja(server):
+    """Return an AsyncAPI of the test server with its own cache and pool."""
+    server.body = {
+        "access_token": "token",
+        "expires_in": "3599",
+        "ResponseCode": "0",
+    }
+    api = AsyncAPI(
+        app_key="key",
+        app_secret="secret",
+        token_cache=AsyncTokenCache(),
+        session_pool=AsyncSessionPool(),
+    )
+    api.sandbox_url = "http://127.0.0.1:{}".format(server.server_address[1])
+    return api
+
+
+def test_async_api_serves_successive_loops(http_server):
+    api = daraja(http_server)
+
+    async def b2c(close=False):
+        response = await api.b2c(
+            initiator_name="init",
+            security_credential="credential",
+            command_id="BusinessPayment",
+            amount="10",
+            party_a="600000",
+            party_b="254700000000",
+        )
+        if close:
+            await api.close()
+        return response
+
+    assert asyncio.run(b2c())["ResponseCode"] == "0"
+    assert asyncio.run(b2c(close=True))["ResponseCode"] == "0"
+    paths = [path for _, path in http_server.requests]
+    assert sum("oauth" in path for path in paths) == 1
+    assert sum("b2c" in path for path in paths) == 2
+
+
+def test_async_token_cache_refreshes_on_a_new_loop():
+    now = [0.0]
+    cache = AsyncTokenCache(
+        refresh_margin=100.0, expiry_margin=10.0, clock=lambda: now[0])
+    fetched = []
+
+    async def fetch():
+        fetched.append(now[0])
+        await asyncio.sleep(0)
+        return "token-{}".format(len(fetched)), 1000
+
+    async def get():
+        tokens = await asyncio.gather(
+            cache.get("key", fetch), cache.get("key", fetch))
+        await asyncio.sleep(0)
+        assert tokens[0] == tokens[1]
+        return tokens[0]
+
+    assert asyncio.run(get()) == "token-1"
+    now[0] = 950.0
+    assert asyncio.run(get()) == "token-1"
+    assert asyncio.run(get()) == "token-2"
+    now[0] = 3000.0
+    assert asyncio.run(get()) == "token-3"
+    assert len(fetched) == 3
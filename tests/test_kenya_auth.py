@@ -0,0 +1,74 @@
+"""Tests of mpesa.kenya.auth."""
+import threading
+import time
+
+from mpesa.kenya import TokenCache
+
+
+class Fetch:
+    """Token fetch counting its calls, optionally held until released."""
+
+    def __init__(self, expires_in, release=None):
+        self.expires_in = expires_in
+        self.calls = 0
+        self.release = release
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        self.done.set()
+        return "token-{}".format(self.calls), self.expires_in
+
+
+def test_short_lived_token_is_reused():
+    now = [0.0]
+    cache = TokenCache(clock=lambda: now[0])
+    fetch = Fetch(60)
+    tokens = [cache.get("key", fetch) for _ in range(5)]
+    assert tokens == ["token-1"] * 5
+    assert fetch.calls == 1
+    now[0] = 29.0
+    assert cache.get("key", fetch) == "token-1"
+    assert fetch.calls == 1
+
+
+def test_short_lived_token_is_refreshed_once_in_the_background():
+    now = [0.0]
+    cache = TokenCache(clock=lambda: now[0])
+    release = threading.Event()
+    fetch = Fetch(60, release)
+    release.set()
+    cache.get("key", fetch)
+    release.clear()
+    fetch.done.clear()
+    now[0] = 31.0
+    assert [cache.get("key", fetch) for _ in range(5)] == ["token-1"] * 5
+    release.set()
+    assert fetch.done.wait(5)
+    assert fetch.calls == 2
+    for _ in range(100):
+        if cache.get("key", fetch) == "token-2":
+            break
+        time.sleep(0.01)
+    assert cache.get("key", fetch) == "token-2"
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TokenCache()
+    release = threading.Event()
+    fetch = Fetch(3599, release)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            cache.get("key", fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["token-1"] * 8
+    assert fetch.calls == 1
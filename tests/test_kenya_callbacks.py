@@ -0,0 +1,103 @@
+"""Tests of mpesa.kenya.callbacks."""
+import asyncio
+import io
+import json
+import threading
+
+from mpesa.kenya import C2BCallbackApp
+
+
+def asgi_post(app, path, body):
+    """Return ``(status, body)`` of a POST through the ASGI entry point."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    async def post():
+        await app({"type": "http", "path": path, "method": "POST"},
+                  receive, send)
+
+    return post, sent
+
+
+def test_failing_sink_with_non_dict_payload_keeps_the_workers_alive():
+    seen = []
+
+    async def sink(record):
+        seen.append(record.payload)
+        if not isinstance(record.payload, dict):
+            raise ValueError("unexpected payload")
+
+    app = C2BCallbackApp(sink, workers=1)
+
+    async def run():
+        for body in (b"[1, 2]", b'"text"', b'{"TransID": "T1"}'):
+            post, sent = asgi_post(app, "/confirmation", body)
+            await post()
+            assert sent[0]["status"] == 200
+        await app.aclose()
+
+    asyncio.run(run())
+    assert seen == [[1, 2], "text", {"TransID": "T1"}]
+    stats = app.stats()
+    assert stats["failed"] == 2
+    assert stats["delivered"] == 1
+    assert stats["accepted"] == 3
+
+
+def test_wsgi_counters_are_exact_under_concurrency():
+    delivered = threading.Semaphore(0)
+
+    async def sink(record):
+        delivered.release()
+
+    app = C2BCallbackApp(sink)
+    body = json.dumps({"TransID": "T1"}).encode()
+    statuses = []
+
+    def post():
+        for _ in range(50):
+            environ = {
+                "PATH_INFO": "/confirmation",
+                "REQUEST_METHOD": "POST",
+                "CONTENT_LENGTH": str(len(body)),
+                "wsgi.input": io.BytesIO(body),
+            }
+            app.wsgi(environ, lambda status, headers: statuses.append(
+                status))
+
+    threads = [threading.Thread(target=post) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for _ in range(400):
+        assert delivered.acquire(timeout=5)
+    assert statuses == ["200 OK"] * 400
+    stats = app.stats()
+    assert stats["accepted"] == 400
+    assert stats["dropped"] == 0
+
+
+def test_invalid_and_rejected_callbacks_are_counted():
+    async def sink(record):
+        pass
+
+    app = C2BCallbackApp(sink, validator=lambda payload: "C2B00012")
+
+    async def run():
+        post, sent = asgi_post(app, "/confirmation", b"not json")
+        await post()
+        assert sent[0]["status"] == 400
+        post, sent = asgi_post(app, "/validation", b'{"TransID": "T2"}')
+        await post()
+        assert json.loads(sent[1]["body"])["ResultCode"] == "C2B00012"
+        await app.aclose()
+
+    asyncio.run(run())
+    stats = app.stats()
+    assert stats["invalid"] == 1 and stats["rejected"] == 1
@@ -0,0 +1,219 @@
+"""Tests of mpesa.kenya.correlation."""
+import pytest
+from Crypto.PublicKey import RSA
+
+from mpesa.kenya import (
+    API,
+    AsyncAPI,
+    AsyncTokenCache,
+    RequestNotAccepted,
+    ResultCorrelator,
+    SecurityCredentials,
+    TokenCache,
+)
+
+
+class FakeAPI:
+    """Client acknowledging every request with new conversation ids."""
+
+    env = "sandbox"
+
+    def __init__(self):
+        self.calls = []
+        self.credentials = {("init", "sandbox")}
+
+    def _ack(self, name, kwargs):
+        self.calls.append((name, kwargs))
+        n = len(self.calls)
+        return {
+            "ConversationID": "AG_{}".format(n),
+            "OriginatorConversationID": "OC_{}".format(n),
+            "ResponseCode": "0",
+        }
+
+    def b2c(self, **kwargs):
+        return self._ack("b2c", kwargs)
+
+    def transaction_status(self, **kwargs):
+        return self._ack("transaction_status", kwargs)
+
+
+def result(conversation_id, code=0):
+    """Return a ResultURL callback of conversation_id."""
+    return {"Result": {"ConversationID": conversation_id, "ResultCode": code}}
+
+
+def submit_b2c(correlator, api):
+    return correlator.submit(
+        api.b2c,
+        initiator_name="init",
+        party_a="600000",
+        party_b="254700000000",
+        amount="10",
+        result_url="https://example.com/result",
+        queue_timeout_url="https://example.com/timeout",
+    )
+
+
+def test_result_callback_resolves_the_future():
+    api = FakeAPI()
+    correlator = ResultCorrelator()
+    future = submit_b2c(correlator, api)
+    assert not correlator.resolve(result("AG_unknown"))
+    assert correlator.resolve(result("AG_1"))
+    assert future.result(0)["ResultCode"] == 0
+    assert len(correlator) == 0
+
+
+def test_queue_timeout_queries_the_status_by_default():
+    api = FakeAPI()
+    correlator = ResultCorrelator()
+    future = submit_b2c(correlator, api)
+    assert correlator.timeout(result("AG_1"))
+    name, kwargs = api.calls[-1]
+    assert name == "transaction_status"
+    assert kwargs["transaction_id"] == "OC_1"
+    assert kwargs["initiator"] == "init"
+    assert kwargs["party_a"] == "600000"
+    assert kwargs["result_url"] == "https://example.com/result"
+    assert not future.done()
+    assert correlator.resolve(result("AG_2", code=0))
+    assert future.result(0) == {"ConversationID": "AG_2", "ResultCode": 0}
+
+
+def test_queue_timeout_fails_once_requeries_are_used_up():
+    api = FakeAPI()
+    correlator = ResultCorrelator()
+    future = submit_b2c(correlator, api)
+    correlator.timeout(result("AG_1"))
+    correlator.timeout(result("AG_2"))
+    with pytest.raises(TimeoutError):
+        future.result(0)
+    assert [name for name, _ in api.calls] == ["b2c", "transaction_status"]
+
+
+def test_tracked_request_without_client_times_out():
+    correlator = ResultCorrelator()
+    future = correlator.track(FakeAPI().b2c())
+    correlator.timeout(result("AG_1"))
+    with pytest.raises(TimeoutError):
+        future.result(0)
+
+
+def test_ttl_and_rejected_requests():
+    now = [0.0]
+    correlator = ResultCorrelator(ttl=10.0, clock=lambda: now[0])
+    future = submit_b2c(correlator, FakeAPI())
+    now[0] = 11.0
+    assert correlator.sweep() == 1
+    with pytest.raises(TimeoutError):
+        future.result(0)
+    rejected = correlator.track({"ResponseCode": "1", "errorMessage": "no"})
+    with pytest.raises(RequestNotAccepted):
+        rejected.result(0)
+
+
+class Response:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class StubPool:
+    """Session pool acknowledging requests and recording them."""
+
+    def __init__(self):
+        self.sent = []
+
+    def request(self, method, url, **kwargs):
+        if "oauth" in url:
+            return Response({"access_token": "token", "expires_in": "3599"})
+        self.sent.append((url, kwargs["json"]))
+        n = len(self.sent)
+        return Response({
+            "ConversationID": "AG_{}".format(n),
+            "OriginatorConversationID": "OC_{}".format(n),
+            "ResponseCode": "0",
+        })
+
+
+@pytest.fixture(scope="module")
+def credentials():
+    certificate = RSA.generate(1024).publickey().export_key("PEM")
+    credentials = SecurityCredentials({"sandbox": certificate})
+    credentials.register("init", "password")
+    return credentials
+
+
+def daraja(cls=API, credentials=None, **kwargs):
+    return cls(
+        app_key="key",
+        app_secret="secret",
+        credentials=credentials,
+        **kwargs
+    )
+
+
+def test_queue_timeout_queries_the_real_client(credentials):
+    api = daraja(
+        credentials=credentials,
+        token_cache=TokenCache(),
+        session_pool=StubPool(),
+    )
+    correlator = ResultCorrelator()
+    future = submit_b2c(correlator, api)
+    assert correlator.timeout(result("AG_1"))
+    url, payload = api.session_pool.sent[-1]
+    assert url.endswith("/mpesa/transactionstatus/v1/query")
+    assert payload["TransactionID"] == "OC_1"
+    assert payload["Initiator"] == "init"
+    assert payload["SecurityCredential"] == credentials.get(
+        "init", "sandbox")
+    assert not future.done()
+    assert correlator.resolve(result("AG_2"))
+    assert future.result(0)["ResultCode"] == 0
+
+
+def test_queue_timeout_without_a_registered_credential_fails():
+    api = daraja(token_cache=TokenCache(), session_pool=StubPool())
+    correlator = ResultCorrelator()
+    future = submit_b2c(correlator, api)
+    assert correlator.timeout(result("AG_1"))
+    with pytest.raises(KeyError, match="init"):
+        future.result(0)
+    assert len(api.session_pool.sent) == 1
+
+
+def test_queue_timeout_rejects_an_async_client(credentials):
+    pytest.importorskip("aiohttp")
+    api = daraja(
+        AsyncAPI,
+        credentials=credentials,
+        token_cache=AsyncTokenCache(),
+    )
+    correlator = ResultCorrelator()
+    future = correlator.track(
+        FakeAPI().b2c(), {"api": api, "kwargs": {"initiator_name": "init"},
+                          "response": {"OriginatorConversationID": "OC_1"}})
+    assert correlator.timeout(result("AG_1"))
+    with pytest.raises(TypeError, match="AsyncAPI"):
+        future.result(0)
+
+
+def test_callbacks_of_a_cancelled_wait_are_dropped():
+    api = FakeAPI()
+    correlator = ResultCorrelator()
+    future = submit_b2c(correlator, api)
+    assert future.cancel()
+    assert correlator.resolve(result("AG_1"))
+    assert future.cancelled()
+    future = submit_b2c(correlator, api)
+    assert future.cancel()
+    assert correlator.timeout(result("AG_2"))
+    assert [name for name, _ in api.calls] == ["b2c", "b2c"]
+    assert len(correlator) == 0
@@ -0,0 +1,79 @@
+"""Tests of mpesa.kenya.credentials and their use by mpesa.kenya.API."""
+import pytest
+from Crypto.PublicKey import RSA
+
+from mpesa.kenya import API, SecurityCredentials, TokenCache
+
+
+class Response:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class StubPool:
+    """Session pool answering from memory and recording the payloads."""
+
+    def __init__(self):
+        self.payloads = []
+
+    def request(self, method, url, **kwargs):
+        if "oauth" in url:
+            return Response({"access_token": "token", "expires_in": "3599"})
+        self.payloads.append(kwargs["json"])
+        return Response({"ResponseCode": "0"})
+
+
+@pytest.fixture(scope="module")
+def certificate():
+    return RSA.generate(1024).publickey().export_key("PEM")
+
+
+def api_with(credentials):
+    return API(
+        app_key="key",
+        app_secret="secret",
+        token_cache=TokenCache(),
+        session_pool=StubPool(),
+        credentials=credentials,
+    )
+
+
+def b2c(api, **kwargs):
+    return api.b2c(
+        initiator_name="apiop37",
+        command_id="BusinessPayment",
+        amount="10",
+        party_a="600000",
+        party_b="254700000000",
+        **kwargs
+    )
+
+
+def test_registered_credential_is_sent(certificate):
+    credentials = SecurityCredentials({"sandbox": certificate})
+    credential = credentials.register("apiop37", "password")
+    assert ("apiop37", "sandbox") in credentials
+    api = api_with(credentials)
+    b2c(api)
+    assert api.session_pool.payloads[-1]["SecurityCredential"] == credential
+
+
+def test_unregistered_initiator_raises_before_sending():
+    api = api_with(SecurityCredentials())
+    with pytest.raises(KeyError, match="apiop37"):
+        b2c(api)
+    with pytest.raises(KeyError, match="apiop37"):
+        api.transaction_status(initiator="apiop37", transaction_id="OC_1")
+    assert api.session_pool.payloads == []
+
+
+def test_explicit_credential_wins():
+    api = api_with(SecurityCredentials())
+    b2c(api, security_credential="explicit")
+    assert api.session_pool.payloads[-1]["SecurityCredential"] == "explicit"
@@ -0,0 +1,51 @@
+"""Tests of mpesa.kenya.endpoints and the routes of mpesa.kenya.API."""
+from mpesa.kenya import API, ENDPOINTS, Endpoint
+
+
+def test_endpoint_builds_the_payload_with_its_defaults():
+    endpoint = Endpoint(
+        "status",
+        "/status",
+        ("PartyA", "Remarks"),
+        defaults={"CommandID": "TransactionStatusQuery"},
+        shortcode="PartyA",
+    )
+    assert endpoint.build("600000", "ok") == {
+        "PartyA": "600000",
+        "Remarks": "ok",
+        "CommandID": "TransactionStatusQuery",
+    }
+    assert endpoint.build("600000", None)["Remarks"] is None
+    first = endpoint.build("600000", "ok")
+    first["Remarks"] = "changed"
+    assert endpoint.build("600001")["Remarks"] is None
+    assert endpoint.shortcode == 0
+
+
+def test_registry_payloads_follow_the_field_order():
+    b2c = ENDPOINTS["b2c"]
+    payload = b2c.build(*range(len(b2c.fields)))
+    assert list(payload) == list(b2c.fields)
+    assert payload["Amount"] == b2c.fields.index("Amount")
+
+
+def test_api_resolves_routes_again_when_env_or_url_change():
+    api = API(app_key="key", app_secret="secret")
+    assert api._routes["b2c"][1] == (
+        "https://sandbox.safaricom.co.ke/mpesa/b2c/v1/paymentrequest")
+    api.env = "production"
+    assert api._routes["b2c"][1].startswith("https://api.safaricom.co.ke/")
+    assert api._token_key == ("production", "key")
+    api.live_url = "http://localhost:8000"
+    assert api._routes["b2c"][1] == (
+        "http://localhost:8000/mpesa/b2c/v1/paymentrequest")
+    api.app_key = "other"
+    assert api._token_key == ("production", "other")
+    api.timeout = 5
+    assert api._routes["b2c"][1].startswith("http://localhost:8000/")
+
+
+def test_transaction_status_queries_the_transaction_status_path():
+    assert ENDPOINTS["transaction_status"].path == (
+        "/mpesa/transactionstatus/v1/query")
+    assert ENDPOINTS["lnmo_status"].path == "/mpesa/stkpushquery/v1/query"
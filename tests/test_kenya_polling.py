@@ -0,0 +1,103 @@
+"""Tests of mpesa.kenya.polling."""
+import threading
+import time
+
+import pytest
+
+from mpesa.kenya.polling import STKPushPoller
+
+
+class StubAPI:
+    """lnmo client answering from a list of status responses."""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.polls = []
+        self.lock = threading.Lock()
+
+    def lnmo_stkpush(self, **kwargs):
+        return {"ResponseCode": "0", "CheckoutRequestID": "ws_CO_1"}
+
+    def lnmo_status(self, **kwargs):
+        with self.lock:
+            self.polls.append(kwargs["checkout_request_id"])
+            status = self.statuses.pop(0) if self.statuses else {}
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+
+def poller(api, **kwargs):
+    """Return a poller of api polling every few milliseconds."""
+    kwargs.setdefault("initial_delay", 0.001)
+    kwargs.setdefault("max_delay", 0.005)
+    return STKPushPoller(api, workers=2, **kwargs)
+
+
+def test_poller_retries_until_a_final_result_code():
+    api = StubAPI([{}, ValueError("boom"), {"ResultCode": "0"}])
+    stk = poller(api)
+    try:
+        response, future = stk.push(
+            business_shortcode="174379", passcode="passcode")
+        assert response["CheckoutRequestID"] == "ws_CO_1"
+        assert future.result(timeout=5) == {"ResultCode": "0"}
+    finally:
+        stk.stop()
+    assert api.polls == ["ws_CO_1"] * 3
+    assert len(stk) == 0
+
+
+def test_poller_gives_up_after_max_attempts():
+    stk = poller(StubAPI([]), max_attempts=3)
+    try:
+        future = stk.add("174379", "ws_CO_2", "passcode")
+        with pytest.raises(TimeoutError):
+            future.result(timeout=5)
+    finally:
+        stk.stop()
+    assert stk.api.polls == ["ws_CO_2"] * 3
+
+
+def test_resolve_settles_a_checkout_without_polling():
+    api = StubAPI([])
+    stk = poller(api, initial_delay=60)
+    try:
+        future = stk.add("174379", "ws_CO_3", "passcode")
+        assert stk.add("174379", "ws_CO_3", "passcode") is future
+        assert stk.resolve("ws_CO_3", {"ResultCode": "1032"})
+        assert future.result(timeout=1) == {"ResultCode": "1032"}
+        assert not stk.resolve("ws_CO_3", {})
+        other = stk.add("174379", "ws_CO_4", "passcode")
+        assert stk.cancel("ws_CO_4") and other.cancelled()
+    finally:
+        stk.stop()
+    assert api.polls == []
+
+
+def test_resolve_after_the_caller_cancelled_its_wait():
+    api = StubAPI([])
+    stk = poller(api, initial_delay=60)
+    try:
+        future = stk.add("174379", "ws_CO_5", "passcode")
+        assert future.cancel()
+        assert stk.resolve("ws_CO_5", {"ResultCode": "0"})
+        assert future.cancelled()
+        assert len(stk) == 0
+    finally:
+        stk.stop()
+
+
+def test_expiry_after_the_caller_cancelled_its_wait():
+    api = StubAPI([])
+    stk = poller(api, max_attempts=1)
+    try:
+        future = stk.add("174379", "ws_CO_6", "passcode")
+        assert future.cancel()
+        deadline = time.monotonic() + 5
+        while len(stk):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        stk.stop()
+    assert future.cancelled() and api.polls == ["ws_CO_6"]
@@ -0,0 +1,211 @@
+"""Tests of mpesa.kenya.retry and the retrying sends of the Kenya clients."""
+import asyncio
+import json
+import socket
+
+import pytest
+import requests
+
+from mpesa.kenya import (
+    API,
+    AsyncAPI,
+    AsyncSessionPool,
+    AsyncTokenCache,
+    HTTPStatusError,
+    RetryBudget,
+    RetryPolicy,
+    SessionPool,
+    TokenCache,
+)
+from mpesa.kenya.retry import (
+    CONNECT,
+    SERVER,
+    THROTTLED,
+    TIMEOUT,
+    classify_error,
+    classify_status,
+)
+from mpesa.kenya.sessions import aiohttp
+
+HTML = {"Content-Type": "text/html"}
+TOKEN = {"access_token": "token", "expires_in": "3599"}
+
+
+def closed_port() -> int:
+    """Return a localhost port nothing listens on."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def error_of(call):
+    """Return the exception raised by call."""
+    with pytest.raises(Exception) as info:
+        call()
+    return info.value
+
+
+def test_classify_error_separates_refused_from_timed_out_and_tls():
+    refused = error_of(lambda: requests.get(
+        "http://127.0.0.1:{}".format(closed_port()), timeout=5))
+    assert classify_error(refused) == CONNECT
+    assert classify_error(requests.exceptions.ConnectTimeout()) == CONNECT
+    assert classify_error(requests.exceptions.ReadTimeout()) == TIMEOUT
+    assert classify_error(requests.exceptions.ConnectionError(
+        "Connection aborted.")) == TIMEOUT
+    assert classify_error(requests.exceptions.SSLError()) is None
+    assert classify_error(asyncio.TimeoutError()) == TIMEOUT
+    assert classify_error(ValueError()) is None
+
+
+@pytest.mark.skipif(aiohttp is None, reason="requires aiohttp")
+def test_classify_error_of_aiohttp():
+    async def refused():
+        async with aiohttp.ClientSession() as session:
+            url = "http://127.0.0.1:{}".format(closed_port())
+            try:
+                await session.get(url)
+            except Exception as e:
+                return e
+
+    assert classify_error(asyncio.run(refused())) == CONNECT
+    assert classify_error(aiohttp.ServerDisconnectedError()) == TIMEOUT
+
+
+def test_classify_status():
+    assert [classify_status(s) for s in (200, 400, 404, 429, 500, 503)] == [
+        None, None, None, THROTTLED, SERVER, THROTTLED]
+
+
+def test_backoff_resends_payments_only_when_unprocessed():
+    policy = RetryPolicy(attempts=5, rng=lambda: 1.0)
+    assert policy.backoff(CONNECT, False, 0) == 0.5
+    assert policy.backoff(THROTTLED, False, 1) == 1.0
+    assert policy.backoff(TIMEOUT, False, 0) is None
+    assert policy.backoff(SERVER, False, 0) is None
+    assert policy.backoff(TIMEOUT, True, 2) == 2.0
+    assert policy.backoff(SERVER, True, 0) == 0.5
+    assert policy.backoff(None, True, 0) is None
+
+
+def test_backoff_honours_retry_after_and_caps_attempts():
+    policy = RetryPolicy(attempts=3, max_delay=8.0, rng=lambda: 1.0)
+    assert policy.backoff(THROTTLED, False, 0, "2") == 2.0
+    assert policy.backoff(THROTTLED, False, 0, "120") == 8.0
+    assert policy.backoff(THROTTLED, False, 0, "soon") == 0.5
+    assert policy.backoff(THROTTLED, False, 1) == 1.0
+    assert policy.backoff(THROTTLED, False, 2) is None
+
+
+def test_retry_budget_drains_and_refills_with_traffic():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    policy = RetryPolicy(attempts=10, budget=budget, rng=lambda: 0.0)
+    assert policy.backoff(CONNECT, True, 0) == 0.0
+    assert policy.backoff(CONNECT, True, 1) == 0.0
+    assert policy.backoff(CONNECT, True, 2) is None
+    assert budget.balance == 0
+    policy.begin()
+    assert not budget.withdraw()
+    policy.begin()
+    assert budget.withdraw()
+    for _ in range(10):
+        policy.begin()
+    assert budget.balance == 2
+
+
+class RecordingPolicy(RetryPolicy):
+    """Policy recording the Retry-After of every backoff."""
+
+    def __init__(self):
+        super(RecordingPolicy, self).__init__(attempts=3, base_delay=0.001)
+        self.retry_after = []
+
+    def backoff(self, kind, idempotent, attempt, retry_after=None):
+        self.retry_after.append(retry_after)
+        return super(RecordingPolicy, self).backoff(
+            kind, idempotent, attempt, retry_after)
+
+
+def daraja(server, cls, pool, cache):
+    """Return a client of the test server retrying without delay."""
+    server.body = TOKEN
+    api = cls(
+        app_key="key",
+        app_secret="secret",
+        token_cache=cache,
+        session_pool=pool,
+        retry_policy=RecordingPolicy(),
+    )
+    api.sandbox_url = "http://127.0.0.1:{}".format(server.server_address[1])
+    return api
+
+
+def b2c(api):
+    return api.b2c(
+        initiator_name="init",
+        security_credential="credential",
+        command_id="BusinessPayment",
+        amount="10",
+        party_a="600000",
+        party_b="254700000000",
+    )
+
+
+def payment_attempts(server):
+    return sum("b2c" in path for _, path in server.requests)
+
+
+def throttled(retry_after="0"):
+    return (503, dict(HTML, **{"Retry-After": retry_after}), b"<html/>")
+
+
+def accepted():
+    body = json.dumps({"ResponseCode": "0"}).encode("utf-8")
+    return 200, {"Content-Type": "application/json"}, body
+
+
+def test_sync_send_retries_throttled_payments(http_server):
+    api = daraja(http_server, API, SessionPool(), TokenCache())
+    api.authentication_token
+    http_server.script = [throttled(), (429, {}, b""), accepted()]
+    assert b2c(api) == {"ResponseCode": "0"}
+    assert payment_attempts(http_server) == 3
+    assert api.retry_policy.retry_after == ["0", None]
+
+    http_server.script = [throttled()] * 3
+    with pytest.raises(HTTPStatusError) as info:
+        b2c(api)
+    assert info.value.status_code == 503
+    assert payment_attempts(http_server) == 6
+
+    http_server.script = [(500, HTML, b"<html/>")]
+    with pytest.raises(HTTPStatusError):
+        b2c(api)
+    assert payment_attempts(http_server) == 7
+    api.session_pool.close()
+
+
+@pytest.mark.skipif(aiohttp is None, reason="requires aiohttp")
+def test_async_send_retries_throttled_payments(http_server):
+    api = daraja(http_server, AsyncAPI, AsyncSessionPool(), AsyncTokenCache())
+
+    async def main():
+        try:
+            await api.authentication_token
+            http_server.script = [throttled(), (429, {}, b""), accepted()]
+            assert await b2c(api) == {"ResponseCode": "0"}
+            assert payment_attempts(http_server) == 3
+            assert api.retry_policy.retry_after == ["0", None]
+            http_server.script = [throttled()] * 3
+            with pytest.raises(HTTPStatusError) as info:
+                await b2c(api)
+            assert info.value.status_code == 503
+            assert payment_attempts(http_server) == 6
+            http_server.script = [(500, HTML, b"<html/>")]
+            with pytest.raises(HTTPStatusError):
+                await b2c(api)
+            assert payment_attempts(http_server) == 7
+        finally:
+            await api.close()
+
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""Tests of the keep-alive session pools of mpesa.kenya.sessions."""
+import threading
+
+from mpesa.kenya import SessionPool
+
+
+def url_of(server):
+    return "http://127.0.0.1:{}/".format(server.server_address[1])
+
+
+def test_session_pool_stats_count_hits_misses_and_evictions(http_server):
+    pool = SessionPool(pool_connections=1, pool_maxsize=1)
+    url = url_of(http_server)
+    try:
+        for _ in range(3):
+            assert pool.get(url).status_code == 200
+        (host,) = pool.stats()["hosts"]
+        assert (host["connections"], host["reused"], host["idle"]) == (
+            1, 2, 1)
+        assert host["discarded"] == 0
+
+        http_server.delay = 0.2
+        barrier = threading.Barrier(3)
+
+        def send():
+            barrier.wait()
+            pool.get(url)
+
+        threads = [threading.Thread(target=send) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = pool.stats()
+        (host,) = stats["hosts"]
+        assert stats["requests"] == 6
+        assert stats["peak_in_flight"] == 3
+        assert stats["in_flight"] == 0
+        assert host["requests"] == 6
+        assert host["connections"] == 3
+        assert host["reused"] == 3
+        assert host["idle"] == 1
+        assert host["discarded"] == 2
+    finally:
+        pool.close()
@@ -0,0 +1,74 @@
+"""Tests of mpesa.mozambique.API."""
+import json
+
+from mpesa import mozambique
+from mpesa.portalsdk import InMemoryTransport, PooledTransport
+
+BODY = json.dumps({"output_ResponseCode": "INS-0"}).encode("utf-8")
+
+
+class PortTransport(InMemoryTransport):
+    """InMemoryTransport recording warm ups, refusing some ports."""
+
+    def __init__(self, refused=()):
+        super(PortTransport, self).__init__(content=BODY)
+        self.refused = set(refused)
+        self.connected = []
+
+    def connect(self, url):
+        port = int(url.rsplit(":", 1)[1].strip("/"))
+        if port in self.refused:
+            raise ConnectionError(url)
+        self.connected.append(port)
+
+
+def c2b(api):
+    return api.c2b(
+        Amount="10",
+        CustomerMSISDN="258840000000",
+        ServiceProviderCode="171717",
+        TransactionReference="T1",
+        ThirdPartyReference="R1",
+    )
+
+
+def test_warmup_connects_every_port_and_skips_unreachable_ones(public_key):
+    transport = PortTransport(refused={18353})
+    api = mozambique.API(public_key, "api-key", transport=transport)
+    connected = api.warmup()
+    ports = set(mozambique.API.ports.values())
+    assert connected == sorted(ports - {18353})
+    assert transport.connected == connected
+    assert len(api.bearer_cache) == 1
+
+
+def test_operations_go_to_their_port_with_one_bearer(public_key):
+    transport = PortTransport()
+    api = mozambique.API(public_key, "api-key", transport=transport)
+    assert c2b(api)["ResponseCode"] == "INS-0"
+    method, url, headers, params, body = transport.last_request
+    assert url.startswith("https://api.sandbox.vm.co.mz:18352/")
+    bearer = headers["Authorization"]
+    api.b2c(
+        Amount="10",
+        CustomerMSISDN="258840000000",
+        ServiceProviderCode="171717",
+        TransactionReference="T1",
+        ThirdPartyReference="R2",
+    )
+    method, url, headers, params, body = transport.last_request
+    assert url.startswith("https://api.sandbox.vm.co.mz:18345/")
+    assert headers["Authorization"] == bearer
+    assert transport.requests == 2
+
+
+def test_each_port_gets_its_own_keep_alive_pool(public_key):
+    api = mozambique.API(public_key, "api-key")
+    address = "api.sandbox.vm.co.mz"
+    c2b_pool = api._transport(address, 18352)
+    assert isinstance(c2b_pool, PooledTransport)
+    assert api._transport(address, 18352) is c2b_pool
+    assert api._transport(address, 18345) is not c2b_pool
+    other = mozambique.API(public_key, "other-key")
+    assert other._transport(address, 18352) is c2b_pool
+    assert set(api._transports) == {(address, 18352), (address, 18345)}
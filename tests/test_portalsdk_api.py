@@ -0,0 +1,123 @@
+"""Tests of mpesa.portalsdk.api and the market clients built on it."""
+import json
+
+import pytest
+
+from mpesa import tanzania
+from mpesa.portalsdk.openapi import Market, MarketAPI
+from mpesa.portalsdk import (
+    APIContext,
+    APIOutput,
+    APIResponse,
+    InMemoryTransport,
+    SessionManager,
+)
+
+BODY = {
+    "output_ResponseCode": "INS-0",
+    "output_ResponseDesc": "Request processed successfully",
+    "output_SessionID": "session",
+}
+
+
+def market_api(public_key, transport):
+    """Return a tanzania API answered by transport, sessions live at once."""
+    return tanzania.API(
+        public_key,
+        "api-key",
+        transport=transport,
+        sessions=SessionManager(activation=0.0),
+    )
+
+
+def test_api_response_is_a_complete_dict():
+    response = APIResponse(
+        200, {"Content-Type": "application/json"},
+        content=json.dumps(BODY).encode("utf-8"))
+    assert set(response) == {"status_code", "headers", "body"}
+    assert "body" in response and "headers" in response
+    assert response.get("body") == BODY
+    assert response == {
+        "status_code": 200,
+        "headers": {"Content-Type": "application/json"},
+        "body": BODY,
+    }
+    assert json.loads(json.dumps(response))["body"] == BODY
+    assert response.content == json.dumps(BODY).encode("utf-8")
+
+
+def test_api_response_rejects_invalid_json():
+    with pytest.raises(ValueError):
+        APIResponse(502, {}, content=b"<html>Bad Gateway</html>")
+    assert APIResponse(204, {}, content=b"").body == {}
+
+
+def test_api_output_trims_the_prefix_into_a_dict():
+    output = APIOutput(dict(BODY, extra=1))
+    assert isinstance(output, dict)
+    assert output == {
+        "ResponseCode": "INS-0",
+        "ResponseDesc": "Request processed successfully",
+        "SessionID": "session",
+        "extra": 1,
+    }
+    assert json.loads(json.dumps(output)) == output
+
+
+def test_market_operation_returns_a_json_serialisable_dict(public_key):
+    transport = InMemoryTransport(content=json.dumps(BODY).encode("utf-8"))
+    output = market_api(public_key, transport).c2b(
+        Amount="10",
+        CustomerMSISDN="000000000001",
+        ServiceProviderCode="000000",
+        ThirdPartyConversationID="conversation",
+        TransactionReference="T1234C",
+        PurchasedItemsDesc="Shoes",
+    )
+    assert isinstance(output, dict)
+    assert json.loads(json.dumps(output))["ResponseCode"] == "INS-0"
+    assert transport.requests == 2
+    method, url, headers, params, body = transport.last_request
+    assert url.endswith("/sandbox/ipg/v2/vodacomTZN/c2bPayment/singleStage/")
+    assert body["input_Country"] == "TZN"
+
+
+def test_derived_context_shares_the_frozen_base_until_written():
+    base = APIContext(
+        api_key="key", address="host", headers={"Origin": "*"}).freeze()
+    with pytest.raises(TypeError):
+        base.add_header("Origin", "other")
+    child = base.derive(parameters={"input_Amount": "10"}, path="/c2b/")
+    assert child.get_headers() is base.get_headers()
+    child.add_header("Origin", "*")
+    assert child.get_headers() is base.get_headers()
+    child.add_header("Authorization", "Bearer x")
+    assert child.get_headers() == {"Origin": "*", "Authorization": "Bearer x"}
+    assert base.get_headers() == {"Origin": "*"}
+    assert child.path == "/c2b/" and base.path == ""
+    with pytest.raises(TypeError):
+        base.derive(unknown=1)
+
+
+def test_market_path_prefix_follows_the_market_and_env(public_key):
+    api = market_api(public_key, InMemoryTransport())
+    assert api._path("c2b/") == "/sandbox/ipg/v2/vodacomTZN/c2b/"
+    api.env = "production"
+    assert api._path("c2b/") == "/openapi/ipg/v2/vodacomTZN/c2b/"
+    market = Market("custom", "X", "XX", "XXX", "/sb/", "/live/")
+    custom = MarketAPI(public_key, "api-key", market=market)
+    assert custom._path("c2b/") == "/sb/c2b/"
+    assert (custom.sandbox_path, custom.live_path) == ("/sb/", "/live/")
+
+
+def test_market_paths_can_be_overridden_per_instance(public_key):
+    api = market_api(public_key, InMemoryTransport())
+    other = market_api(public_key, InMemoryTransport())
+    api.sandbox_path = "/custom/sandbox/"
+    api.live_path = "/custom/live/"
+    assert api._path("c2b/") == "/custom/sandbox/c2b/"
+    api.env = "production"
+    assert api._path("c2b/") == "/custom/live/c2b/"
+    assert api._background_twin()._path("c2b/") == "/custom/live/c2b/"
+    assert other._path("c2b/") == "/sandbox/ipg/v2/vodacomTZN/c2b/"
+    assert other.market.sandbox_path == "/sandbox/ipg/v2/vodacomTZN/"
@@ -0,0 +1,80 @@
+"""Tests of the bearer cache of mpesa.portalsdk.auth."""
+import threading
+from base64 import b64decode, b64encode
+
+import pytest
+from Crypto.Cipher import PKCS1_v1_5
+from Crypto.PublicKey import RSA
+
+from mpesa.portalsdk import BearerCache
+
+
+@pytest.fixture(scope="module")
+def key_pair():
+    """Return ``(private key, base64 DER public key)``."""
+    key = RSA.generate(1024)
+    public_key = b64encode(key.publickey().exportKey("DER")).decode("ascii")
+    return key, public_key
+
+
+def api_key_of(bearer, key):
+    """Return the API key encrypted in a ``Bearer`` value."""
+    scheme, token = bearer.split(" ")
+    assert scheme == "Bearer"
+    return PKCS1_v1_5.new(key).decrypt(b64decode(token), None).decode()
+
+
+def test_bearer_is_reused_for_its_lifetime(key_pair):
+    key, public_key = key_pair
+    now = [0.0]
+    cache = BearerCache(lifetime=60.0, clock=lambda: now[0])
+    bearer = cache.get("api-key", public_key)
+    assert api_key_of(bearer, key) == "api-key"
+    now[0] = 59.0
+    assert cache.get("api-key", public_key) is bearer
+    assert cache.get("other-key", public_key) != bearer
+    assert len(cache) == 2
+    now[0] = 60.0
+    refreshed = cache.get("api-key", public_key)
+    assert refreshed != bearer
+    assert api_key_of(refreshed, key) == "api-key"
+    assert cache.get("api-key", public_key) is refreshed
+
+
+def test_bearer_without_lifetime_is_kept_until_invalidated(key_pair):
+    key, public_key = key_pair
+    now = [0.0]
+    cache = BearerCache(lifetime=None, clock=lambda: now[0])
+    bearer = cache.get("api-key", public_key)
+    now[0] = 1e9
+    assert cache.get("api-key", public_key) is bearer
+    cache.invalidate("api-key", public_key)
+    cache.invalidate("unknown", public_key)
+    assert len(cache) == 0
+    assert cache.get("api-key", public_key) != bearer
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_concurrent_refresh_hands_out_valid_bearers(key_pair):
+    key, public_key = key_pair
+    now = [0.0]
+    cache = BearerCache(lifetime=60.0, clock=lambda: now[0])
+    cache.get("api-key", public_key)
+    now[0] = 120.0
+    barrier = threading.Barrier(8)
+    bearers = []
+
+    def get():
+        barrier.wait()
+        bearers.append(cache.get("api-key", public_key))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(bearers) == 8
+    assert {api_key_of(b, key) for b in bearers} == {"api-key"}
+    assert len(cache) == 1
+    assert cache.get("api-key", public_key) in bearers
@@ -0,0 +1,78 @@
+"""Tests of c2b_submit on mpesa.portalsdk.BackgroundLoop."""
+import json
+import threading
+
+from mpesa import mozambique, tanzania
+from mpesa.portalsdk import (
+    AsyncInMemoryTransport,
+    BackgroundLoop,
+    ExecutorTransport,
+    InMemoryTransport,
+    SessionManager,
+    background_loop,
+)
+
+BODY = json.dumps({
+    "output_ResponseCode": "INS-0",
+    "output_SessionID": "session",
+}).encode("utf-8")
+
+
+class RecordingSessions(SessionManager):
+    """Session manager recording the threads asking for a session."""
+
+    def __init__(self):
+        super().__init__(activation=0.0)
+        self.threads = []
+
+    def get(self, key, fetch):
+        self.threads.append(threading.current_thread())
+        return super().get(key, fetch)
+
+
+C2B = {
+    "Amount": "10",
+    "CustomerMSISDN": "000000000001",
+    "ServiceProviderCode": "000000",
+    "TransactionReference": "T1234C",
+}
+
+
+def test_transport_for_keeps_the_client_transport():
+    loop = BackgroundLoop()
+    try:
+        blocking = InMemoryTransport()
+        wrapped = loop.transport_for(blocking)
+        assert isinstance(wrapped, ExecutorTransport)
+        assert wrapped.transport is blocking
+        non_blocking = AsyncInMemoryTransport()
+        assert loop.transport_for(non_blocking) is non_blocking
+    finally:
+        loop.close()
+
+
+def test_market_c2b_submit_uses_the_client_transport(public_key):
+    transport = InMemoryTransport(content=BODY)
+    sessions = RecordingSessions()
+    api = tanzania.API(
+        public_key, "api-key", transport=transport, sessions=sessions)
+    future = api.c2b_submit(
+        ThirdPartyConversationID="conversation",
+        PurchasedItemsDesc="Shoes",
+        **C2B
+    )
+    assert future.result(5)["ResponseCode"] == "INS-0"
+    assert transport.requests == 2
+    assert transport.last_request[1].endswith("c2bPayment/singleStage/")
+    loop_thread = background_loop()._thread
+    assert sessions.threads
+    assert loop_thread not in sessions.threads
+
+
+def test_mozambique_c2b_submit_uses_the_client_transport(public_key):
+    transport = InMemoryTransport(content=BODY)
+    api = mozambique.API(public_key, "api-key", transport=transport)
+    future = api.c2b_submit(ThirdPartyReference="reference", **C2B)
+    assert future.result(5)["ResponseCode"] == "INS-0"
+    assert transport.requests == 1
+    assert transport.last_request[1].endswith("c2bPayment/singleStage/")
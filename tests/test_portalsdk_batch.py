@@ -0,0 +1,72 @@
+"""Tests of the b2c_batch of the portal market clients."""
+import json
+import threading
+
+from mpesa import tanzania
+from mpesa.batch import Checkpoint
+from mpesa.portalsdk import InMemoryTransport, SessionManager
+
+OUTCOMES = {"p0": "INS-0", "p1": "INS-10", "p2": None, "p3": "INS-0"}
+
+
+class Portal:
+    """Handler of an InMemoryTransport answering b2c per payout."""
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def __call__(self, method, url, headers, params, json_body):
+        if "getSession" in url:
+            body = {"output_ResponseCode": "INS-0", "output_SessionID": "s"}
+            return 200, {}, json.dumps(body).encode("utf-8")
+        payout = json_body["input_ThirdPartyConversationID"]
+        with self.lock:
+            self.sent.append(payout)
+        code = OUTCOMES[payout]
+        if code is None:
+            raise ConnectionError(payout)
+        body = {"output_ResponseCode": code, "output_ConversationID": payout}
+        return 200, {}, json.dumps(body).encode("utf-8")
+
+
+def payouts():
+    return [
+        {
+            "Amount": "10",
+            "CustomerMSISDN": "000000000001",
+            "ServiceProviderCode": "000000",
+            "ThirdPartyConversationID": key,
+            "TransactionReference": "Payroll",
+            "PaymentItemsDesc": "Salary",
+        }
+        for key in sorted(OUTCOMES)
+    ]
+
+
+def test_b2c_batch_resumes_from_its_checkpoint(public_key, tmp_path):
+    portal = Portal()
+    api = tanzania.API(
+        public_key,
+        "api-key",
+        transport=InMemoryTransport(portal),
+        sessions=SessionManager(activation=0.0),
+    )
+    path = str(tmp_path / "payroll.done")
+    checkpoint = Checkpoint(path)
+    results = {
+        r.key: r for r in api.b2c_batch(payouts(), 2, checkpoint)}
+    checkpoint.close()
+    assert set(results) == set(OUTCOMES)
+    assert results["p0"].response["ResponseCode"] == "INS-0"
+    assert results["p1"].response["ResponseCode"] == "INS-10"
+    assert isinstance(results["p2"].error, ConnectionError)
+    assert sorted(portal.sent) == sorted(OUTCOMES)
+
+    portal.sent.clear()
+    checkpoint = Checkpoint(path)
+    assert checkpoint.unknown == {"p2"}
+    assert [r.key for r in api.b2c_batch(payouts(), 2, checkpoint)] == [
+        "p1"]
+    checkpoint.close()
+    assert portal.sent == ["p1"]
@@ -0,0 +1,121 @@
+"""Tests of mpesa.portalsdk.billing."""
+import threading
+import time
+
+from mpesa.batch import Checkpoint
+from mpesa.portalsdk import BillingEngine
+from mpesa.ratelimit import RateLimiter
+
+
+class StubMarket:
+    """Market client recording direct debit calls."""
+
+    def __init__(self, rejected=()):
+        self.rejected = set(rejected)
+        self.created = []
+        self.charged = []
+        self.lock = threading.Lock()
+
+    def direct_debit_create(self, **mandate):
+        with self.lock:
+            self.created.append(mandate["CustomerMSISDN"])
+        if mandate["CustomerMSISDN"] in self.rejected:
+            return {"ResponseCode": "INS-2001"}
+        return {"ResponseCode": "INS-0"}
+
+    def direct_debit_payment(self, **charge):
+        with self.lock:
+            self.charged.append(charge["ThirdPartyConversationID"])
+        return {"ResponseCode": "INS-0"}
+
+
+def charges(cycle, msisdns):
+    return [
+        {
+            "Amount": "10",
+            "CustomerMSISDN": msisdn,
+            "ServiceProviderCode": "000000",
+            "ThirdPartyConversationID": "{}-{}".format(cycle, msisdn),
+            "mandate": {
+                "CustomerMSISDN": msisdn,
+                "ServiceProviderCode": "000000",
+            },
+        }
+        for msisdn in msisdns
+    ]
+
+
+def test_billing_engine_creates_each_mandate_once(tmp_path):
+    api = StubMarket(rejected={"003"})
+    mandates = str(tmp_path / "mandates.idx")
+    engine = BillingEngine(
+        api, mandates=mandates, rate_limiter=RateLimiter(1000),
+        concurrency=4)
+    msisdns = ["001", "002", "003", "001", "002"]
+    cycle = charges("c1", msisdns)
+    cycle[3]["ThirdPartyConversationID"] = "c1-001b"
+    cycle[4]["ThirdPartyConversationID"] = "c1-002b"
+    results = {r.key: r for r in engine.run_cycle(cycle)}
+    engine.close()
+    assert sorted(api.created) == ["001", "002", "003"]
+    assert results["c1-003"].response["ResponseCode"] == "INS-2001"
+    assert sorted(api.charged) == ["c1-001", "c1-001b", "c1-002", "c1-002b"]
+
+    api = StubMarket()
+    engine = BillingEngine(api, mandates=mandates)
+    list(engine.run_cycle(charges("c2", ["001", "002", "003"])))
+    engine.close()
+    assert api.created == ["003"]
+    assert sorted(api.charged) == ["c2-001", "c2-002", "c2-003"]
+
+
+def test_billing_cycle_resumes_from_its_checkpoint(tmp_path):
+    path = str(tmp_path / "cycle.done")
+    checkpoint = Checkpoint(path)
+    checkpoint.begin("c1-001")
+    checkpoint.add("c1-001")
+    checkpoint.close()
+    api = StubMarket()
+    engine = BillingEngine(api)
+    results = list(
+        engine.run_cycle(charges("c1", ["001", "002"]), path))
+    assert [r.key for r in results] == ["c1-002"]
+    assert api.charged == ["c1-002"]
+
+
+class SlowRejectingMarket(StubMarket):
+    """Market rejecting slow mandate creations, tracking their overlap."""
+
+    def __init__(self):
+        super(SlowRejectingMarket, self).__init__(rejected={"001"})
+        self.active = 0
+        self.overlap = 0
+
+    def direct_debit_create(self, **mandate):
+        with self.lock:
+            self.active += 1
+            self.overlap = max(self.overlap, self.active)
+        time.sleep(0.002)
+        with self.lock:
+            self.active -= 1
+        return super(SlowRejectingMarket, self).direct_debit_create(
+            **mandate)
+
+
+def test_rejected_mandates_are_never_created_concurrently():
+    api = SlowRejectingMarket()
+    engine = BillingEngine(api)
+    mandate = {"CustomerMSISDN": "001", "ServiceProviderCode": "000000"}
+
+    def create():
+        for _ in range(20):
+            engine.ensure_mandate(**mandate)
+
+    threads = [threading.Thread(target=create) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert api.overlap == 1
+    assert len(api.created) == 160
+    assert engine._locks == {}
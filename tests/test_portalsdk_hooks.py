@@ -0,0 +1,58 @@
+"""Tests of mpesa.portalsdk.hooks."""
+from mpesa.portalsdk import (
+    PHASES,
+    APIContext,
+    APIMethodType,
+    APIRequest,
+    InMemoryTransport,
+    PooledTransport,
+    TimingHooks,
+)
+
+
+def request(server, public_key, hooks, transport):
+    ctx = APIContext(
+        api_key="key",
+        public_key=public_key,
+        method_type=APIMethodType.POST,
+        address="127.0.0.1",
+        port=server.server_address[1] if server else 80,
+        path="/c2b",
+        parameters={"input_Amount": "10"},
+    )
+    return APIRequest(ctx, transport=transport, hooks=hooks).execute()
+
+
+def test_pooled_transport_reports_every_phase(http_server, public_key):
+    hooks = TimingHooks()
+    seen = []
+    hooks.add(seen.append)
+    transport = PooledTransport()
+    response = request(http_server, public_key, hooks, transport)
+    transport.close()
+    assert response.status_code == 200
+    timings, = seen
+    assert PHASES == ("encrypt", "serialize", "wait", "transfer", "decode")
+    assert all(value is not None for value in timings.as_dict().values())
+    assert timings.method == "POST" and timings.url.endswith("/c2b")
+    assert timings.status_code == 200
+    assert timings.total == sum(timings.as_dict().values())
+
+
+def test_failing_hook_is_ignored(public_key):
+    hooks = TimingHooks()
+    seen = []
+
+    @hooks.add
+    def broken(timings):
+        raise RuntimeError("broken hook")
+
+    hooks.add(seen.append)
+    response = request(None, public_key, hooks, InMemoryTransport())
+    assert response.body == {}
+    timings, = seen
+    assert timings.wait is None and timings.decode is not None
+    hooks.remove(broken)
+    assert len(hooks) == 1
+    hooks.clear()
+    assert not hooks
@@ -0,0 +1,168 @@
+"""Tests of the portal SessionID caches of mpesa.portalsdk.sessions."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mpesa.portalsdk import (
+    AsyncSessionManager,
+    AsyncSessionPool,
+    SessionManager,
+    SessionPool,
+)
+
+
+class Clock:
+    """Manually advanced clock whose sleeps advance it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+        await asyncio.sleep(0)
+
+
+def counter(prefix="session"):
+    """Return a fetch issuing numbered SessionIDs and the list of them."""
+    issued = []
+
+    def fetch():
+        issued.append("{}-{}".format(prefix, len(issued) + 1))
+        return issued[-1]
+
+    return fetch, issued
+
+
+def test_session_manager_waits_for_activation_once():
+    clock = Clock()
+    manager = SessionManager(
+        activation=30, lifetime=3600, refresh_margin=300,
+        clock=clock, sleep=clock.sleep)
+    fetch, issued = counter()
+    assert manager.get("key", fetch) == "session-1"
+    assert clock.slept == [30]
+    assert manager.get("key", fetch) == "session-1"
+    assert clock.slept == [30] and issued == ["session-1"]
+    manager.invalidate("key")
+    assert manager.get("key", fetch) == "session-2"
+    clock.now += 3600
+    assert manager.get("key", fetch) == "session-3"
+
+
+def test_session_manager_swaps_in_a_refreshed_session_once_live():
+    clock = Clock()
+    refreshed = threading.Event()
+    manager = SessionManager(
+        activation=0, lifetime=100, refresh_margin=50,
+        clock=clock, sleep=lambda seconds: refreshed.set())
+    fetch, issued = counter()
+    assert manager.get("key", fetch) == "session-1"
+    clock.now = 60
+    assert manager.get("key", fetch) == "session-1"
+    assert refreshed.wait(5)
+    deadline = time.monotonic() + 5
+    while manager.get("key", fetch) != "session-2":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert issued == ["session-1", "session-2"]
+
+
+def test_async_session_manager_serves_successive_loops():
+    clock = Clock()
+    manager = AsyncSessionManager(
+        activation=30, lifetime=100, refresh_margin=50,
+        clock=clock, sleep=clock.async_sleep)
+    issued = []
+
+    async def fetch():
+        await asyncio.sleep(0)
+        issued.append("session-{}".format(len(issued) + 1))
+        return issued[-1]
+
+    async def get():
+        ids = await asyncio.gather(
+            manager.get("key", fetch), manager.get("key", fetch))
+        await asyncio.sleep(0)
+        assert ids[0] == ids[1]
+        return ids[0]
+
+    assert asyncio.run(get()) == "session-1"
+    assert asyncio.run(get()) == "session-1"
+    clock.now = 200
+    assert asyncio.run(get()) == "session-2"
+    assert issued == ["session-1", "session-2"]
+
+
+def test_session_pool_spreads_requests_over_warm_sessions():
+    pool = SessionPool(size=2, activation=0.0)
+    fetch, issued = counter()
+    try:
+        ids = {pool.get("key", fetch) for _ in range(10)}
+        deadline = time.monotonic() + 5
+        while len(ids) < 2:
+            assert time.monotonic() < deadline
+            ids.add(pool.get("key", fetch))
+    finally:
+        pool.close()
+    assert ids == {"session-1", "session-2"}
+    assert issued == ["session-1", "session-2"]
+
+
+def test_session_pool_raises_the_fetch_error():
+    pool = SessionPool(size=1, activation=60.0)
+
+    def fetch():
+        raise ConnectionError("portal down")
+
+    try:
+        with pytest.raises(ConnectionError):
+            pool.get("key", fetch)
+    finally:
+        pool.close()
+
+
+def test_async_session_pool_restarts_its_worker_on_a_new_loop():
+    pool = AsyncSessionPool(size=1, activation=0.0)
+    issued = []
+
+    async def fetch():
+        await asyncio.sleep(0)
+        issued.append("session-{}".format(len(issued) + 1))
+        return issued[-1]
+
+    async def get():
+        return await asyncio.wait_for(pool.get("key", fetch), 5)
+
+    assert asyncio.run(get()) == "session-1"
+    pool.invalidate("key")
+    assert asyncio.run(get()) == "session-2"
+    pool.close()
+
+
+def test_session_pool_refills_once_every_session_expired():
+    now = [0.0]
+    pool = SessionPool(
+        size=1, activation=0.0, lifetime=100.0, refresh_margin=10.0,
+        clock=lambda: now[0])
+    fetch, issued = counter()
+    executor = ThreadPoolExecutor(1)
+    try:
+        assert pool.get("key", fetch) == "session-1"
+        now[0] = 500.0
+        session = executor.submit(pool.get, "key", fetch)
+        assert session.result(timeout=5) == "session-2"
+    finally:
+        pool.close()
+        executor.shutdown(wait=False)
+    assert issued == ["session-1", "session-2"]
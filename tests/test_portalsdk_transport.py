@@ -0,0 +1,68 @@
+"""Tests of mpesa.portalsdk.transport."""
+import asyncio
+
+import pytest
+
+from mpesa.portalsdk import APIContext, APIMethodType, APIRequest
+from mpesa.portalsdk.transport import (
+    AsyncPooledTransport,
+    shared_async_transport,
+)
+
+pytest.importorskip("aiohttp")
+
+
+def context(server, public_key):
+    """Return a context of a GET to the test server."""
+    return APIContext(
+        api_key="key",
+        public_key=public_key,
+        method_type=APIMethodType.GET,
+        address="127.0.0.1",
+        port=server.server_address[1],
+        path="/status",
+        parameters={"input_QueryReference": "1"},
+    )
+
+
+def test_shared_async_transport_serves_successive_loops(
+        http_server, public_key):
+    ctx = context(http_server, public_key)
+
+    async def call(close=False):
+        response = await APIRequest(ctx).execute_async()
+        if close:
+            await shared_async_transport().close()
+        return response
+
+    first = asyncio.run(call())
+    second = asyncio.run(call(close=True))
+    assert first.status_code == second.status_code == 200
+    assert second.body == {"output_ResponseCode": "INS-0"}
+    assert len(http_server.requests) == 2
+
+
+def test_async_pooled_transport_keeps_one_session_per_loop(http_server):
+    transport = AsyncPooledTransport()
+    url = "http://127.0.0.1:{}/".format(http_server.server_address[1])
+
+    async def call(close=False):
+        r = await transport.send("GET", url, {})
+        session = transport.session
+        if close:
+            await transport.close()
+        return r.status_code, session
+
+    status, first = asyncio.run(call())
+    assert status == 200
+    assert len(transport._sessions) == 1
+    status, second = asyncio.run(call(close=True))
+    assert status == 200
+    assert second is not first
+    assert second.closed
+    assert transport._sessions == {}
+
+
+def test_shared_async_transport_is_shared_per_limit():
+    assert shared_async_transport() is shared_async_transport()
+    assert shared_async_transport(10) is not shared_async_transport()
@@ -0,0 +1,72 @@
+"""Tests of mpesa.ratelimit."""
+import asyncio
+
+import pytest
+
+from mpesa.ratelimit import RateLimiter, TokenBucket
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_admits_a_burst_then_refills_at_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(4)] == [
+        True, True, True, False]
+    clock.now = 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now = 100.0
+    assert bucket.stats()["tokens"] == 3.0
+
+
+def test_reservations_queue_callers_in_arrival_order():
+    clock = Clock()
+    bucket = TokenBucket(rate=10, capacity=1, clock=clock)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+    assert bucket.reserve(timeout=0.25) is None
+    stats = bucket.stats()
+    assert stats["granted"] == 3 and stats["waited"] == 2
+    assert stats["wait_time"] == pytest.approx(0.3)
+    with pytest.raises(ValueError):
+        bucket.reserve(2)
+
+
+def test_acquire_gives_up_past_its_timeout():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0.01)
+    assert not asyncio.run(bucket.acquire_async(timeout=0.01))
+
+
+def test_acquire_async_waits_for_its_reservation():
+    bucket = TokenBucket(rate=100, capacity=1)
+
+    async def main():
+        return await asyncio.gather(
+            *[bucket.acquire_async() for _ in range(3)])
+
+    assert asyncio.run(main()) == [True, True, True]
+    assert bucket.stats()["waited"] == 2
+
+
+def test_rate_limiter_keeps_one_bucket_per_key():
+    limiter = RateLimiter(rate=1, limits={"600000": (5, 2), "600001": 3})
+    assert limiter.bucket("600000") is limiter.bucket("600000")
+    assert limiter.bucket("600000").capacity == 2
+    assert limiter.bucket("600001").rate == 3
+    assert limiter.bucket("other").capacity == 1
+    assert limiter.try_acquire("other")
+    assert not limiter.try_acquire("other")
+    assert limiter.try_acquire("600000")
+    assert set(limiter.stats()) == {"600000", "600001", "other"}